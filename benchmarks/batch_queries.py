@@ -0,0 +1,41 @@
+"""
+fill a many-to-many travel time matrix with one `find_path` per pair
+and with the batched `distances` call
+
+run from the project root with `python -m benchmarks.batch_queries`
+"""
+import random
+import time
+
+from pathfinders.pathfinders import DijkstrasAlgorithm
+from .common import load_london_graph
+
+
+def run(sizes: list[int], seed: int = 0):
+    graph = load_london_graph()
+    path_finder = DijkstrasAlgorithm(graph, use_csr=True)
+    rng = random.Random(seed)
+
+    for size in sizes:
+        stations = rng.sample(sorted(graph.nodes), size)
+
+        start_time = time.perf_counter()
+        for source in stations:
+            for target in stations:
+                path_finder.find_path(source, target)
+        pairwise_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        path_finder.distances(stations, stations)
+        batch_seconds = time.perf_counter() - start_time
+
+        print(
+            f"{size:3} x {size:<3} matrix: "
+            f"per pair {pairwise_seconds:7.3f} s, "
+            f"batched {batch_seconds:7.3f} s "
+            f"({pairwise_seconds / batch_seconds:.0f}x)"
+        )
+
+
+if __name__ == "__main__":
+    run([10, 30, 100])
@@ -0,0 +1,40 @@
+"""
+compare nodes settled and query time of the one-directional and
+bidirectional searches
+
+run from the project root with `python -m benchmarks.bidirectional`
+"""
+from pathfinders.bidirectional import (
+    BidirectionalDijkstra,
+    BidirectionalAStar,
+)
+from pathfinders.pathfinders import DijkstrasAlgorithm, AStarAlgorithm
+from .common import grid_graph, load_london_graph, random_pairs, time_queries
+
+
+def run(name: str, graph, num_queries: int):
+    print(f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+    pairs = random_pairs(graph, num_queries)
+
+    for path_finder in (
+        DijkstrasAlgorithm(graph, use_csr=True),
+        AStarAlgorithm(graph, use_csr=True),
+        BidirectionalDijkstra(graph),
+        BidirectionalAStar(graph),
+    ):
+        settled = 0
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+            settled += len(set(path_finder.nodes_visited))
+
+        seconds = time_queries(path_finder, pairs)
+        print(
+            f"  {type(path_finder).__name__:<22} "
+            f"{settled / len(pairs):10.1f} nodes settled/query "
+            f"{seconds * 1000:8.3f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph(), 500)
+    run("grid 200x200", grid_graph(200, 200), 20)
@@ -0,0 +1,70 @@
+import random
+import time
+
+from graph.builder import (
+    LondonGraphBuilder,
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+)
+from graph.graph import Graph
+from graph.store import NodeStore, EdgeStore
+
+
+def load_london_graph() -> Graph:
+    graph_builder = LondonGraphBuilder(
+        LONDON_STATIONS_FILE,
+        LONDON_CONNECTIONS_FILE,
+        LONDON_LINES_FILE,
+    )
+    return Graph(*graph_builder.build_components())
+
+
+def grid_graph(width: int, height: int, seed: int = 0) -> Graph:
+    """synthetic width x height grid network with random travel times"""
+    rng = random.Random(seed)
+    nodes = NodeStore()
+    edges = EdgeStore()
+
+    for row in range(height):
+        for col in range(width):
+            node_id = row * width + col + 1
+            nodes.add(
+                id=node_id,
+                latitude=51.4 + row * 0.001,
+                longitude=-0.6 + col * 0.001,
+                name=f"Stop {node_id}",
+            )
+            if col > 0:
+                edges.add(
+                    node_id - 1,
+                    node_id,
+                    line=rng.randint(1, 13),
+                    time=rng.randint(1, 5),
+                )
+            if row > 0:
+                edges.add(
+                    node_id - width,
+                    node_id,
+                    line=rng.randint(1, 13),
+                    time=rng.randint(1, 5),
+                )
+
+    lines = {line: (f"Line {line}", "808080") for line in range(1, 14)}
+    return Graph(nodes, edges, lines)
+
+
+def random_pairs(graph: Graph, count: int, seed: int = 0) -> list[tuple]:
+    rng = random.Random(seed)
+    node_ids = sorted(graph.nodes)
+    return [
+        (rng.choice(node_ids), rng.choice(node_ids)) for _ in range(count)
+    ]
+
+
+def time_queries(path_finder, pairs: list[tuple]) -> float:
+    """average seconds per `find_path` call over the given pairs"""
+    start_time = time.perf_counter()
+    for start, end in pairs:
+        path_finder.find_path(start, end)
+    return (time.perf_counter() - start_time) / len(pairs)
@@ -0,0 +1,60 @@
+"""
+contraction hierarchy preprocessing, loading and query times
+
+run from the project root with `python -m benchmarks.contraction`
+"""
+import os
+import tempfile
+import time
+
+from graph.builder import LONDON_STATIONS_FILE, LONDON_CONNECTIONS_FILE
+from pathfinders.bidirectional import BidirectionalDijkstra
+from pathfinders.contraction import (
+    ContractionHierarchy,
+    ContractionHierarchyPathFinder,
+)
+from pathfinders.pathfinders import DijkstrasAlgorithm
+from .common import grid_graph, load_london_graph, random_pairs, time_queries
+
+
+def run(name: str, graph, num_queries: int):
+    print(f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+
+    start_time = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(graph)
+    build_seconds = time.perf_counter() - start_time
+
+    source_files = [LONDON_STATIONS_FILE, LONDON_CONNECTIONS_FILE]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "hierarchy.bin")
+        hierarchy.save(path, source_files)
+        start_time = time.perf_counter()
+        loaded = ContractionHierarchy.load(path, source_files)
+        load_seconds = time.perf_counter() - start_time
+        del loaded
+    print(
+        f"  {hierarchy.num_shortcuts} shortcuts, built in "
+        f"{build_seconds:.3f} s, loaded in {load_seconds * 1000:.3f} ms"
+    )
+
+    pairs = random_pairs(graph, num_queries)
+    for path_finder in (
+        DijkstrasAlgorithm(graph, use_csr=True),
+        BidirectionalDijkstra(graph),
+        ContractionHierarchyPathFinder(graph, hierarchy),
+    ):
+        settled = 0
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+            settled += len(set(path_finder.nodes_visited))
+        seconds = time_queries(path_finder, pairs)
+        print(
+            f"  {type(path_finder).__name__:<32} "
+            f"{settled / len(pairs):8.1f} nodes settled/query "
+            f"{seconds * 1000:8.3f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph(), 500)
+    run("grid 60x60", grid_graph(60, 60), 200)
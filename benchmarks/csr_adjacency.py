@@ -0,0 +1,57 @@
+"""
+compare the dict-of-lists adjacency with the CSR arrays
+
+run from the project root with `python -m benchmarks.csr_adjacency`
+"""
+import tracemalloc
+
+from graph.csr import CSRAdjacency
+from graph.graph import Graph
+from pathfinders.pathfinders import (
+    DijkstrasAlgorithm,
+    AStarAlgorithm,
+    BFSAlgorithm,
+)
+from .common import grid_graph, load_london_graph, random_pairs, time_queries
+
+
+def measure_memory(graph: Graph) -> tuple[int, int]:
+    # `Graph.adj` is built from the existing nodes and edges on first use
+    tracemalloc.start()
+    adj_graph = Graph(graph.nodes, graph.edges, graph.lines).adj
+    adj_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    csr = CSRAdjacency.from_graph(graph)
+    csr_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del adj_graph, csr
+    return adj_bytes, csr_bytes
+
+
+def run(name: str, graph: Graph, num_queries: int):
+    adj_bytes, csr_bytes = measure_memory(graph)
+    print(
+        f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges\n"
+        f"  adjacency memory: dict-of-lists {adj_bytes / 1024:.1f} KiB, "
+        f"csr {csr_bytes / 1024:.1f} KiB "
+        f"({adj_bytes / csr_bytes:.1f}x smaller)"
+    )
+
+    pairs = random_pairs(graph, num_queries)
+    for algorithm in (DijkstrasAlgorithm, AStarAlgorithm, BFSAlgorithm):
+        dict_time = time_queries(algorithm(graph), pairs)
+        csr_time = time_queries(algorithm(graph, use_csr=True), pairs)
+        print(
+            f"  {algorithm.__name__:<20} dict-of-lists "
+            f"{dict_time * 1000:8.3f} ms/query, csr "
+            f"{csr_time * 1000:8.3f} ms/query "
+            f"({dict_time / csr_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph(), 500)
+    run("grid 200x200", grid_graph(200, 200), 20)
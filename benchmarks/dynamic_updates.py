@@ -0,0 +1,78 @@
+"""
+delays and closures applied to saved shortest path trees and to the
+all-pairs matrix, repaired in place versus recomputed from scratch
+
+run from the project root with `python -m benchmarks.dynamic_updates`
+"""
+import random
+import time
+
+from pathfinders.distance_matrix import DistanceMatrix
+from pathfinders.sssp import shortest_path_tree
+from .common import grid_graph, load_london_graph
+
+
+def disruptions(graph, rng: random.Random, count: int):
+    """apply `count` random delays, speed-ups, closures and reopenings"""
+    for _ in range(count):
+        edge = graph.edges[rng.randrange(len(graph.edges))]
+        roll = rng.random()
+        if roll < 0.2 and graph.closed_edges:
+            graph.open_edge(graph.edges[min(graph.closed_edges)])
+        elif roll < 0.4:
+            graph.close_edge(edge)
+        elif roll < 0.7:
+            graph.set_edge_time(edge, edge.time + rng.randint(1, 10))
+        else:
+            graph.set_edge_time(edge, max(1, edge.time - rng.randint(1, 3)))
+        yield edge
+
+
+def run(graph, name: str, num_trees: int = 50, num_edits: int = 40):
+    rng = random.Random(0)
+    sources = rng.sample(sorted(graph.nodes), num_trees)
+    trees = [shortest_path_tree(graph.csr, source) for source in sources]
+    matrix = DistanceMatrix.build(graph)
+
+    touched = 0
+
+    def repair_trees(edge_id, old_time, new_time):
+        nonlocal touched
+        edge = graph.edges[edge_id]
+        for tree in trees:
+            touched += tree.repair(
+                edge.node1, edge.node2, edge_id, old_time, new_time
+            )
+
+    graph.subscribe(repair_trees)
+    matrix.watch()
+
+    start_time = time.perf_counter()
+    for _ in disruptions(graph, rng, num_edits):
+        pass
+    repair_seconds = (time.perf_counter() - start_time) / num_edits
+
+    # one full recomputation stands for what every edit used to cost
+    start_time = time.perf_counter()
+    fresh = [shortest_path_tree(graph.csr, source) for source in sources]
+    rebuild_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    fresh_matrix = DistanceMatrix.build(graph)
+    rebuild_seconds += time.perf_counter() - start_time
+
+    assert all(tree.dist == other.dist for tree, other in zip(trees, fresh))
+    assert list(matrix.dist) == list(fresh_matrix.dist)
+    n = len(matrix.node_ids)
+    print(
+        f"{name}: {num_edits} edits on {num_trees} trees and a {n}x{n} "
+        f"matrix, repair {repair_seconds * 1000:7.2f} ms/edit, "
+        f"rebuild {rebuild_seconds * 1000:7.2f} ms "
+        f"({rebuild_seconds / repair_seconds:.0f}x); "
+        f"{touched / (num_edits * num_trees):.1f} tree nodes and "
+        f"{matrix.rows_repaired / num_edits:.1f} matrix rows per edit"
+    )
+
+
+if __name__ == "__main__":
+    run(load_london_graph(), "london")
+    run(grid_graph(20, 20), "20x20 grid")
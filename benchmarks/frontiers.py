@@ -0,0 +1,34 @@
+"""
+compare the pathfinder frontiers against the old locking
+`queue.PriorityQueue`
+
+run from the project root with `python -m benchmarks.frontiers`
+"""
+import queue
+
+from pathfinders.frontiers import FRONTIERS
+from pathfinders.pathfinders import DijkstrasAlgorithm, AStarAlgorithm
+from .common import grid_graph, load_london_graph, random_pairs, time_queries
+
+
+def run(name: str, graph, num_queries: int):
+    print(f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+    pairs = random_pairs(graph, num_queries)
+    frontiers = {"queue.PriorityQueue": queue.PriorityQueue, **FRONTIERS}
+
+    for algorithm in (DijkstrasAlgorithm, AStarAlgorithm):
+        for frontier_name, frontier in frontiers.items():
+            path_finder = algorithm(graph, use_csr=True, frontier=frontier)
+            try:
+                seconds = time_queries(path_finder, pairs)
+            except TypeError:  # float A* priorities in the bucket queue
+                continue
+            print(
+                f"  {algorithm.__name__:<20} {frontier_name:<20} "
+                f"{seconds * 1000:8.3f} ms/query"
+            )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph(), 500)
+    run("grid 200x200", grid_graph(200, 200), 20)
@@ -0,0 +1,65 @@
+"""
+memory held by the stations and connections as dict-backed objects, the
+previous representation, and as columnar stores with `__slots__` views
+
+run from the project root with `python -m benchmarks.graph_memory`
+"""
+import tracemalloc
+
+from graph.graph import Graph
+from graph.store import NodeStore, EdgeStore
+from .common import grid_graph, load_london_graph
+
+
+class DictNode:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class DictEdge:
+    def __init__(self, node1: int, node2: int, **kwargs):
+        self.node1 = node1
+        self.node2 = node2
+        self.__dict__.update(kwargs)
+
+
+def traced(build) -> int:
+    tracemalloc.start()
+    components = build()  # noqa: F841 keep alive while measuring
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used
+
+
+def as_objects(graph: Graph):
+    nodes = {
+        node_id: DictNode(**node.columns())
+        for node_id, node in graph.nodes.items()
+    }
+    edges = [
+        DictEdge(edge.node1, edge.node2, line=edge.line, time=edge.time)
+        for edge in graph.edges
+    ]
+    return nodes, edges
+
+
+def as_stores(graph: Graph):
+    nodes = NodeStore.from_nodes(graph.nodes.values())
+    edges = EdgeStore.from_edges(graph.edges)
+    return nodes, edges
+
+
+def run(name: str, graph: Graph):
+    object_bytes = traced(lambda: as_objects(graph))
+    store_bytes = traced(lambda: as_stores(graph))
+    print(
+        f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges: "
+        f"objects {object_bytes / 1024:9.1f} KiB, "
+        f"columnar {store_bytes / 1024:9.1f} KiB "
+        f"({object_bytes / store_bytes:.1f}x smaller)"
+    )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph())
+    run("grid 300x300", grid_graph(300, 300))
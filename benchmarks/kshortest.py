@@ -0,0 +1,56 @@
+"""
+k shortest loopless routes on the London network for growing k: time
+per query with and without the destination's tree already kept, and
+the stations each spur search settles before the tree finishes it
+
+run from the project root with `python -m benchmarks.kshortest`
+"""
+import time
+
+from pathfinders.kshortest import KShortestPaths
+from pathfinders.pathfinders import DijkstrasAlgorithm
+from .common import load_london_graph, random_pairs
+
+
+def run(graph, name: str, num_queries: int = 200):
+    pairs = random_pairs(graph, num_queries)
+    print(f"{name}: {num_queries} queries")
+
+    path_finder = DijkstrasAlgorithm(graph, use_csr=True)
+    start_time = time.perf_counter()
+    for start, end in pairs:
+        path_finder.find_path(start, end)
+    seconds = (time.perf_counter() - start_time) / num_queries
+    print(f"  {'dijkstra':<10} {seconds * 1000:8.3f} ms/query")
+
+    ends = {end for _, end in pairs}
+    for k in (1, 2, 4, 8, 16, 32):
+        # cold: every query grows the tree from its destination
+        path_finder = KShortestPaths(graph, k=k, max_trees=1)
+        start_time = time.perf_counter()
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+        cold = (time.perf_counter() - start_time) / num_queries
+
+        # warm: a first pass keeps the tree of every destination
+        path_finder = KShortestPaths(graph, k=k, max_trees=len(ends))
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+        routes = spurs = settled = 0
+        start_time = time.perf_counter()
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+            routes += len(path_finder.routes)
+            spurs += path_finder.spurs
+            settled += len(path_finder.nodes_visited)
+        warm = (time.perf_counter() - start_time) / num_queries
+        print(
+            f"  k={k:<8} {cold * 1000:8.3f} ms/query, "
+            f"{warm * 1000:8.3f} with the tree kept, "
+            f"{routes / num_queries:5.1f} routes, "
+            f"{spurs / num_queries:6.1f} spurs, "
+            f"{settled / max(spurs, 1):4.1f} stations settled per spur"
+        )
+
+if __name__ == "__main__":
+    run(load_london_graph(), "london")
@@ -0,0 +1,44 @@
+"""
+node expansions of A* with the euclidean and ALT heuristics against
+plain dijkstra
+
+run from the project root with `python -m benchmarks.landmarks`
+"""
+from pathfinders.bidirectional import BidirectionalAStar
+from pathfinders.landmarks import LandmarkTable
+from pathfinders.pathfinders import DijkstrasAlgorithm, AStarAlgorithm
+from .common import grid_graph, load_london_graph, random_pairs, time_queries
+
+
+def run(name: str, graph, num_queries: int):
+    print(f"{name}: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+    pairs = random_pairs(graph, num_queries)
+
+    path_finders = {
+        "dijkstra": DijkstrasAlgorithm(graph, use_csr=True),
+        "a* euclidean": AStarAlgorithm(graph, use_csr=True),
+    }
+    for num_landmarks in (2, 4, 8, 16):
+        landmarks = LandmarkTable.build(graph, num_landmarks)
+        path_finders[f"a* alt k={num_landmarks}"] = AStarAlgorithm(
+            graph, use_csr=True, landmarks=landmarks
+        )
+    path_finders["bidirectional a* alt k=16"] = BidirectionalAStar(
+        graph, landmarks=landmarks
+    )
+
+    for label, path_finder in path_finders.items():
+        expanded = 0
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+            expanded += len(path_finder.nodes_visited)
+        seconds = time_queries(path_finder, pairs)
+        print(
+            f"  {label:<26} {expanded / len(pairs):10.1f} "
+            f"nodes expanded/query {seconds * 1000:8.3f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    run("london", load_london_graph(), 500)
+    run("grid 100x100", grid_graph(100, 100), 50)
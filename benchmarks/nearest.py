@@ -0,0 +1,70 @@
+"""
+nearest station lookups from the k-d tree against a scan of every
+station, one position at a time and snapped in a batch of trip data
+
+run from the project root with `python -m benchmarks.nearest`
+"""
+import math
+import random
+import time
+
+from graph.spatial import KDTree
+from .common import grid_graph, load_london_graph
+
+
+def trip_positions(nodes, count: int, seed: int = 0) -> list[tuple]:
+    """(longitude, latitude) points wandering across the network"""
+    rng = random.Random(seed)
+    x0, x1 = min(nodes.longitude), max(nodes.longitude)
+    y0, y1 = min(nodes.latitude), max(nodes.latitude)
+    x, y = rng.uniform(x0, x1), rng.uniform(y0, y1)
+    positions = []
+    for _ in range(count):
+        x = min(x1, max(x0, x + rng.gauss(0, 0.002)))
+        y = min(y1, max(y0, y + rng.gauss(0, 0.002)))
+        positions.append((x, y))
+    return positions
+
+
+def run(graph, name: str, num_queries: int = 2000):
+    start_time = time.perf_counter()
+    tree = KDTree.from_nodes(graph.nodes)
+    build_seconds = time.perf_counter() - start_time
+
+    positions = trip_positions(graph.nodes, num_queries)
+    stations = list(
+        zip(graph.nodes.ids, graph.nodes.longitude, graph.nodes.latitude)
+    )
+    x_scale, y_scale = tree.x_scale, tree.y_scale
+
+    start_time = time.perf_counter()
+    scanned = [
+        min(
+            stations,
+            key=lambda s: math.hypot(
+                (s[1] - x) * x_scale, (s[2] - y) * y_scale
+            ),
+        )[0]
+        for x, y in positions[: num_queries // 10]
+    ]
+    scan = (time.perf_counter() - start_time) / len(scanned)
+
+    start_time = time.perf_counter()
+    nearest = [tree.nearest(x, y)[0] for x, y in positions]
+    single = (time.perf_counter() - start_time) / num_queries
+
+    start_time = time.perf_counter()
+    snapped = [node_id for node_id, _ in tree.snap(positions)]
+    batch = (time.perf_counter() - start_time) / num_queries
+
+    assert nearest[: len(scanned)] == scanned and snapped == nearest
+    print(
+        f"{name}: built in {build_seconds * 1000:.0f} ms; nearest "
+        f"{single * 1e6:.1f} us, snapped in a batch {batch * 1e6:.1f} us, "
+        f"scan {scan * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    run(load_london_graph(), "london")
+    run(grid_graph(320, 320), "320x320 grid")
@@ -0,0 +1,44 @@
+"""
+throughput of the process pool executor by worker count
+
+run from the project root with `python -m benchmarks.parallel_queries`
+"""
+import os
+import time
+
+from pathfinders.parallel import ParallelQueryExecutor
+from .common import load_london_graph, random_pairs
+
+
+def run(num_queries: int, worker_counts: list[int]):
+    graph = load_london_graph()
+    pairs = random_pairs(graph, num_queries)
+    stations = sorted(graph.nodes)
+    print(f"{num_queries} OD pairs, {os.cpu_count()} cpus")
+
+    baseline = None
+    for workers in worker_counts:
+        with ParallelQueryExecutor(workers=workers) as executor:
+            # warm the pool up so worker start-up is not timed
+            executor.find_paths(pairs[:workers])
+
+            start_time = time.perf_counter()
+            executor.find_paths(pairs)
+            path_seconds = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            executor.distances(stations, stations)
+            matrix_seconds = time.perf_counter() - start_time
+
+        throughput = num_queries / path_seconds
+        baseline = baseline or throughput
+        print(
+            f"  {workers:2} workers: {throughput:9.0f} queries/s "
+            f"({throughput / baseline:.2f}x), "
+            f"{len(stations)}x{len(stations)} matrix "
+            f"in {matrix_seconds:.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    run(5000, [1, 2, 4, 8])
@@ -0,0 +1,33 @@
+"""
+time SubwayPatrolPlanning on growing patrol sets
+
+run from the project root with `python -m benchmarks.patrol_planning`
+"""
+import random
+import time
+
+from pathfinders.distance_matrix import DistanceMatrix
+from planners.planners import SubwayPatrolPlanning
+from .common import load_london_graph
+
+
+def run(sizes: list[int], seed: int = 0):
+    graph = load_london_graph()
+    planner = SubwayPatrolPlanning(graph, DistanceMatrix.build(graph))
+    rng = random.Random(seed)
+
+    for size in sizes:
+        stations = rng.sample(sorted(graph.nodes), size)
+        start_time = time.perf_counter()
+        planner.find_path(stations)
+        seconds = time.perf_counter() - start_time
+        print(
+            f"{size:3} stations: tour {planner.total_time:5} min "
+            f"in {seconds:7.3f} s, "
+            f"{'exact' if planner.exact else 'approximate'}, "
+            f"{planner.gap:.1%} above lower bound {planner.lower_bound}"
+        )
+
+
+if __name__ == "__main__":
+    run([5, 10, 12, 15, 40, 80, 150])
@@ -0,0 +1,59 @@
+"""
+time building the graph components from the CSV dataset and from the
+binary snapshot, including compiling the snapshot the first time
+
+run from the project root with `python -m benchmarks.startup`
+"""
+import os
+import tempfile
+import time
+
+from graph.builder import (
+    LondonGraphBuilder,
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+)
+from graph.graph import Graph
+from graph.snapshot import SnapshotGraphBuilder
+
+DATASET = (LONDON_STATIONS_FILE, LONDON_CONNECTIONS_FILE, LONDON_LINES_FILE)
+
+
+def best_of(load, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        Graph(*load())
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def run(repeat: int = 20):
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_file = os.path.join(directory, "london.graph.bin")
+
+        start_time = time.perf_counter()
+        SnapshotGraphBuilder(*DATASET, snapshot_file).build_components()
+        compile_seconds = time.perf_counter() - start_time
+
+        csv_seconds = best_of(
+            lambda: LondonGraphBuilder(*DATASET).build_components(), repeat
+        )
+        snapshot_seconds = best_of(
+            lambda: SnapshotGraphBuilder(
+                *DATASET, snapshot_file
+            ).build_components(),
+            repeat,
+        )
+
+    print(f"compile snapshot: {compile_seconds * 1000:7.2f} ms")
+    print(f"load from CSV:    {csv_seconds * 1000:7.2f} ms")
+    print(
+        f"load snapshot:    {snapshot_seconds * 1000:7.2f} ms "
+        f"({csv_seconds / snapshot_seconds:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,88 @@
+"""
+peak memory while loading a large gzipped CSV network through the
+streaming builder, compared with the memory the finished graph keeps
+
+run from the project root with `python -m benchmarks.streaming_load`
+"""
+import csv
+import gzip
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from graph.builder import LondonGraphBuilder
+from graph.graph import Graph
+
+
+def write_grid_dataset(directory: str, width: int, seed: int = 0):
+    """gzipped stations, connections and lines files for a grid network"""
+    rng = random.Random(seed)
+    paths = [
+        os.path.join(directory, f"grid.{name}.csv.gz")
+        for name in ("stations", "connections", "lines")
+    ]
+    with gzip.open(paths[0], "wt", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["id", "latitude", "longitude", "name", "zone"])
+        for node_id in range(1, width * width + 1):
+            row, col = divmod(node_id - 1, width)
+            writer.writerow(
+                [
+                    node_id,
+                    51.4 + row * 0.001,
+                    -0.6 + col * 0.001,
+                    f"Stop {node_id}",
+                    1 + row * 6 // width,
+                ]
+            )
+    with gzip.open(paths[1], "wt", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["station1", "station2", "line", "time"])
+        for node_id in range(1, width * width + 1):
+            row, col = divmod(node_id - 1, width)
+            for neighbour in (
+                node_id - 1 if col else None,
+                node_id - width if row else None,
+            ):
+                if neighbour is not None:
+                    writer.writerow(
+                        [neighbour, node_id, rng.randint(1, 13), 1 + col % 5]
+                    )
+    with gzip.open(paths[2], "wt", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["line", "name", "colour"])
+        for line in range(1, 14):
+            writer.writerow([line, f"Line {line}", "808080"])
+    return paths
+
+
+def run(width: int):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_grid_dataset(directory, width)
+        raw_bytes = 0
+        for path in paths:
+            with gzip.open(path, "rb") as file:
+                raw_bytes += sum(len(chunk) for chunk in iter(file.read, b""))
+
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        graph = Graph(*LondonGraphBuilder(*paths).build_components())
+        graph.csr
+        seconds = time.perf_counter() - start_time
+        kept_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    mib = 1024 * 1024
+    print(
+        f"{width}x{width} grid, {len(graph.nodes)} nodes, "
+        f"{len(graph.edges)} edges, {raw_bytes / mib:.1f} MiB of CSV: "
+        f"loaded in {seconds:.2f} s, graph keeps {kept_bytes / mib:.1f} MiB, "
+        f"peak {peak_bytes / mib:.1f} MiB ({peak_bytes / kept_bytes:.2f}x)"
+    )
+
+
+if __name__ == "__main__":
+    for width in (100, 300):
+        run(width)
@@ -0,0 +1,54 @@
+"""
+earliest-arrival queries per second with the Connection Scan Algorithm on
+a full-day timetable generated from the London network
+
+run from the project root with `python -m benchmarks.timetable`
+"""
+import random
+import time
+
+from pathfinders.timetable import Timetable, TimetablePathFinder
+from .common import load_london_graph, random_pairs
+
+
+def run(num_queries: int = 2000, seed: int = 0):
+    graph = load_london_graph()
+
+    start_time = time.perf_counter()
+    timetable = Timetable.from_graph(graph)
+    build_seconds = time.perf_counter() - start_time
+    print(
+        f"{len(timetable)} connections on {timetable.num_trips} trips, "
+        f"built in {build_seconds:.2f} s"
+    )
+
+    rng = random.Random(seed)
+    pairs = random_pairs(graph, num_queries, seed)
+    departures = [rng.randint(6 * 3600, 22 * 3600) for _ in pairs]
+
+    for transfer_time in (0, 120):
+        scanned = 0
+        start_time = time.perf_counter()
+        for (start, end), departure in zip(pairs, departures):
+            journeys = timetable.earliest_arrival(
+                start, departure, end, transfer_time
+            )
+            scanned += journeys.scanned
+        seconds = time.perf_counter() - start_time
+        print(
+            f"  transfer {transfer_time:3} s: "
+            f"{num_queries / seconds:7.0f} queries/s, "
+            f"{scanned / num_queries:7.0f} connections scanned/query"
+        )
+
+    path_finder = TimetablePathFinder(graph, timetable)
+    start_time = time.perf_counter()
+    for (start, end), departure in zip(pairs, departures):
+        path_finder.departure = departure
+        path_finder.find_path(start, end)
+    seconds = time.perf_counter() - start_time
+    print(f"  with routes:    {num_queries / seconds:7.0f} queries/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,62 @@
+"""
+routes with a line-change penalty and Pareto sets of (time, changes)
+routes, compared with plain dijkstra on the same queries
+
+run from the project root with `python -m benchmarks.transfers`
+"""
+import time
+
+from pathfinders.pathfinders import DijkstrasAlgorithm
+from pathfinders.transfers import TransferPathFinder
+from .common import load_london_graph, random_pairs
+
+
+def changes(edge_route) -> int:
+    return sum(
+        1
+        for previous, edge in zip(edge_route, edge_route[1:])
+        if edge.line != previous.line
+    )
+
+
+def run(name: str, graph, num_queries: int):
+    pairs = random_pairs(graph, num_queries)
+    print(f"{name}: {num_queries} queries")
+
+    for label, path_finder in (
+        ("dijkstra", DijkstrasAlgorithm(graph, use_csr=True)),
+        ("penalty 0", TransferPathFinder(graph, transfer_penalty=0)),
+        ("penalty 5", TransferPathFinder(graph, transfer_penalty=5)),
+        ("penalty 15", TransferPathFinder(graph, transfer_penalty=15)),
+    ):
+        total_time = total_changes = 0
+        start_time = time.perf_counter()
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+            total_time += path_finder.total_time
+            total_changes += changes(path_finder.edge_route)
+        seconds = (time.perf_counter() - start_time) / num_queries
+        print(
+            f"  {label:<12} {seconds * 1000:8.3f} ms/query, "
+            f"{total_time / num_queries:6.1f} min, "
+            f"{total_changes / num_queries:4.2f} changes"
+        )
+
+    path_finder = TransferPathFinder(graph)
+    routes = labels = 0
+    start_time = time.perf_counter()
+    for start, end in pairs:
+        routes += len(path_finder.pareto_routes(start, end))
+        labels += path_finder.labels_created
+    seconds = (time.perf_counter() - start_time) / num_queries
+    print(
+        f"  {'pareto':<12} {seconds * 1000:8.3f} ms/query, "
+        f"{routes / num_queries:4.2f} routes, "
+        f"{labels / num_queries:.0f} labels/query"
+    )
+
+
+if __name__ == "__main__":
+    # the synthetic grid assigns lines at random, so only the real
+    # network has meaningful changes
+    run("london", load_london_graph(), 500)
@@ -0,0 +1,48 @@
+"""
+fan-out queries from a few origins to every station, answered by fresh
+searches and by reusing each origin's shortest path tree, plus isochrones
+
+run from the project root with `python -m benchmarks.tree_reuse`
+"""
+import random
+import time
+
+from pathfinders.pathfinders import DijkstrasAlgorithm
+from .common import grid_graph, load_london_graph
+
+
+def run(graph, name: str, num_origins: int = 5, seed: int = 0):
+    rng = random.Random(seed)
+    node_ids = sorted(graph.nodes)
+    origins = rng.sample(node_ids, num_origins)
+    pairs = [(origin, target) for origin in origins for target in node_ids]
+    rng.shuffle(pairs)
+
+    timings = {}
+    for label, path_finder in (
+        ("fresh", DijkstrasAlgorithm(graph, use_csr=True)),
+        ("reused", DijkstrasAlgorithm(graph, max_trees=num_origins)),
+    ):
+        start_time = time.perf_counter()
+        for start, end in pairs:
+            path_finder.find_path(start, end)
+        timings[label] = (time.perf_counter() - start_time) / len(pairs)
+
+    path_finder = DijkstrasAlgorithm(graph)
+    start_time = time.perf_counter()
+    reached = [len(path_finder.reachable(origin, 20)) for origin in origins]
+    isochrone_seconds = (time.perf_counter() - start_time) / num_origins
+
+    print(
+        f"{name}: {len(pairs)} fan-out queries, "
+        f"fresh {timings['fresh'] * 1e6:8.1f} us, "
+        f"reused {timings['reused'] * 1e6:8.1f} us "
+        f"({timings['fresh'] / timings['reused']:.0f}x); "
+        f"20 minute isochrone {isochrone_seconds * 1000:.2f} ms "
+        f"({sum(reached) / num_origins:.0f} stations)"
+    )
+
+
+if __name__ == "__main__":
+    run(load_london_graph(), "london")
+    run(grid_graph(60, 60), "60x60 grid")
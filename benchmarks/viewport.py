@@ -0,0 +1,90 @@
+"""
+canvas items drawn for a large network when the whole map is in view and
+when zoomed in, with viewport culling and outlines, against drawing
+every station and connection, plus grid index lookups against a scan
+
+items are counted on a stand-in canvas, so this runs without a display
+
+run from the project root with `python -m benchmarks.viewport`
+"""
+import random
+import time
+
+from styles.renderer import SearchRenderer
+from styles.viewport import Viewport
+from .common import grid_graph, load_london_graph
+
+
+class CountingCanvas:
+    """the part of `tk.Canvas` the renderer uses, counting items"""
+
+    def __init__(self):
+        self.items = 0
+
+    def create_line(self, *coords, **options):
+        self.items += 1
+        return self.items
+
+    create_oval = create_line
+
+    def delete(self, tag):
+        self.items = 0
+
+    def tag_lower(self, tag):
+        pass
+
+
+def run(
+    graph, name: str, x_scale: float, y_scale: float, num_queries: int = 200
+):
+    viewport = Viewport(1200, 800, -0.6, 51.4, x_scale, y_scale)
+    canvas = CountingCanvas()
+
+    start_time = time.perf_counter()
+    renderer = SearchRenderer(canvas, graph, viewport)
+    index_seconds = time.perf_counter() - start_time
+
+    unculled = len(graph.nodes) + len(renderer.pairs)
+    results = []
+    for label, zoom in (("full view", 1), ("zoomed x8", 8)):
+        viewport.zoom_at(zoom, 300, 300)
+        start_time = time.perf_counter()
+        renderer.draw_network()
+        seconds = time.perf_counter() - start_time
+        results.append(
+            f"{label} {canvas.items} items in {seconds * 1000:.0f} ms"
+        )
+
+    # rectangles a tenth of the map across, against a scan of every node
+    rng = random.Random(0)
+    rectangles = []
+    for _ in range(num_queries):
+        x = rng.uniform(-0.6, -0.6 + 800 / x_scale)
+        y = rng.uniform(51.4, 51.4 + 800 / y_scale)
+        rectangles.append((x, y, x + 80 / x_scale, y + 80 / y_scale))
+    positions = list(renderer.positions.items())
+
+    start_time = time.perf_counter()
+    for x0, y0, x1, y1 in rectangles:
+        renderer.node_index.query(x0, y0, x1, y1)
+    indexed = (time.perf_counter() - start_time) / num_queries
+
+    start_time = time.perf_counter()
+    for x0, y0, x1, y1 in rectangles:
+        [
+            node
+            for node, (x, y) in positions
+            if x0 <= x <= x1 and y0 <= y <= y1
+        ]
+    scanned = (time.perf_counter() - start_time) / num_queries
+
+    print(
+        f"{name}: {unculled} items unculled; {'; '.join(results)}; "
+        f"indexed in {index_seconds:.1f} s, rectangle query "
+        f"{indexed * 1e6:.0f} us vs scan {scanned * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    run(load_london_graph(), "london", x_scale=800, y_scale=2400)
+    run(grid_graph(320, 320), "320x320 grid", x_scale=2400, y_scale=2400)
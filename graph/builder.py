@@ -1,17 +1,49 @@
 from abc import ABC, abstractmethod
+from itertools import islice
 from typing import Tuple
-from .graph import Node, Edge
+from .store import NodeStore, EdgeStore
 import csv
+import gzip
+
+LONDON_STATIONS_FILE = "_dataset/london.stations.csv"
+LONDON_CONNECTIONS_FILE = "_dataset/london.connections.csv"
+LONDON_LINES_FILE = "_dataset/london.lines.csv"
+LONDON_DISTANCES_FILE = "_dataset/london.distances.bin"
+LONDON_HIERARCHY_FILE = "_dataset/london.hierarchy.bin"
+LONDON_LANDMARKS_FILE = "_dataset/london.landmarks.bin"
+LONDON_SNAPSHOT_FILE = "_dataset/london.graph.bin"
+
+CHUNK_SIZE = 1 << 16  # rows converted and appended to the stores at once
+
+
+def open_text(path: str):
+    """open a text file for reading, decompressing it if it is gzipped"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", newline="")
+    return open(path, newline="")
+
+
+def read_rows(path: str):
+    """yield the rows of a CSV file with a header as dicts, one at a time"""
+    with open_text(path) as file:
+        yield from csv.DictReader(file)
+
+
+def chunked(rows, size: int = CHUNK_SIZE):
+    """group an iterable into lists of at most `size` items"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
 
 
 class iGraphBuilder(ABC):
     def __init__(self):
-        self.nodes = {}
-        self.edges = []
+        self.nodes = NodeStore()
+        self.edges = EdgeStore()
         self.lines = {}
 
     @abstractmethod
-    def build_components(self) -> Tuple[dict[str, Node], list[Edge]]:
+    def build_components(self) -> Tuple[NodeStore, EdgeStore, dict]:
         return self.nodes, self.edges, self.lines
 
 
@@ -26,44 +58,35 @@ class LondonGraphBuilder(iGraphBuilder):
 
     def __read_station_data(self):
 
-        # open stations file to get station (node) data
-        with open(self.stations_file) as csvfile:
-            stations = csv.DictReader(csvfile)
-
-            # loop through each station and add as node to graph
-            for station in stations:
-                station["id"] = int(station["id"])
-                station["latitude"] = float(station["latitude"])
-                station["longitude"] = float(station["longitude"])
-                node = Node(**station)
-                self.nodes[station["id"]] = node
+        # stream the stations file, adding each station as a node
+        for station in read_rows(self.stations_file):
+            station["id"] = int(station["id"])
+            station["latitude"] = float(station["latitude"])
+            station["longitude"] = float(station["longitude"])
+            self.nodes.add(**station)
 
     def __read_connection_data(self):
 
-        # open connections file to get connection (edge) data
-        with open(self.connections_file) as file:
-            connections = csv.DictReader(file)
-
-            # loop through each connection and add as edge to graph
-            for connection in connections:
-                station1_id, station2_id = int(
-                    connection.pop("station1")
-                ), int(connection.pop("station2"))
-                connection["line"] = int(connection["line"])
-                connection["time"] = int(connection["time"])
-
-                edge = Edge(station1_id, station2_id, **connection)
-                self.edges.append(edge)
+        # connections go straight into the edge columns a chunk at a time,
+        # so only one chunk of parsed rows is alive at once
+        connections = (
+            (
+                int(connection["station1"]),
+                int(connection["station2"]),
+                int(connection["line"]),
+                int(connection["time"]),
+            )
+            for connection in read_rows(self.connections_file)
+        )
+        for chunk in chunked(connections):
+            self.edges.extend(chunk)
 
     def __read_line_data(self):
-        with open(self.lines_file) as file:
-            lines = csv.DictReader(file)
-
-            for line in lines:
-                line_number = int(line["line"])
-                self.lines[line_number] = (line["name"], line["colour"])
+        for line in read_rows(self.lines_file):
+            line_number = int(line["line"])
+            self.lines[line_number] = (line["name"], line["colour"])
 
-    def build_components(self) -> Tuple[dict[str, Node], list[Edge]]:
+    def build_components(self) -> Tuple[NodeStore, EdgeStore, dict]:
         self.__read_station_data()
         self.__read_connection_data()
         self.__read_line_data()
@@ -0,0 +1,111 @@
+from array import array
+
+
+class CSRAdjacency:
+    """
+    compressed sparse row (CSR) layout of a graph's adjacency lists
+
+    the neighbours of node `n` are stored in the slots
+    `offsets[n]` to `offsets[n + 1] - 1` of the parallel `neighbours`,
+    `weights`, `lines` and `edge_ids` arrays, where `edge_ids` indexes
+    back into `graph.edges`
+    """
+
+    def __init__(
+        self,
+        offsets: array,
+        neighbours: array,
+        weights: array,
+        lines: array,
+        edge_ids: array,
+    ):
+        self.offsets = offsets
+        self.neighbours = neighbours
+        self.weights = weights
+        self.lines = lines
+        self.edge_ids = edge_ids
+
+    @classmethod
+    def from_graph(cls, graph) -> "CSRAdjacency":
+        # node ids are used directly as row indices
+        size = max(graph.nodes, default=-1) + 1
+        num_slots = 2 * (len(graph.edges) - len(graph.closed_edges))
+
+        # read the edge columns directly rather than through `Edge` views
+        store = graph.edges
+        closed_edges = graph.closed_edges
+
+        # count the degree of every node, shifted by one for the prefix sum
+        offsets = array("i", [0]) * (size + 1)
+        endpoints = zip(store.node1, store.node2)
+        for edge_id, (node1, node2) in enumerate(endpoints):
+            if edge_id not in closed_edges:
+                offsets[node1 + 1] += 1
+                offsets[node2 + 1] += 1
+        for node in range(size):
+            offsets[node + 1] += offsets[node]
+
+        neighbours = array("i", [0]) * num_slots
+        weights = array("i", [0]) * num_slots
+        lines = array("i", [0]) * num_slots
+        edge_ids = array("i", [0]) * num_slots
+
+        # fill each row in edge order so traversal order matches `adj`
+        cursor = offsets[:-1]
+        endpoints = zip(store.node1, store.node2)
+        for edge_id, (node1, node2) in enumerate(endpoints):
+            if edge_id in closed_edges:
+                continue
+            for this_node, other_node in ((node1, node2), (node2, node1)):
+                slot = cursor[this_node]
+                cursor[this_node] += 1
+                neighbours[slot] = other_node
+                weights[slot] = store.time[edge_id]
+                lines[slot] = store.line[edge_id]
+                edge_ids[slot] = edge_id
+
+        return cls(offsets, neighbours, weights, lines, edge_ids)
+
+    def refresh(self, graph):
+        """rebuild the arrays in place, keeping references to this object"""
+        rebuilt = CSRAdjacency.from_graph(graph)
+        self.offsets = rebuilt.offsets
+        self.neighbours = rebuilt.neighbours
+        self.weights = rebuilt.weights
+        self.lines = rebuilt.lines
+        self.edge_ids = rebuilt.edge_ids
+
+    def set_weight(self, node1: int, node2: int, edge_id: int, weight: int):
+        """update the weight of an edge in both of its rows"""
+        for node in (node1, node2):
+            for slot in self.slots(node):
+                if self.edge_ids[slot] == edge_id:
+                    self.weights[slot] = weight
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    def degree(self, node: int) -> int:
+        return self.offsets[node + 1] - self.offsets[node]
+
+    def slots(self, node: int) -> range:
+        return range(self.offsets[node], self.offsets[node + 1])
+
+    def nbytes(self) -> int:
+        return sum(
+            len(arr) * arr.itemsize
+            for arr in (
+                self.offsets,
+                self.neighbours,
+                self.weights,
+                self.lines,
+                self.edge_ids,
+            )
+        )
+
+    def __repr__(self):
+        return (
+            f"CSRAdjacency(nodes={self.num_nodes}, "
+            f"slots={len(self.neighbours)})"
+        )
@@ -0,0 +1,202 @@
+import inspect
+import weakref
+
+from .csr import CSRAdjacency
+from .spatial import KDTree
+from .store import Node, Edge, NodeStore, EdgeStore
+
+
+class Graph:
+    def __init__(
+        self,
+        nodes: NodeStore | dict[int, Node],
+        edges: EdgeStore | list[Edge],
+        lines: dict[int, tuple],
+    ):
+        # plain containers of standalone nodes and edges are copied into
+        # columnar stores
+        if not isinstance(nodes, NodeStore):
+            nodes = NodeStore.from_nodes(nodes.values())
+        if not isinstance(edges, EdgeStore):
+            edges = EdgeStore.from_edges(edges)
+        self.nodes = nodes
+        self.edges = edges
+        self.lines = lines
+        self._adj = None
+        self._csr = None
+        self._station_index = None
+
+        # bumped on every edit so caches can tell stale results apart
+        self.version = 0
+        self.closed_edges = set()  # indexes into `edges`
+        self._listeners = []  # callables returning a listener or None
+
+    @property
+    def adj(self) -> dict[int, list[Edge]]:
+        """lists of `Edge` views per node, built on first use"""
+        if self._adj is None:
+            self._adj = {}
+            self.__add_nodes_to_adj()
+            self.__add_edges_to_adj()
+        return self._adj
+
+    @property
+    def csr(self) -> CSRAdjacency:
+        """contiguous array adjacency, built on first use"""
+        if self._csr is None:
+            self._csr = CSRAdjacency.from_graph(self)
+        return self._csr
+
+    @property
+    def station_index(self) -> KDTree:
+        """k-d tree over station positions, built on first use"""
+        if self._station_index is None:
+            self._station_index = KDTree.from_nodes(self.nodes)
+        return self._station_index
+
+    def nearest_station(
+        self, latitude: float, longitude: float
+    ) -> tuple[int, float]:
+        """(id, metres away) of the station closest to a position"""
+        return self.station_index.nearest(longitude, latitude)
+
+    def subscribe(self, listener):
+        """
+        call `listener(edge_id, old_time, new_time)` after every edit,
+        where a time of None means the edge is closed
+        """
+        if inspect.ismethod(listener):
+            # a bound method does not keep its object alive, so listeners
+            # that are dropped stop being called instead of leaking
+            self._listeners.append(weakref.WeakMethod(listener))
+        else:
+            self._listeners.append(lambda: listener)
+
+    def unsubscribe(self, listener):
+        self._listeners = [
+            ref for ref in self._listeners if ref() not in (listener, None)
+        ]
+
+    def edge_id(self, edge: Edge) -> int:
+        if edge._store is not self.edges:
+            raise ValueError(f"{edge!r} is not an edge of this graph")
+        return edge.index
+
+    def set_edge_time(self, edge: Edge, time: int):
+        """change the travel time of a connection, e.g. for a delay"""
+        edge_id = self.edge_id(edge)
+        old_time = edge.time
+        edge.time = time
+        if edge_id in self.closed_edges:
+            return
+        if self._csr is not None:
+            self._csr.set_weight(edge.node1, edge.node2, edge_id, time)
+        self.__changed(edge_id, old_time, time)
+
+    def close_edge(self, edge: Edge):
+        edge_id = self.edge_id(edge)
+        if edge_id in self.closed_edges:
+            return
+        self.closed_edges.add(edge_id)
+        if self._adj is not None:
+            self._adj[edge.node1].remove(edge)
+            self._adj[edge.node2].remove(edge)
+        if self._csr is not None:
+            self._csr.refresh(self)
+        self.__changed(edge_id, edge.time, None)
+
+    def open_edge(self, edge: Edge):
+        edge_id = self.edge_id(edge)
+        if edge_id not in self.closed_edges:
+            return
+        self.closed_edges.remove(edge_id)
+        if self._adj is not None:
+            self._adj[edge.node1].append(edge)
+            self._adj[edge.node2].append(edge)
+        if self._csr is not None:
+            self._csr.refresh(self)
+        self.__changed(edge_id, None, edge.time)
+
+    def close_station(self, node: int):
+        csr = self.csr
+        edge_ids = [csr.edge_ids[slot] for slot in csr.slots(node)]
+        for edge_id in edge_ids:
+            self.close_edge(self.edges[edge_id])
+
+    def open_station(self, node: int):
+        for edge_id in sorted(self.closed_edges):
+            edge = self.edges[edge_id]
+            if node in (edge.node1, edge.node2):
+                self.open_edge(edge)
+
+    def line_chains(self):
+        """
+        yield (line, (nodes, edge_ids)) covering every open edge of every
+        line with chains of consecutive stations, starting at the termini
+        so that plain lines become a single chain and each branch gets its
+        own
+        """
+        by_line = {}
+        for edge in self.edges:
+            if edge.index in self.closed_edges:
+                continue
+            adjacent = by_line.setdefault(edge.line, {})
+            for this_node, other_node in (
+                (edge.node1, edge.node2),
+                (edge.node2, edge.node1),
+            ):
+                adjacent.setdefault(this_node, []).append(
+                    (edge.index, other_node)
+                )
+
+        for line, adjacent in sorted(by_line.items()):
+            used = set()
+            # termini first, then whatever loops are left
+            starts = sorted(
+                adjacent, key=lambda node: len(adjacent[node]) != 1
+            )
+            for start in starts:
+                for edge_id, _ in adjacent[start]:
+                    if edge_id in used:
+                        continue
+                    nodes, edge_ids = [start], []
+                    node = start
+                    while True:
+                        step = next(
+                            (
+                                (next_edge, next_node)
+                                for next_edge, next_node in adjacent[node]
+                                if next_edge not in used
+                            ),
+                            None,
+                        )
+                        if step is None:
+                            break
+                        used.add(step[0])
+                        edge_ids.append(step[0])
+                        nodes.append(step[1])
+                        node = step[1]
+                    yield line, (nodes, edge_ids)
+
+    def __changed(self, edge_id: int, old_time, new_time):
+        self.version += 1
+        for ref in list(self._listeners):
+            listener = ref()
+            if listener is not None:
+                listener(edge_id, old_time, new_time)
+        self._listeners = [ref for ref in self._listeners if ref() is not None]
+
+    def __add_nodes_to_adj(self):
+        for node in self.nodes:
+            self._adj[node] = []
+
+    def __add_edges_to_adj(self):
+        # both endpoints share one view of each edge
+        for edge in self.edges:
+            if edge.index in self.closed_edges:
+                continue
+            self._adj[edge.node1].append(edge)
+            self._adj[edge.node2].append(edge)
+
+    def __repr__(self):
+        return repr(vars(self))
@@ -0,0 +1,134 @@
+"""
+build the graph from a GTFS feed: `stops.txt` gives the stations and
+consecutive stops of every trip in `stop_times.txt` give the connections;
+`trips.txt` and `routes.txt` are optional and name the lines
+
+files may be gzipped (`stops.txt.gz` and so on), and `stop_times.txt`,
+usually by far the largest, is streamed one trip at a time
+"""
+from typing import Tuple
+import os
+
+from .builder import iGraphBuilder, chunked, read_rows
+from .store import NodeStore, EdgeStore
+
+DEFAULT_COLOUR = "808080"
+
+
+def gtfs_time(value: str) -> int:
+    """seconds after midnight for HH:MM:SS, where HH may exceed 23"""
+    hours, minutes, seconds = value.strip().split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def read_trips(path: str, stop_ids: dict[str, int]):
+    """
+    yield (trip_id, stop_times) for every trip in a `stop_times.txt`,
+    where stop_times are (stop_sequence, node id, arrival, departure)
+    tuples in stop order with times in seconds
+
+    stop times are grouped by trip in practice, so only the current trip
+    is held in memory
+    """
+    trip_id, stop_times = None, []
+    for stop_time in read_rows(path):
+        if stop_time["trip_id"] != trip_id:
+            if stop_times:
+                stop_times.sort()
+                yield trip_id, stop_times
+            trip_id, stop_times = stop_time["trip_id"], []
+        arrival = stop_time["arrival_time"] or stop_time["departure_time"]
+        departure = stop_time["departure_time"] or arrival
+        stop_times.append(
+            (
+                int(stop_time["stop_sequence"]),
+                stop_ids[stop_time["stop_id"]],
+                gtfs_time(arrival),
+                gtfs_time(departure),
+            )
+        )
+    if stop_times:
+        stop_times.sort()
+        yield trip_id, stop_times
+
+
+class GTFSGraphBuilder(iGraphBuilder):
+    def __init__(self, feed_directory: str):
+        self.feed_directory = feed_directory
+        self.stop_ids = {}  # GTFS stop_id -> node id
+        self.trip_lines = {}  # GTFS trip_id -> line number
+        return super().__init__()
+
+    def path(self, name: str) -> str:
+        """path of a feed file, gzipped or not"""
+        path = os.path.join(self.feed_directory, name)
+        if not os.path.exists(path) and os.path.exists(f"{path}.gz"):
+            return f"{path}.gz"
+        return path
+
+    def __read_stops(self):
+        # GTFS ids are strings, so nodes are numbered from 1 in file order
+        for stop in read_rows(self.path("stops.txt")):
+            node_id = len(self.stop_ids) + 1
+            self.stop_ids[stop["stop_id"]] = node_id
+            self.nodes.add(
+                id=node_id,
+                latitude=float(stop["stop_lat"]),
+                longitude=float(stop["stop_lon"]),
+                name=stop.get("stop_name", ""),
+                stop_id=stop["stop_id"],
+            )
+
+    def __read_routes(self):
+        # every trip gets the line number of its route
+        if not os.path.exists(self.path("trips.txt")):
+            self.lines[0] = ("GTFS", DEFAULT_COLOUR)
+            return
+
+        route_lines = {}
+        if os.path.exists(self.path("routes.txt")):
+            for route in read_rows(self.path("routes.txt")):
+                line = len(route_lines) + 1
+                route_lines[route["route_id"]] = line
+                self.lines[line] = (
+                    route.get("route_long_name")
+                    or route.get("route_short_name")
+                    or route["route_id"],
+                    route.get("route_color") or DEFAULT_COLOUR,
+                )
+
+        for trip in read_rows(self.path("trips.txt")):
+            route_id = trip["route_id"]
+            if route_id not in route_lines:
+                route_lines[route_id] = len(route_lines) + 1
+                self.lines[route_lines[route_id]] = (route_id, DEFAULT_COLOUR)
+            self.trip_lines[trip["trip_id"]] = route_lines[route_id]
+
+    def __hops(self):
+        """
+        yield each distinct (node1, node2, line, minutes) connection once;
+        many trips run the same hop, and only the first is kept, so the
+        set of seen hops grows with the graph rather than the timetable
+        """
+        seen = set()
+        trips = read_trips(self.path("stop_times.txt"), self.stop_ids)
+        for trip_id, stop_times in trips:
+            line = self.trip_lines.get(trip_id, 0)
+            for (_, node1, _, departure), (_, node2, arrival, _) in zip(
+                stop_times, stop_times[1:]
+            ):
+                key = (min(node1, node2), max(node1, node2), line)
+                if node1 == node2 or key in seen:
+                    continue
+                seen.add(key)
+                # whole minutes like the London data, with no free hops
+                minutes = max(1, round((arrival - departure) / 60))
+                yield node1, node2, line, minutes
+
+    def build_components(self) -> Tuple[NodeStore, EdgeStore, dict]:
+        self.__read_stops()
+        self.__read_routes()
+        for chunk in chunked(self.__hops()):
+            self.edges.extend(chunk)
+
+        return super().build_components()
@@ -0,0 +1,91 @@
+from array import array
+import hashlib
+import mmap
+import os
+import struct
+
+# file layout: a fixed header, a table of contents with one entry per
+# named array, then the raw array data with every array 8-byte aligned
+HEADER = struct.Struct("<8sI20sI")  # magic, format version, digest, count
+ENTRY = struct.Struct("<16scBQQ")  # name, typecode, itemsize, offset, length
+FORMAT_VERSION = 1
+
+
+def source_digest(paths: list[str]) -> bytes:
+    """sha1 over the contents of the source files a cache was built from"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.digest()
+
+
+def write_arrays(path: str, magic: bytes, digest: bytes, arrays: dict):
+    """write named `array`s to `path` in one binary file"""
+    offset = HEADER.size + ENTRY.size * len(arrays)
+    entries = []
+    for name, values in arrays.items():
+        offset += -offset % 8
+        entries.append(
+            ENTRY.pack(
+                name.encode(),
+                values.typecode.encode(),
+                values.itemsize,
+                offset,
+                len(values),
+            )
+        )
+        offset += len(values) * values.itemsize
+
+    # write to a temporary file first so readers never see a partial file,
+    # one per process since worker pools may compile the same file at once
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(magic, FORMAT_VERSION, digest, len(arrays)))
+        for entry in entries:
+            file.write(entry)
+        for values in arrays.values():
+            file.write(b"\0" * (-file.tell() % 8))
+            values.tofile(file)
+    os.replace(tmp_path, path)
+
+
+def read_arrays(path: str, magic: bytes, digest: bytes = None):
+    """
+    memory-map a file written by `write_arrays` and return its arrays as
+    typed memoryviews, or None if it is missing, from another format or
+    built from sources that no longer match `digest`
+
+    the views are copy-on-write, so callers may modify them without
+    touching the file
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < HEADER.size:
+            return None
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    file_magic, version, file_digest, count = HEADER.unpack_from(buffer)
+    if (
+        file_magic != magic
+        or version != FORMAT_VERSION
+        or (digest is not None and file_digest != digest)
+    ):
+        return None
+
+    view = memoryview(buffer)
+    arrays = {}
+    for i in range(count):
+        name, typecode, itemsize, offset, length = ENTRY.unpack_from(
+            buffer, HEADER.size + i * ENTRY.size
+        )
+        typecode = typecode.decode()
+        if array(typecode).itemsize != itemsize:
+            return None  # written on a platform with other native sizes
+        arrays[name.rstrip(b"\0").decode()] = view[
+            offset : offset + length * itemsize
+        ].cast(typecode)
+    return arrays
@@ -0,0 +1,198 @@
+from array import array
+from typing import Tuple
+import os
+
+from .builder import iGraphBuilder, LondonGraphBuilder
+from .store import NodeStore, EdgeStore
+from .persistence import read_arrays, source_digest, write_arrays
+
+MAGIC = b"PFGRAPH2"
+
+
+def default_snapshot_file(stations_file: str) -> str:
+    """e.g. `_dataset/london.graph.bin` for `_dataset/london.stations.csv`"""
+    if stations_file.endswith(".gz"):
+        stations_file = stations_file[: -len(".gz")]
+    if stations_file.endswith(".stations.csv"):
+        root = stations_file[: -len(".stations.csv")]
+    else:
+        root = os.path.splitext(stations_file)[0]
+    return f"{root}.graph.bin"
+
+
+def write_snapshot(
+    path: str,
+    digest: bytes,
+    nodes: NodeStore,
+    edges: EdgeStore,
+    lines: dict[int, tuple],
+):
+    """
+    write the graph components as flat arrays: numeric columns as typed
+    arrays, and every text column as one string with the end offset of
+    each cell, so loading decodes a single blob per table
+    """
+    text_columns = [nodes.names] + [
+        [str(column[row]) for row in range(len(nodes))]
+        for column in nodes.extra.values()
+    ]
+    station_text, station_ends = _pack_text(
+        cell for column in text_columns for cell in column
+    )
+    line_text, line_ends = _pack_text(
+        text for name, colour in lines.values() for text in (name, colour)
+    )
+
+    write_arrays(
+        path,
+        MAGIC,
+        digest,
+        {
+            "id": nodes.ids,
+            "latitude": nodes.latitude,
+            "longitude": nodes.longitude,
+            "columns": array("B", "\0".join(nodes.extra).encode()),
+            "station_text": array("B", station_text.encode()),
+            "station_ends": station_ends,
+            "node1": edges.node1,
+            "node2": edges.node2,
+            "line": edges.line,
+            "time": edges.time,
+            "line_id": array("i", lines),
+            "line_text": array("B", line_text.encode()),
+            "line_ends": line_ends,
+        },
+    )
+
+
+def read_snapshot(path: str, digest: bytes = None):
+    """
+    memory-map a snapshot and return (nodes, edges, lines), or None if it
+    is missing or stale
+
+    the numeric columns are copied out of the mapping with one bulk copy
+    each, so no objects are created per station or connection
+    """
+    arrays = read_arrays(path, MAGIC, digest)
+    if arrays is None:
+        return None
+
+    extra_columns = bytes(arrays["columns"]).decode().split("\0")
+    if extra_columns == [""]:
+        extra_columns = []
+
+    # text cells are stored column by column, names first
+    station_cells = _unpack_text(
+        arrays["station_text"], arrays["station_ends"]
+    )
+    size = len(arrays["id"])
+    columns = [
+        station_cells[i * size : (i + 1) * size]
+        for i in range(len(extra_columns) + 1)
+    ]
+    nodes = NodeStore.from_columns(
+        _copy(arrays["id"]),
+        _copy(arrays["latitude"]),
+        _copy(arrays["longitude"]),
+        columns[0],
+        dict(zip(extra_columns, columns[1:])),
+    )
+    edges = EdgeStore.from_columns(
+        *(_copy(arrays[name]) for name in ("node1", "node2", "line", "time"))
+    )
+
+    line_cells = _unpack_text(arrays["line_text"], arrays["line_ends"])
+    lines = {
+        line: (line_cells[2 * i], line_cells[2 * i + 1])
+        for i, line in enumerate(arrays["line_id"])
+    }
+    return nodes, edges, lines
+
+
+def _copy(view: memoryview) -> array:
+    values = array(view.format)
+    values.frombytes(view.cast("B"))
+    return values
+
+
+def _pack_text(cells) -> tuple[str, array]:
+    text = []
+    ends = array("I")
+    length = 0
+    for cell in cells:
+        text.append(cell)
+        length += len(cell)
+        ends.append(length)
+    return "".join(text), ends
+
+
+def _unpack_text(blob, ends) -> list[str]:
+    # offsets count characters, so the blob is decoded once and sliced
+    text = bytes(blob).decode()
+    cells = []
+    start = 0
+    for end in ends:
+        cells.append(text[start:end])
+        start = end
+    return cells
+
+
+class SnapshotGraphBuilder(iGraphBuilder):
+    """
+    builds the graph from a binary snapshot of the CSV dataset, compiling
+    the snapshot first whenever it is missing or out of date
+
+    the snapshot is trusted without reading the CSVs while it is newer
+    than all of them; once a CSV is modified its contents are checksummed
+    and the snapshot rebuilt only if they really changed
+    """
+
+    def __init__(
+        self,
+        stations_file: str,
+        connections_file: str,
+        lines_file: str,
+        snapshot_file: str = None,
+    ):
+        self.source_files = [stations_file, connections_file, lines_file]
+        self.snapshot_file = snapshot_file or default_snapshot_file(
+            stations_file
+        )
+        self.rebuilt = False
+        return super().__init__()
+
+    def build_components(self) -> Tuple[NodeStore, EdgeStore, dict]:
+        components = self.__load()
+        if components is None:
+            components = LondonGraphBuilder(
+                *self.source_files
+            ).build_components()
+            write_snapshot(
+                self.snapshot_file,
+                source_digest(self.source_files),
+                *components,
+            )
+            self.rebuilt = True
+
+        self.nodes, self.edges, self.lines = components
+        return super().build_components()
+
+    def __load(self):
+        try:
+            snapshot_mtime = os.path.getmtime(self.snapshot_file)
+        except OSError:
+            return None
+
+        if all(
+            os.path.getmtime(path) <= snapshot_mtime
+            for path in self.source_files
+        ):
+            return read_snapshot(self.snapshot_file)
+
+        components = read_snapshot(
+            self.snapshot_file, source_digest(self.source_files)
+        )
+        if components is not None:
+            # the CSVs were touched but not changed
+            os.utime(self.snapshot_file)
+        return components
@@ -0,0 +1,243 @@
+"""
+spatial lookups over station positions, in the (longitude, latitude)
+plane of `Node.get_pos`
+"""
+from array import array
+import math
+
+# metres per degree of latitude, on a spherical earth
+METRES_PER_DEGREE = 6371000 * math.pi / 180
+
+
+class GridIndex:
+    """
+    uniform grid over the plane: every cell lists the ids of the points
+    in it and of the boxes overlapping it, so a rectangle query only looks
+    at the cells the rectangle covers
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells = {}  # (column, row) -> array of ids
+
+    @classmethod
+    def from_nodes(cls, nodes, per_cell: int = 4) -> "GridIndex":
+        """index every node, sizing cells to hold about `per_cell` each"""
+        index = cls(cls._cell_size(nodes.longitude, nodes.latitude, per_cell))
+        for node_id, x, y in zip(nodes.ids, nodes.longitude, nodes.latitude):
+            index.insert(node_id, x, y)
+        return index
+
+    @staticmethod
+    def _cell_size(xs, ys, per_cell: int) -> float:
+        if not xs:
+            return 1.0
+        area = (max(xs) - min(xs)) * (max(ys) - min(ys))
+        size = math.sqrt(area * per_cell / len(xs))
+        return size or 1.0
+
+    def insert(
+        self, id: int, x0: float, y0: float, x1: float = None, y1: float = None
+    ):
+        """add a point, or a box when the opposite corner is given too"""
+        size, cells = self.cell_size, self.cells
+        if x1 is None:
+            # a point is in exactly one cell
+            cell = (math.floor(x0 / size), math.floor(y0 / size))
+            if cell not in cells:
+                cells[cell] = array("i")
+            cells[cell].append(id)
+            return
+        for cell in self._cells_of(x0, y0, x1, y1):
+            if cell not in cells:
+                cells[cell] = array("i")
+            cells[cell].append(id)
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> set[int]:
+        """ids of every point and box in cells overlapping the rectangle"""
+        columns, rows = self._span(x0, x1), self._span(y0, y1)
+        if len(columns) * len(rows) > len(self.cells):
+            # a rectangle wider than the data only visits occupied cells
+            cells = [
+                cell
+                for cell in self.cells
+                if cell[0] in columns and cell[1] in rows
+            ]
+        else:
+            cells = [(column, row) for column in columns for row in rows]
+
+        found = set()
+        for cell in cells:
+            ids = self.cells.get(cell)
+            if ids is not None:
+                found.update(ids)
+        return found
+
+    def _cells_of(self, x0: float, y0: float, x1: float, y1: float):
+        rows = self._span(y0, y1)
+        return [(column, row) for column in self._span(x0, x1) for row in rows]
+
+    def _span(self, a: float, b: float) -> range:
+        size = self.cell_size
+        return range(
+            math.floor(min(a, b) / size), math.floor(max(a, b) / size) + 1
+        )
+
+
+def simplify(points: list[tuple], tolerance: float) -> list[int]:
+    """
+    indexes of the points of a polyline to keep when it is drawn at a
+    coarse scale: every point closer than `tolerance` to the last one
+    kept is dropped, and both ends are always kept
+    """
+    if len(points) <= 2:
+        return list(range(len(points)))
+    kept = [0]
+    squared = tolerance * tolerance
+    last_x, last_y = points[0]
+    for i in range(1, len(points) - 1):
+        x, y = points[i]
+        if (x - last_x) ** 2 + (y - last_y) ** 2 >= squared:
+            kept.append(i)
+            last_x, last_y = x, y
+    kept.append(len(points) - 1)
+    return kept
+
+
+class KDTree:
+    """
+    2-d tree over points for nearest and radius queries in logarithmic
+    time, measuring distances in metres
+
+    points are projected onto a plane where a degree of longitude is
+    shortened by the cosine of the latitude at the middle of the data,
+    which is accurate to well under a metre across a city. the tree is
+    stored implicitly in flat arrays: the point splitting a range is at
+    its middle, with the points before it on one side and the rest on
+    the other
+    """
+
+    def __init__(self, ids, xs, ys):
+        latitudes = sorted(ys)
+        middle = latitudes[len(latitudes) // 2] if latitudes else 0.0
+        self.x_scale = METRES_PER_DEGREE * math.cos(math.radians(middle))
+        self.y_scale = METRES_PER_DEGREE
+
+        points = [
+            (x * self.x_scale, y * self.y_scale, node_id)
+            for node_id, x, y in zip(ids, xs, ys)
+        ]
+        # (lo, hi, axis) ranges still to be split
+        stack = [(0, len(points), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 1:
+                continue
+            points[lo:hi] = sorted(points[lo:hi], key=lambda p: p[axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, 1 - axis))
+            stack.append((mid + 1, hi, 1 - axis))
+
+        self.xs = array("d", [point[0] for point in points])
+        self.ys = array("d", [point[1] for point in points])
+        self.ids = array("i", [point[2] for point in points])
+
+    @classmethod
+    def from_nodes(cls, nodes) -> "KDTree":
+        return cls(nodes.ids, nodes.longitude, nodes.latitude)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nearest(
+        self, x: float, y: float, max_distance: float = math.inf
+    ) -> tuple[int, float]:
+        """
+        (id, metres) of the point closest to (longitude x, latitude y),
+        or (None, inf) if none is closer than `max_distance` metres
+        """
+        row, squared = self._nearest(
+            x * self.x_scale, y * self.y_scale, max_distance * max_distance
+        )
+        if row is None:
+            return None, math.inf
+        return self.ids[row], math.sqrt(squared)
+
+    def _nearest(self, x: float, y: float, best_squared: float):
+        xs, ys = self.xs, self.ys
+        best = None
+        # ranges to look at, with the squared distance from the query to
+        # the side of the split they are on
+        stack = [(0, len(xs), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if lo >= hi or bound >= best_squared:
+                continue
+            mid = (lo + hi) // 2
+            dx, dy = xs[mid] - x, ys[mid] - y
+            squared = dx * dx + dy * dy
+            if squared < best_squared:
+                best, best_squared = mid, squared
+            offset = dx if axis == 0 else dy
+            near, far = (lo, mid), (mid + 1, hi)
+            if offset < 0:
+                near, far = far, near
+            # the near side is popped first
+            stack.append((*far, 1 - axis, offset * offset))
+            stack.append((*near, 1 - axis, 0.0))
+        return best, best_squared
+
+    def within(self, x: float, y: float, radius: float) -> list[int]:
+        """ids of the points at most `radius` metres away, nearest first"""
+        x, y = x * self.x_scale, y * self.y_scale
+        xs, ys, ids = self.xs, self.ys, self.ids
+        squared_radius = radius * radius
+        found = []
+        stack = [(0, len(ids), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            dx, dy = xs[mid] - x, ys[mid] - y
+            squared = dx * dx + dy * dy
+            if squared <= squared_radius:
+                found.append((squared, ids[mid]))
+            offset = dx if axis == 0 else dy
+            # the point splitting the range is at most `radius` from the
+            # query along this axis for both sides to be in range
+            if offset >= -radius:
+                stack.append((lo, mid, 1 - axis))
+            if offset <= radius:
+                stack.append((mid + 1, hi, 1 - axis))
+        found.sort()
+        return [node_id for _, node_id in found]
+
+    def snap(
+        self, points, max_distance: float = math.inf
+    ) -> list[tuple[int, float]]:
+        """
+        `nearest` for every (longitude, latitude) in `points`; consecutive
+        points of trip data are usually close together, so each search
+        starts bounded by the distance to the previous answer
+        """
+        xs, ys, ids = self.xs, self.ys, self.ids
+        limit = max_distance * max_distance
+        snapped = []
+        previous = None
+        for x, y in points:
+            x, y = x * self.x_scale, y * self.y_scale
+            bound = limit
+            if previous is not None:
+                dx, dy = xs[previous] - x, ys[previous] - y
+                # slightly over, so the previous answer is found again
+                bound = min(limit, (dx * dx + dy * dy) * 1.000001 + 1e-9)
+            row, squared = self._nearest(x, y, bound)
+            if row is None and bound < limit:
+                row, squared = self._nearest(x, y, limit)
+            if row is None:
+                snapped.append((None, math.inf))
+                continue
+            snapped.append((ids[row], math.sqrt(squared)))
+            previous = row
+        return snapped
@@ -0,0 +1,345 @@
+from array import array
+from collections.abc import Mapping, Sequence
+
+
+class _Column:
+    """
+    dictionary-encoded column of arbitrary values: each row stores an int
+    code into the list of distinct values, so repeated strings such as
+    zones or NULLs are kept once
+    """
+
+    def __init__(self):
+        self.codes = array("i")
+        self.values = []
+        self._code_of = {}
+
+    def append(self, value):
+        self.codes.append(self.encode(value))
+
+    def encode(self, value) -> int:
+        code = self._code_of.get(value)
+        if code is None:
+            code = self._code_of[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, row: int):
+        return self.values[self.codes[row]]
+
+    def __setitem__(self, row: int, value):
+        self.codes[row] = self.encode(value)
+
+
+class NodeStore(Mapping):
+    """
+    columnar storage for stations, mapping node id to a `Node` view
+
+    ids and coordinates are typed arrays and names a list of strings; any
+    other columns are dictionary-encoded. node ids are small non-negative
+    ints, as the CSR adjacency already assumes, so the row of each id is
+    found through a flat array rather than a dict
+    """
+
+    def __init__(self):
+        self.ids = array("i")
+        self.latitude = array("d")
+        self.longitude = array("d")
+        self.names = []
+        self.extra = {}  # column name -> `_Column`
+        self._rows = array("i")  # node id -> row, or -1
+
+    def add(
+        self,
+        id: int,
+        latitude: float,
+        longitude: float,
+        name: str = "",
+        **columns,
+    ) -> "Node":
+        row = len(self.ids)
+        if id >= len(self._rows):
+            self._rows.extend([-1] * (id + 1 - len(self._rows)))
+        if self._rows[id] != -1:
+            raise ValueError(f"duplicate node id {id}")
+        self._rows[id] = row
+
+        self.ids.append(id)
+        self.latitude.append(latitude)
+        self.longitude.append(longitude)
+        self.names.append(name)
+        for column, value in columns.items():
+            if column not in self.extra:
+                self.extra[column] = _Column()
+                # rows added before the column existed have no value
+                for _ in range(row):
+                    self.extra[column].append(None)
+            self.extra[column].append(value)
+        for column in self.extra.keys() - columns.keys():
+            self.extra[column].append(None)
+        return Node._view(self, row)
+
+    def row(self, node_id: int) -> int:
+        if 0 <= node_id < len(self._rows) and self._rows[node_id] != -1:
+            return self._rows[node_id]
+        raise KeyError(node_id)
+
+    def __getitem__(self, node_id: int) -> "Node":
+        return Node._view(self, self.row(node_id))
+
+    def __contains__(self, node_id) -> bool:
+        return (
+            isinstance(node_id, int)
+            and 0 <= node_id < len(self._rows)
+            and self._rows[node_id] != -1
+        )
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def nbytes(self) -> int:
+        """size of the arrays, excluding the name strings"""
+        return sum(
+            len(values) * values.itemsize
+            for values in (self.ids, self.latitude, self.longitude)
+        ) + sum(
+            len(column.codes) * column.codes.itemsize
+            for column in self.extra.values()
+        )
+
+    @classmethod
+    def from_nodes(cls, nodes) -> "NodeStore":
+        store = cls()
+        for node in nodes:
+            store.add(**node.columns())
+        return store
+
+    @classmethod
+    def from_columns(
+        cls,
+        ids: array,
+        latitude: array,
+        longitude: array,
+        names: list[str],
+        extra: dict[str, list],
+    ) -> "NodeStore":
+        """build a store from whole columns, taking ownership of them"""
+        store = cls()
+        store.ids, store.latitude, store.longitude = ids, latitude, longitude
+        store.names = names
+        for column, values in extra.items():
+            store.extra[column] = _Column()
+            for value in values:
+                store.extra[column].append(value)
+
+        store._rows = array("i", [-1]) * (max(ids, default=-1) + 1)
+        for row, node_id in enumerate(ids):
+            store._rows[node_id] = row
+        return store
+
+
+class EdgeStore(Sequence):
+    """
+    columnar storage for connections: parallel arrays of both endpoints,
+    the line and the travel time, indexed by edge id
+    """
+
+    def __init__(self):
+        self.node1 = array("i")
+        self.node2 = array("i")
+        self.line = array("i")
+        self.time = array("i")
+
+    def add(self, node1: int, node2: int, line: int, time: int) -> "Edge":
+        self.node1.append(node1)
+        self.node2.append(node2)
+        self.line.append(line)
+        self.time.append(time)
+        return Edge._view(self, len(self.node1) - 1)
+
+    def extend(self, rows: list[tuple]):
+        """append (node1, node2, line, time) rows column by column"""
+        columns = (self.node1, self.node2, self.line, self.time)
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+
+    def __getitem__(self, index: int) -> "Edge":
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self.node1)
+        if not 0 <= index < len(self.node1):
+            raise IndexError("edge index out of range")
+        return Edge._view(self, index)
+
+    def __len__(self) -> int:
+        return len(self.node1)
+
+    def nbytes(self) -> int:
+        return sum(
+            len(values) * values.itemsize
+            for values in (self.node1, self.node2, self.line, self.time)
+        )
+
+    @classmethod
+    def from_edges(cls, edges) -> "EdgeStore":
+        store = cls()
+        for edge in edges:
+            store.add(edge.node1, edge.node2, edge.line, edge.time)
+        return store
+
+    @classmethod
+    def from_columns(
+        cls, node1: array, node2: array, line: array, time: array
+    ) -> "EdgeStore":
+        """build a store from whole columns, taking ownership of them"""
+        store = cls()
+        store.node1, store.node2, store.line, store.time = (
+            node1,
+            node2,
+            line,
+            time,
+        )
+        return store
+
+
+class Node:
+    """
+    view of one row of a `NodeStore`; `Node(**columns)` still creates a
+    standalone node backed by a store of its own
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, **columns):
+        self._store = NodeStore()
+        self._row = 0
+        self._store.add(**columns)
+
+    @classmethod
+    def _view(cls, store: NodeStore, row: int) -> "Node":
+        node = cls.__new__(cls)
+        node._store = store
+        node._row = row
+        return node
+
+    @property
+    def id(self) -> int:
+        return self._store.ids[self._row]
+
+    @property
+    def latitude(self) -> float:
+        return self._store.latitude[self._row]
+
+    @latitude.setter
+    def latitude(self, value: float):
+        self._store.latitude[self._row] = value
+
+    @property
+    def longitude(self) -> float:
+        return self._store.longitude[self._row]
+
+    @longitude.setter
+    def longitude(self, value: float):
+        self._store.longitude[self._row] = value
+
+    @property
+    def name(self) -> str:
+        return self._store.names[self._row]
+
+    def __getattr__(self, column: str):
+        # only called for names that are not slots or properties
+        if column.startswith("_"):
+            raise AttributeError(column)
+        try:
+            return self._store.extra[column][self._row]
+        except KeyError:
+            raise AttributeError(column) from None
+
+    def columns(self) -> dict:
+        columns = {
+            "id": self.id,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "name": self.name,
+        }
+        for column, values in self._store.extra.items():
+            columns[column] = values[self._row]
+        return columns
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Node):
+            return NotImplemented
+        return self._store is other._store and self._row == other._row
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._row))
+
+    def __repr__(self) -> str:
+        return repr(self.columns())
+
+    def get_pos(self):
+        return self.longitude, self.latitude
+
+
+class Edge:
+    """
+    view of one row of an `EdgeStore`; `Edge(node1, node2, line=...,
+    time=...)` still creates a standalone edge backed by a store of its
+    own. views of the same row compare and hash equal
+    """
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, node1: int, node2: int, line: int, time: int):
+        self._store = EdgeStore()
+        self.index = 0
+        self._store.add(node1, node2, line, time)
+
+    @classmethod
+    def _view(cls, store: EdgeStore, index: int) -> "Edge":
+        edge = cls.__new__(cls)
+        edge._store = store
+        edge.index = index
+        return edge
+
+    @property
+    def node1(self) -> int:
+        return self._store.node1[self.index]
+
+    @property
+    def node2(self) -> int:
+        return self._store.node2[self.index]
+
+    @property
+    def line(self) -> int:
+        return self._store.line[self.index]
+
+    @property
+    def time(self) -> int:
+        return self._store.time[self.index]
+
+    @time.setter
+    def time(self, value: int):
+        self._store.time[self.index] = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Edge):
+            return NotImplemented
+        return self._store is other._store and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self.index))
+
+    def __repr__(self) -> str:
+        return repr(
+            {
+                "node1": self.node1,
+                "node2": self.node2,
+                "line": self.line,
+                "time": self.time,
+            }
+        )
@@ -1,17 +1,36 @@
+import math
 import tkinter as tk
 from tkinter import ttk
 
-from graph.builder import LondonGraphBuilder
+from graph.builder import (
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+    LONDON_DISTANCES_FILE,
+    LONDON_LANDMARKS_FILE,
+    LONDON_SNAPSHOT_FILE,
+)
 from graph.graph import Graph
+from graph.snapshot import SnapshotGraphBuilder
 from pathfinders.pathfinders import (
     DijkstrasAlgorithm,
     AStarAlgorithm,
     BFSAlgorithm,
     iPathFinder,
 )
+from pathfinders.distance_matrix import DistanceMatrix
+from pathfinders.landmarks import LandmarkTable
+from pathfinders.worker import SearchWorker
 from planners.planners import SubwayPatrolPlanning
 from styles.colours import Colour
 from styles.customtk import Button, create_circle
+from styles.renderer import SearchRenderer
+from styles.viewport import Viewport
+
+# pixels the mouse can move while pressed and still click, and how close
+# a click has to be to a station to pick it
+CLICK_SLOP = 4
+SELECT_RADIUS = 12
 
 
 class GUI:
@@ -24,17 +43,24 @@ class GUI:
 
         self.sp = []  # nodes in shortest path
 
+        # searches run on a worker thread; the animation polls its events
+        self.worker = SearchWorker()
+        self.result_algo = None  # path finder of the finished search
+        self.query_stations = []  # stations the running search was given
+
         self.__build_graph()
-        self.__convert_coordinates()
+        self.__init_viewport()
         self.__init_tk()
         self.__init_graph_UI()
         self.__init_elements_UI()
 
     def __build_graph(self):
-        graph_builder = LondonGraphBuilder(
-            "_dataset/london.stations.csv",
-            "_dataset/london.connections.csv",
-            "_dataset/london.lines.csv",
+        # parsed from the CSVs only when the binary snapshot is stale
+        graph_builder = SnapshotGraphBuilder(
+            LONDON_STATIONS_FILE,
+            LONDON_CONNECTIONS_FILE,
+            LONDON_LINES_FILE,
+            LONDON_SNAPSHOT_FILE,
         )
         (
             graph_stations,
@@ -43,24 +69,44 @@ class GUI:
         ) = graph_builder.build_components()
         self.graph = Graph(graph_stations, graph_connections, graph_lines)
 
+        # all-pairs travel times, rebuilt only when the dataset changes
+        self.distance_matrix = DistanceMatrix.load_or_build(
+            self.graph,
+            LONDON_DISTANCES_FILE,
+            [LONDON_STATIONS_FILE, LONDON_CONNECTIONS_FILE],
+        )
+
+        # landmark travel times for the A* heuristic
+        self.landmarks = LandmarkTable.load_or_build(
+            self.graph,
+            LONDON_LANDMARKS_FILE,
+            [LONDON_STATIONS_FILE, LONDON_CONNECTIONS_FILE],
+        )
+
         self.path_algo: iPathFinder | SubwayPatrolPlanning = (
             DijkstrasAlgorithm(self.graph)
         )
         self.algorithms = {
             1: DijkstrasAlgorithm(self.graph),
-            2: AStarAlgorithm(self.graph),
+            2: AStarAlgorithm(self.graph, landmarks=self.landmarks),
             3: BFSAlgorithm(self.graph),
-            4: SubwayPatrolPlanning(self.graph),
+            4: SubwayPatrolPlanning(self.graph, self.distance_matrix),
         }
 
-    def __convert_coordinates(self):
-        """scale original coordinates to map onto UI frame"""
-        for node in self.graph.nodes.values():
-            pos = node.get_pos()
-            long = ((pos[0] + 0.6) * self.HEIGHT) + 30
-            lat = ((pos[1] - 51.4) * 3 * self.HEIGHT) + 30
-            self.graph.nodes[node.id].latitude = lat
-            self.graph.nodes[node.id].longitude = long
+    def __init_viewport(self):
+        """map original coordinates onto the UI frame, without changing them"""
+        self.viewport = Viewport(
+            self.WIDTH,
+            self.HEIGHT,
+            x_origin=-0.6,
+            y_origin=51.4,
+            x_scale=self.HEIGHT,
+            y_scale=3 * self.HEIGHT,
+        )
+
+    def __pos(self, node: int) -> tuple[float, float]:
+        """pixel position of a station in the current view"""
+        return self.renderer.screen_pos(int(node))
 
     def __init_tk(self):
         # init tkinter window
@@ -166,6 +212,14 @@ class GUI:
         self.show_lines_button.place(relx=self.OPT_W + 0.125, rely=0.3)
         self.show_lines = False
 
+        # skip to result button ---------------------------------------------
+        self.skip_button = Button(
+            self.win,
+            text="Skip",
+            command=self.__skip,
+        )
+        self.skip_button.place(relx=self.OPT_W + 0.21, rely=0.3)
+
         # lines selection slider init -----------------------------------------
         self.lines_selection = tk.IntVar()
         self.__init_line_data()
@@ -198,6 +252,7 @@ class GUI:
             1: {"text": "normal", "val": 100},
             2: {"text": "fast", "val": 50},
             3: {"text": "very fast", "val": 10},
+            4: {"text": "max", "val": 0},
         }
         self.delay_selection = tk.IntVar()
         self.delay_label = ttk.Label(self.win, text="Speed:")
@@ -213,7 +268,7 @@ class GUI:
         self.delay_slider = ttk.Scale(
             self.win,
             from_=0,
-            to=3,
+            to=4,
             orient="horizontal",
             command=self.__delay_changed,
             variable=self.delay_selection,
@@ -221,6 +276,10 @@ class GUI:
         self.delay_slider.place(relx=self.OPT_W - 0.25 + 0.08, rely=0.125)
         self.delay_slider.set(2)
 
+        # frames per second of the animation
+        self.fps_label = ttk.Label(self.win, text="")
+        self.fps_label.place(relx=self.OPT_W - 0.25, rely=0.17)
+
         # error label --------------------------------------------------------
         self.error_label = tk.Label(text="", fg=Colour.RED, wraplength=300)
         self.error_label.place(relx=self.OPT_W, rely=0.35)
@@ -256,32 +315,89 @@ class GUI:
         title = tk.Label(text="London Subway Network")
         title.place(relx=0.025, rely=0.025)
 
-        # connections between stations
-        for edge in self.graph.edges:
-            a = self.graph.nodes[edge.node1].get_pos()
-            b = self.graph.nodes[edge.node2].get_pos()
-            self.c.create_line(a[0], a[1], b[0], b[1], fill=Colour.GREY)
+        # connections between stations and the stations themselves, which
+        # the renderer recolours to animate searches
+        self.renderer = SearchRenderer(self.c, self.graph, self.viewport)
+        self.renderer.draw_network()
+
+        # drag to pan, click to pick a station, scroll to zoom about the
+        # cursor
+        self.c.bind("<ButtonPress-1>", self.__start_pan)
+        self.c.bind("<B1-Motion>", self.__pan)
+        self.c.bind("<ButtonRelease-1>", self.__click)
+        self.dragged = False
+        self.c.bind("<MouseWheel>", self.__zoom)
+        self.c.bind("<Button-4>", self.__zoom)
+        self.c.bind("<Button-5>", self.__zoom)
+
+    def __start_pan(self, event):
+        self.pan_from = (event.x, event.y)
+        self.dragged = False
+
+    def __pan(self, event):
+        dx, dy = event.x - self.pan_from[0], event.y - self.pan_from[1]
+        if not self.dragged and abs(dx) + abs(dy) < CLICK_SLOP:
+            return  # still a click
+        self.dragged = True
+        self.pan_from = (event.x, event.y)
+        self.renderer.pan(dx, dy)
+
+    def __click(self, event):
+        if self.dragged:
+            return
+        node, _ = self.graph.station_index.nearest(
+            *self.viewport.to_map(event.x, event.y)
+        )
+        if node is None:
+            return
+        x, y = self.__pos(node)
+        if math.hypot(x - event.x, y - event.y) > SELECT_RADIUS:
+            return
 
-        # stations
-        for node in self.graph.nodes.values():
-            create_circle(self.c, node.get_pos()[0], node.get_pos()[1], 3)
+        # fill the start, then the end, or add to the stations to cover
+        if self.path_algo_selection.get() == 4:
+            stations = self.stations_subset.get().strip(", ")
+            self.stations_subset.set(
+                f"{stations},{node}" if stations else str(node)
+            )
+        elif not self.from_var.get() or self.to_var.get():
+            self.from_var.set(str(node))
+            self.to_var.set("")
+        else:
+            self.to_var.set(str(node))
+        self.error_label.config(text="")
+
+    def __zoom(self, event):
+        zooming_in = event.num == 4 or event.delta > 0
+        factor = 1.25 if zooming_in else 1 / 1.25
+        self.renderer.zoom(factor, event.x, event.y)
 
     def __path_generator(self):
-        # show nodes that algorithm visits in order
-        self.tag = "tmp"
-        for val in self.path_algo.nodes_visited:
-            node = self.graph.nodes[int(val)]
-            yield node.get_pos(), int(val)
+        # show nodes that algorithm visits in order, as the worker reports
+        # them, unless skipping to the result; None means nothing has
+        # arrived yet
+        while self.result_algo is None:
+            events = self.worker.poll()
+            if not events:
+                yield None
+            for kind, payload in events:
+                if kind == "failed":
+                    raise payload
+                if kind == "done":
+                    self.result_algo = payload
+                    continue
+                for val in payload:
+                    if not self.renderer.skipping:
+                        yield int(val), self.colour
 
         # show nodes in shortest path
         self.colour = Colour.ORANGE  # swap colour to highlight shortest path
         prev = None
-        for val in self.path_algo.path:
+        for val in self.result_algo.path:
             if str(val) != prev:
                 self.sp.append(str(val))
                 prev = str(val)
-                node = self.graph.nodes[int(val)]
-                yield node.get_pos(), int(val)
+                yield int(val), self.colour
 
     def __select_path_algo(self):
         option = self.path_algo_selection.get()
@@ -294,7 +410,9 @@ class GUI:
             self.to_label.place(relx=self.OPT_W, rely=0.25)
             self.to_entry.place(relx=self.OPT_W + 0.08, rely=0.25)
         else:  # subset of nodes
-            self.path_algo = SubwayPatrolPlanning(self.graph)
+            self.path_algo = SubwayPatrolPlanning(
+                self.graph, self.distance_matrix
+            )
             self.stations_subset_label.place(relx=self.OPT_W, rely=0.225)
             self.stations_subset_entry.place(
                 relx=self.OPT_W + 0.08, rely=0.225
@@ -306,34 +424,40 @@ class GUI:
 
         self.path_algo = self.algorithms[option]
 
+    def __parse_stations(self, text: str) -> list[int]:
+        """station ids separated by ',', each of which must be on the map"""
+        stations = list(map(int, text.split(",")))
+        for station in stations:
+            if station not in self.graph.nodes:
+                raise ValueError(f"no station {station}")
+        return stations
+
+    def __parse_station(self, text: str) -> int:
+        """a single station id, which must be on the map"""
+        stations = self.__parse_stations(text)
+        if len(stations) != 1:
+            raise ValueError("expected one station")
+        return stations[0]
+
     def __start_path_find(self):
         if isinstance(self.path_algo, iPathFinder):
             try:
-                from_val = int(self.from_var.get())
-                to_val = int(self.to_var.get())
-                if (
-                    from_val < 1
-                    or from_val > 303
-                    or to_val < 1
-                    or to_val > 303
-                ):
-                    raise ValueError
+                start = self.__parse_station(self.from_var.get())
+                end = self.__parse_station(self.to_var.get())
             except ValueError:
                 self.error_label.config(
-                    text="Error: station inputs must be integers between 1-303"
+                    text="Error: enter station ids or click the map"
                 )
                 return
         else:
             try:
-                stations = list(
-                    map(int, self.stations_subset_entry.get().split(","))
+                stations = self.__parse_stations(
+                    self.stations_subset_entry.get()
                 )
-                if min(stations) < 0 or max(stations) > 303:
-                    raise ValueError
             except ValueError:
                 self.error_label.config(
-                    text="Error: invalid subset; "
-                    + "stations must be between 1-303 and separated by ','"
+                    text="Error: invalid subset; enter station ids "
+                    + "separated by ',' or click the map"
                 )
                 return
 
@@ -341,88 +465,62 @@ class GUI:
 
         if isinstance(self.path_algo, iPathFinder):
             # label for to and from station labels
-            self.from_station_label.config(
-                text=f"Start: \t station {self.from_var.get()}"
-            )
-            self.to_station_label.config(
-                text=f"End: \t station {self.to_var.get()}"
-            )
-            self.path_algo.find_path(
-                int(self.from_var.get()), int(self.to_var.get())
-            )
+            self.from_station_label.config(text=f"Start: \t station {start}")
+            self.to_station_label.config(text=f"End: \t station {end}")
+            self.query_stations = [start, end]
+            self.worker.submit(self.path_algo, start, end)
         else:
             self.from_station_label.config(
                 text=f"Stations to cover: \t {stations}"
             )
-            self.path_algo.find_path(stations)
-
-        # create instance of generator that generates nodes visited
-        self.coord_generator = self.__path_generator()
+            self.query_stations = stations
+            # plans can take long enough that reset has to stop them
+            self.worker.submit(self.path_algo, stations, cancellable=True)
 
         # labels for route + trip time
         self.route_label.config(text="Route: calculating...")
         self.sp_time_taken_label.config(text="Trip time: calculating...")
 
-        # animate algorithm on UI
-        self.__draw_path()
-
-    def __draw_path(self):
-        # next value visited using path finder
-        try:
-            coords, val = next(self.coord_generator)
-            if self.reset_pressed:
-                return
-        except Exception:
-            self.__finalize()
-            return
+        # animate algorithm on UI, a batch of nodes per frame
+        self.renderer.start(
+            self.__path_generator(),
+            self.__finalize,
+            self.__search_failed,
+            self.__show_fps,
+        )
 
-        # draw edges relaxed
-        for edge in self.graph.adj[val]:
-            a = self.graph.nodes[edge.node1].get_pos()
-            b = self.graph.nodes[edge.node2].get_pos()
-            self.c.create_line(
-                a[0],
-                a[1],
-                b[0],
-                b[1],
-                fill=self.colour,
-                width=2,
-                tags=self.tag,
-            )
+    def __search_failed(self, error: Exception):
+        self.error_label.config(text=f"Error: {error}")
+        self.route_label.config(text="")
+        self.sp_time_taken_label.config(text="")
 
-        # draw node visited
-        create_circle(
-            self.c, coords[0], coords[1], 4, colour=self.colour, tags=self.tag
-        )
+    def __show_fps(self, renderer: SearchRenderer):
+        self.fps_label.config(text=f"{renderer.fps:.0f} fps")
 
-        # delay before checking next node
-        self.win.after(self.delay, self.__draw_path)
+    def __skip(self):
+        self.renderer.skip()
 
     def __finalize(self):
-        if isinstance(self.path_algo, iPathFinder):
+        if isinstance(self.result_algo, iPathFinder):
             self.lines_label.place(relx=self.OPT_W, rely=0.6)
             self.__format_lines()
             route = " -> ".join(self.sp)
         else:
             self.lines_label.place_forget()
             route = ""
-            for i in range(len(self.path_algo.total_path)):
-                route += f"    - {' -> '.join(self.path_algo.total_path[i])}\n"
+            for i in range(len(self.result_algo.total_path)):
+                trip = self.result_algo.total_path[i]
+                route += f"    - {' -> '.join(trip)}\n"
 
         self.route_label.config(text=f"Route: \n{route}")
         self.sp_time_taken_label.config(
-            text=f"Trip time: {self.path_algo.total_time}"
+            text=f"Trip time: {self.result_algo.total_time}"
         )
 
-        if isinstance(self.path_algo, iPathFinder):
-            start = self.from_var.get()
-            end = self.to_var.get()
-            nodes = [start, end]
-        else:
-            nodes = list(map(int, self.stations_subset.get().split(",")))
-
-        for node in nodes:
-            pos = self.graph.nodes[int(node)].get_pos()
+        # the entries stay editable while the search runs, so they may no
+        # longer hold the stations it was given
+        for node in self.query_stations:
+            pos = self.__pos(node)
             create_circle(
                 self.c,
                 pos[0],
@@ -436,6 +534,10 @@ class GUI:
 
     def __reset(self, entry=True):
         self.reset_pressed = True
+        # stop the running search and its animation
+        self.worker.cancel()
+        self.result_algo = None
+        self.renderer.clear()
         self.sp = []
         if entry:
             self.from_entry.delete(0, tk.END)
@@ -456,9 +558,9 @@ class GUI:
             self.error_label.config(text="Error: no path selected")
             return
         if not self.show_lines:
-            for edge in self.path_algo.edge_route:
-                a = self.graph.nodes[edge.node1].get_pos()
-                b = self.graph.nodes[edge.node2].get_pos()
+            for edge in self.result_algo.edge_route:
+                a = self.__pos(edge.node1)
+                b = self.__pos(edge.node2)
                 colour = self.graph.lines[edge.line][1]
                 self.c.create_line(
                     a[0],
@@ -483,20 +585,20 @@ class GUI:
         for i in range(1, len(self.sp) - 1):
 
             if (
-                self.path_algo.edge_route[i].line
-                != self.path_algo.edge_route[i - 1].line
+                self.result_algo.edge_route[i].line
+                != self.result_algo.edge_route[i - 1].line
             ):
                 station_to = self.sp[i]
-                conn = self.path_algo.edge_route[i - 1]
+                conn = self.result_algo.edge_route[i - 1]
                 line_label += (
                     f"    - line {conn.line} from station"
                     + f" {station_from} to station {station_to}\n"
                 )
                 station_from = station_to
 
-        if self.path_algo.edge_route[-2] != self.path_algo.edge_route[-1]:
+        if self.result_algo.edge_route[-2] != self.result_algo.edge_route[-1]:
             line_label += (
-                f"    - line {self.path_algo.edge_route[-1].line} "
+                f"    - line {self.result_algo.edge_route[-1].line} "
                 + f"from station {station_from} to station {self.sp[-1]}\n"
             )
 
@@ -513,8 +615,8 @@ class GUI:
             return
 
         for edge in self.line_data[int(val)]:
-            a = self.graph.nodes[edge.node1].get_pos()
-            b = self.graph.nodes[edge.node2].get_pos()
+            a = self.__pos(edge.node1)
+            b = self.__pos(edge.node2)
             colour = self.graph.lines[int(val)][1]
             connection = self.c.create_line(
                 a[0], a[1], b[0], b[1], fill=f"#{colour}", width=4
@@ -524,7 +626,7 @@ class GUI:
     def __delay_changed(self, event):
         delay = self.delay_values[self.delay_selection.get()]
         self.delay_value_label.configure(text=delay["text"])
-        self.delay = delay["val"]
+        self.delay = self.renderer.delay = delay["val"]
 
     def run(self):
         self.win.mainloop()
@@ -0,0 +1,188 @@
+from graph.graph import Graph
+from .frontiers import make_frontier
+from .pathfinders import iPathFinder, AStarAlgorithm
+from .sssp import INFINITY
+
+FORWARD, BACKWARD = 0, 1
+
+
+class BidirectionalDijkstra(iPathFinder):
+    """
+    dijkstra run from both the start and the end at once; the network is
+    undirected, so the backward search uses the same CSR adjacency
+
+    the search stops once the smallest keys of the two frontiers add up to
+    at least the best meeting distance `mu` found so far, at which point
+    no undiscovered path can be shorter
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        print_solution: bool = False,
+        frontier="binary",
+        cache=None,
+    ):
+        super().__init__(
+            graph,
+            print_solution,
+            use_csr=True,
+            frontier=frontier,
+            cache=cache,
+        )
+
+    def _search(self, start: int, end: int, frontier=None):
+        self.path = []
+        self.edge_to = [""] * (len(self.nodes) + 2)
+        self.dist_to = [INFINITY] * (len(self.nodes) + 2)
+        self.start = start
+        self.end = end
+        self.found_end = False
+        self.nodes_visited = []
+        self._potentials = {}
+
+        frontiers = (
+            make_frontier(frontier or self.frontier),
+            make_frontier(frontier or self.frontier),
+        )
+        dist = ({start: 0}, {end: 0})
+        parent_edge = ({start: -1}, {end: -1})
+        frontiers[FORWARD].put((self._get_key(FORWARD, start, 0), start))
+        frontiers[BACKWARD].put((self._get_key(BACKWARD, end, 0), end))
+
+        self.mu = 0 if start == end else INFINITY
+        meeting_node = start if start == end else None
+
+        while not (frontiers[FORWARD].empty() or frontiers[BACKWARD].empty()):
+            forward_key = frontiers[FORWARD].peek()[0]
+            backward_key = frontiers[BACKWARD].peek()[0]
+            if forward_key + backward_key >= self.mu:
+                break
+
+            # expand the side with the smaller key
+            side = FORWARD if forward_key <= backward_key else BACKWARD
+            _, node = frontiers[side].get()
+            self.nodes_visited.append(node)
+
+            meeting = self._relax_side(
+                side, node, frontiers[side], dist, parent_edge
+            )
+            if meeting is not None:
+                meeting_node = meeting
+
+        self.nodes_settled = len(self.nodes_visited)
+        if meeting_node is not None:
+            self.found_end = True
+            self._join_paths(meeting_node, parent_edge)
+            self.dist_to[end] = self.mu
+
+        self._format_solution(self.print_solution)
+        return self.path
+
+    def _relax_side(self, side, node, frontier, dist, parent_edge):
+        # relax the edges of `node` on one side, returning the node where
+        # the two searches met on a new shortest path, if any
+        csr = self.csr
+        neighbours, weights, edge_ids = (
+            csr.neighbours,
+            csr.weights,
+            csr.edge_ids,
+        )
+        this_dist, other_dist = dist[side], dist[1 - side]
+        dist_to_node = this_dist[node]
+        meeting_node = None
+
+        for slot in range(csr.offsets[node], csr.offsets[node + 1]):
+            adjacent_node = neighbours[slot]
+            new_dist = dist_to_node + weights[slot]
+
+            if new_dist < this_dist.get(adjacent_node, INFINITY):
+                this_dist[adjacent_node] = new_dist
+                parent_edge[side][adjacent_node] = edge_ids[slot]
+                frontier.put(
+                    (
+                        self._get_key(side, adjacent_node, new_dist),
+                        adjacent_node,
+                    )
+                )
+
+            # a path through this edge joins the other search
+            if adjacent_node in other_dist:
+                total = new_dist + other_dist[adjacent_node]
+                if total < self.mu:
+                    self.mu = total
+                    meeting_node = adjacent_node
+
+        return meeting_node
+
+    def _join_paths(self, meeting_node: int, parent_edge: tuple):
+        # forward edges already point back towards the start
+        node = meeting_node
+        while parent_edge[FORWARD][node] != -1:
+            edge = self.edges[parent_edge[FORWARD][node]]
+            self.edge_to[node] = edge
+            node = self._get_other_node(edge, node)
+
+        # backward edges point towards the end, so flip them
+        node = meeting_node
+        while parent_edge[BACKWARD][node] != -1:
+            edge = self.edges[parent_edge[BACKWARD][node]]
+            next_node = self._get_other_node(edge, node)
+            self.edge_to[next_node] = edge
+            node = next_node
+
+    def _get_key(self, side: int, node: int, dist: int):
+        return dist
+
+    def get_num_nodes_settled(self) -> int:
+        return self.nodes_settled
+
+    def get_total_weight(self) -> int:
+        return self.total_time
+
+    def _get_priority(self, adjacent_node, node):
+        return 0
+
+    def _get_heuristic(self, adjacent_node, node):
+        return 0
+
+
+class BidirectionalAStar(BidirectionalDijkstra):
+    """
+    bidirectional A* with the average potential
+    p(v) = (h(v, end) - h(v, start)) / 2, so both searches see the same
+    reduced edge lengths and the dijkstra stopping rule stays valid
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        print_solution: bool = False,
+        frontier="binary",
+        landmarks=None,
+        cache=None,
+    ):
+        super().__init__(graph, print_solution, frontier, cache)
+        self.landmarks = landmarks
+        if landmarks is not None:
+            landmarks.watch(graph)
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        landmarks = self.landmarks
+        return (
+            *super()._cache_key(start, end),
+            None if landmarks is None else tuple(landmarks.landmarks),
+        )
+
+    def _get_key(self, side: int, node: int, dist: int) -> float:
+        if node not in self._potentials:
+            this_node = self.nodes[node]
+            self._potentials[node] = (
+                self._get_heuristic(this_node, self.nodes[self.end])
+                - self._get_heuristic(this_node, self.nodes[self.start])
+            ) / 2
+        potential = self._potentials[node]
+        return dist + potential if side == FORWARD else dist - potential
+
+    def _get_heuristic(self, start_node, end_node) -> float:
+        return AStarAlgorithm._get_heuristic(self, start_node, end_node)
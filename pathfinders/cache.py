@@ -0,0 +1,107 @@
+from collections import OrderedDict, defaultdict
+
+
+class RouteCache:
+    """
+    bounded cache of finished routes shared between pathfinders
+
+    keys are (algorithm, start, end, graph version) followed by the
+    settings of the pathfinder, so results from before an edit or from a
+    pathfinder set up differently can never be returned; the cache also
+    drops everything as soon as a graph it watches is edited. `policy` is
+    "lru" to evict the least recently used route, or "lfu" to evict the
+    least frequently used one (oldest first among ties)
+    """
+
+    def __init__(self, maxsize: int = 1024, policy: str = "lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"unknown cache policy {policy!r}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._watched = set()
+        self.clear()
+
+    def watch(self, graph):
+        """invalidate the cache whenever `graph` is edited"""
+        if id(graph) not in self._watched:
+            self._watched.add(id(graph))
+            graph.subscribe(lambda *change: self.invalidate())
+
+    def get(self, key: tuple):
+        if key not in self._entries:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.policy == "lru":
+            self._entries.move_to_end(key)
+        else:
+            self._touch(key)
+        return self._entries[key]
+
+    def put(self, key: tuple, value):
+        if self.maxsize <= 0:
+            return
+        if key in self._entries:
+            self._entries[key] = value
+            return
+
+        if len(self._entries) >= self.maxsize:
+            self._evict()
+        self._entries[key] = value
+        if self.policy == "lfu":
+            self._counts[key] = 1
+            self._by_count[1][key] = None
+            self._min_count = 1
+
+    def invalidate(self):
+        self.invalidations += 1
+        self.clear()
+
+    def clear(self):
+        self._entries = OrderedDict()
+        # lfu bookkeeping: use count per key, and keys by use count in
+        # insertion order
+        self._counts = {}
+        self._by_count = defaultdict(OrderedDict)
+        self._min_count = 0
+
+    def _touch(self, key: tuple):
+        count = self._counts[key]
+        del self._by_count[count][key]
+        if not self._by_count[count]:
+            del self._by_count[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._by_count[count + 1][key] = None
+
+    def _evict(self):
+        if self.policy == "lru":
+            self._entries.popitem(last=False)
+        else:
+            key, _ = self._by_count[self._min_count].popitem(last=False)
+            if not self._by_count[self._min_count]:
+                del self._by_count[self._min_count]
+            del self._counts[key]
+            del self._entries[key]
+        self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,297 @@
+"""
+headless entry point: answer route and patrol queries from a file without
+building the Tk GUI
+
+    python -m pathfinders queries.jsonl --algorithm astar --time
+
+each input line is either an OD pair or a patrol set:
+- JSONL: {"start": 1, "end": 200} or {"stations": [1, 50, 100]}
+- CSV with a header: columns `start,end` or a `stations` column of ids
+  separated by spaces or semicolons
+
+with `--algorithm timetable` an OD pair may also give a `departure` time
+as HH:MM[:SS], and the result includes the arrival time; with
+`--algorithm kshortest` it lists up to `--routes` - 1 `alternatives`
+after the fastest route
+
+a station may also be given by position, as [latitude, longitude] in
+JSONL or with `start_lat,start_lon,end_lat,end_lon` columns in CSV, and
+the nearest station is used; the result then says how far it was under
+`snapped`
+
+one JSON result is written per query, in input order
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from graph.builder import (
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+)
+from graph.graph import Graph
+from graph.snapshot import SnapshotGraphBuilder
+from planners.planners import SubwayPatrolPlanning
+from .cache import RouteCache
+from .kshortest import KShortestPaths
+from .registry import PATH_FINDERS, make_path_finder
+from .timetable import TimetablePathFinder, format_time, parse_time
+
+
+def read_queries(file):
+    """yield each query in `file` as a dict, reading it lazily"""
+    first_line = file.readline()
+    if first_line.lstrip().startswith("{"):
+        for line in _chain(first_line, file):
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    # anything else is a CSV file with a header row
+    for row in csv.DictReader(_chain(first_line, file)):
+        if row.get("stations"):
+            stations = row["stations"].replace(";", " ").split()
+            yield {"stations": list(map(int, stations))}
+        else:
+            query = {"start": _csv_station(row, "start")}
+            query["end"] = _csv_station(row, "end")
+            if row.get("departure"):
+                query["departure"] = row["departure"]
+            yield query
+
+
+def _csv_station(row: dict, column: str):
+    if row.get(column):
+        return int(row[column])
+    return [float(row[f"{column}_lat"]), float(row[f"{column}_lon"])]
+
+
+def _chain(first_line: str, file):
+    yield first_line
+    yield from file
+
+
+def snap_stations(graph: Graph, stations: list, snapped: dict) -> list[int]:
+    """
+    station ids for `stations`, replacing each [latitude, longitude] with
+    the nearest station, whose distance is recorded in `snapped` by
+    position in the list
+    """
+    positions = [
+        (i, station)
+        for i, station in enumerate(stations)
+        if isinstance(station, list)
+    ]
+    ids = list(stations)
+    if positions:
+        nearest = graph.station_index.snap(
+            (float(longitude), float(latitude))
+            for _, (latitude, longitude) in positions
+        )
+        for (i, position), (node_id, metres) in zip(positions, nearest):
+            ids[i] = node_id
+            snapped[i] = {
+                "position": position,
+                "station": node_id,
+                "metres": round(metres, 1),
+            }
+    return list(map(int, ids))
+
+
+def format_legs(start: int, edge_route: list) -> tuple[list, list]:
+    """the stations of a route, and the legs ridden on each line"""
+    route = [start]
+    for edge in edge_route:
+        route.append(edge.node2 if edge.node1 == route[-1] else edge.node1)
+
+    legs = []
+    station_from = start
+    for i, edge in enumerate(edge_route):
+        last = i == len(edge_route) - 1
+        if last or edge_route[i + 1].line != edge.line:
+            legs.append(
+                {"line": edge.line, "from": station_from, "to": route[i + 1]}
+            )
+            station_from = route[i + 1]
+    return route, legs
+
+
+def format_route(path_finder, start: int, end: int) -> dict:
+    _, legs = format_legs(start, path_finder.edge_route)
+    result = {
+        "start": start,
+        "end": end,
+        "total_time": path_finder.total_time,
+        "path": list(map(int, path_finder.path)),
+        "legs": legs,
+    }
+    if isinstance(path_finder, TimetablePathFinder):
+        result["departure"] = format_time(path_finder.departure)
+        if path_finder.found_end:
+            result["arrival"] = format_time(path_finder.arrival_time)
+    if isinstance(path_finder, KShortestPaths):
+        result["alternatives"] = []
+        for total_time, edge_route in path_finder.routes[1:]:
+            route, legs = format_legs(start, edge_route)
+            result["alternatives"].append(
+                {"total_time": total_time, "path": route, "legs": legs}
+            )
+    return result
+
+
+def format_patrol(planner: SubwayPatrolPlanning) -> dict:
+    return {
+        "stations": planner.stations,
+        "min_path": planner.min_path,
+        "total_time": planner.total_time,
+        "exact": planner.exact,
+        "lower_bound": planner.lower_bound,
+        "path": list(map(int, planner.path)),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pathfinders",
+        description="Answer route and patrol queries without the GUI.",
+    )
+    parser.add_argument(
+        "queries",
+        nargs="?",
+        default="-",
+        help="CSV or JSONL file of queries, '-' for stdin (default)",
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file, '-' for stdout"
+    )
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        default="dijkstra",
+        choices=sorted(PATH_FINDERS),
+        help="pathfinder for OD pairs (default: dijkstra)",
+    )
+    parser.add_argument(
+        "-k",
+        "--routes",
+        type=int,
+        default=3,
+        help="routes per OD pair with --algorithm kshortest (default: 3)",
+    )
+    parser.add_argument("--stations", default=LONDON_STATIONS_FILE)
+    parser.add_argument("--connections", default=LONDON_CONNECTIONS_FILE)
+    parser.add_argument("--lines", default=LONDON_LINES_FILE)
+    parser.add_argument(
+        "--planning-mode",
+        default="auto",
+        choices=("auto", "exact", "approximate"),
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=1.0,
+        help="seconds of local search for approximate patrol plans",
+    )
+    parser.add_argument(
+        "--cache",
+        type=int,
+        default=0,
+        metavar="SIZE",
+        help="keep up to SIZE routes in an LRU cache (default: off)",
+    )
+    parser.add_argument(
+        "--time",
+        action="store_true",
+        help="add per-query `elapsed_ms` and print a timing summary to "
+        "stderr",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start_time = time.perf_counter()
+
+    graph_builder = SnapshotGraphBuilder(
+        args.stations, args.connections, args.lines
+    )
+    graph = Graph(*graph_builder.build_components())
+    cache = RouteCache(args.cache) if args.cache else None
+    path_finder = make_path_finder(
+        args.algorithm,
+        graph,
+        cache,
+        dataset_files=(args.stations, args.connections, args.lines),
+    )
+    if isinstance(path_finder, KShortestPaths):
+        path_finder.k = args.routes
+    planner = SubwayPatrolPlanning(
+        graph,
+        mode=args.planning_mode,
+        time_budget=args.time_budget,
+        cache=cache,
+    )
+    load_seconds = time.perf_counter() - start_time
+
+    queries_file = (
+        sys.stdin if args.queries == "-" else open(args.queries, newline="")
+    )
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    num_queries = 0
+    query_seconds = 0.0
+    default_departure = getattr(path_finder, "departure", None)
+
+    try:
+        for query in read_queries(queries_file):
+            query_start = time.perf_counter()
+            snapped = {}
+            if "stations" in query:
+                stations = snap_stations(graph, query["stations"], snapped)
+                planner.find_path(stations)
+                result = format_patrol(planner)
+            else:
+                if isinstance(path_finder, TimetablePathFinder):
+                    path_finder.departure = parse_time(
+                        query.get("departure", default_departure)
+                    )
+                start, end = snap_stations(
+                    graph, [query["start"], query["end"]], snapped
+                )
+                snapped = {
+                    ("start", "end")[i]: value
+                    for i, value in snapped.items()
+                }
+                path_finder.find_path(start, end)
+                result = format_route(path_finder, start, end)
+            if snapped:
+                result["snapped"] = snapped
+            elapsed = time.perf_counter() - query_start
+
+            num_queries += 1
+            query_seconds += elapsed
+            if args.time:
+                result["elapsed_ms"] = round(elapsed * 1000, 3)
+            output.write(json.dumps(result) + "\n")
+    finally:
+        if queries_file is not sys.stdin:
+            queries_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    if args.time:
+        print(
+            f"loaded graph in {load_seconds * 1000:.1f} ms; "
+            f"{num_queries} queries in {query_seconds:.3f} s "
+            f"({num_queries / query_seconds if query_seconds else 0:.0f}/s)",
+            file=sys.stderr,
+        )
+        if cache is not None:
+            stats = cache.stats()
+            print(
+                f"cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.1%}), {stats['evictions']} evicted",
+                file=sys.stderr,
+            )
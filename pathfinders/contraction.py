@@ -0,0 +1,391 @@
+from array import array
+from graph.csr import CSRAdjacency
+from graph.graph import Graph
+from graph.persistence import read_arrays, source_digest, write_arrays
+from .bidirectional import BidirectionalDijkstra
+from .sssp import INFINITY
+import heapq
+
+MAGIC = b"PFCHIDX1"
+
+# settled node limit for each witness search while contracting
+WITNESS_SETTLE_LIMIT = 200
+
+
+class ContractionHierarchy:
+    """
+    contraction hierarchy over the undirected CSR adjacency
+
+    every arc is either an original edge (`arc_edge` is its id in
+    `graph.edges`) or a shortcut replacing the two arcs `arc_child1` and
+    `arc_child2` through a contracted node; `up_*` is a CSR of the arcs
+    leading from each node to nodes of higher `rank`, which is all a query
+    needs to search
+    """
+
+    def __init__(
+        self,
+        rank,
+        arc_nodes1,
+        arc_nodes2,
+        arc_edge,
+        arc_child1,
+        arc_child2,
+        up_offsets,
+        up_targets,
+        up_weights,
+        up_arcs,
+    ):
+        self.rank = rank
+        self.arc_nodes1 = arc_nodes1
+        self.arc_nodes2 = arc_nodes2
+        self.arc_edge = arc_edge
+        self.arc_child1 = arc_child1
+        self.arc_child2 = arc_child2
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_arcs = up_arcs
+
+    @classmethod
+    def build(cls, graph: Graph) -> "ContractionHierarchy":
+        return _HierarchyBuilder(graph.csr).build()
+
+    @classmethod
+    def load(cls, path: str, source_files: list[str]):
+        """memory-map a saved hierarchy, or return None if it is stale"""
+        arrays = read_arrays(path, MAGIC, source_digest(source_files))
+        if arrays is None:
+            return None
+        return cls(**arrays)
+
+    @classmethod
+    def load_or_build(
+        cls, graph: Graph, path: str, source_files: list[str]
+    ) -> "ContractionHierarchy":
+        hierarchy = cls.load(path, source_files)
+        if hierarchy is None:
+            hierarchy = cls.build(graph)
+            hierarchy.save(path, source_files)
+        return hierarchy
+
+    def save(self, path: str, source_files: list[str]):
+        write_arrays(
+            path,
+            MAGIC,
+            source_digest(source_files),
+            {name: array("i", values) for name, values in vars(self).items()},
+        )
+
+    @property
+    def num_shortcuts(self) -> int:
+        return sum(1 for edge_id in self.arc_edge if edge_id == -1)
+
+    def unpack(self, arc: int, from_node: int) -> list[int]:
+        """original edge ids making up `arc`, walked from `from_node`"""
+        edge_ids = []
+        stack = [(arc, from_node)]
+        while stack:
+            arc, node = stack.pop()
+            if self.arc_edge[arc] != -1:
+                edge_ids.append(self.arc_edge[arc])
+                continue
+
+            # walk the child touching `node` first
+            first, second = self.arc_child1[arc], self.arc_child2[arc]
+            if node not in (self.arc_nodes1[first], self.arc_nodes2[first]):
+                first, second = second, first
+            middle = self._other_end(first, node)
+            stack.append((second, middle))
+            stack.append((first, node))
+        return edge_ids
+
+    def _other_end(self, arc: int, node: int) -> int:
+        if self.arc_nodes1[arc] == node:
+            return self.arc_nodes2[arc]
+        return self.arc_nodes1[arc]
+
+
+class _HierarchyBuilder:
+    def __init__(self, csr: CSRAdjacency):
+        self.num_nodes = csr.num_nodes
+        self.arc_nodes1 = array("i")
+        self.arc_nodes2 = array("i")
+        self.arc_weights = array("i")
+        self.arc_edge = array("i")
+        self.arc_child1 = array("i")
+        self.arc_child2 = array("i")
+
+        # remaining[u][v] = (weight, arc) of the lightest arc between
+        # two uncontracted nodes
+        self.remaining = [{} for _ in range(self.num_nodes)]
+        for node in range(self.num_nodes):
+            for slot in csr.slots(node):
+                neighbour = csr.neighbours[slot]
+                if node < neighbour:
+                    self._add_arc(
+                        node, neighbour, csr.weights[slot], csr.edge_ids[slot]
+                    )
+
+    def _add_arc(self, node1, node2, weight, edge_id, child1=-1, child2=-1):
+        current = self.remaining[node1].get(node2)
+        if current is not None and current[0] <= weight:
+            return
+
+        arc = len(self.arc_weights)
+        self.arc_nodes1.append(node1)
+        self.arc_nodes2.append(node2)
+        self.arc_weights.append(weight)
+        self.arc_edge.append(edge_id)
+        self.arc_child1.append(child1)
+        self.arc_child2.append(child2)
+        self.remaining[node1][node2] = (weight, arc)
+        self.remaining[node2][node1] = (weight, arc)
+
+    def _shortcuts(self, node: int) -> list[tuple]:
+        # shortcuts needed to contract `node`: one per pair of neighbours
+        # whose only shortest connection runs through `node`
+        neighbours = list(self.remaining[node].items())
+        shortcuts = []
+        for i, (source, (source_weight, source_arc)) in enumerate(neighbours):
+            targets = {
+                target: source_weight + weight
+                for target, (weight, _) in neighbours[i + 1 :]
+            }
+            if not targets:
+                continue
+            witness = self._witness_search(
+                source, node, targets, max(targets.values())
+            )
+            for target, (weight, target_arc) in neighbours[i + 1 :]:
+                via = source_weight + weight
+                if witness.get(target, INFINITY) > via:
+                    shortcuts.append(
+                        (source, target, via, source_arc, target_arc)
+                    )
+        return shortcuts
+
+    def _witness_search(self, source, ignored, targets, max_dist) -> dict:
+        # bounded dijkstra from `source` that avoids the contracted node
+        dist = {source: 0}
+        heap = [(0, source)]
+        remaining_targets = set(targets)
+        settled = 0
+
+        while heap and remaining_targets and settled < WITNESS_SETTLE_LIMIT:
+            dist_to_node, node = heapq.heappop(heap)
+            if dist_to_node > dist[node]:
+                continue
+            if dist_to_node > max_dist:
+                break
+            settled += 1
+            remaining_targets.discard(node)
+
+            for neighbour, (weight, _) in self.remaining[node].items():
+                if neighbour == ignored:
+                    continue
+                new_dist = dist_to_node + weight
+                if new_dist < dist.get(neighbour, INFINITY):
+                    dist[neighbour] = new_dist
+                    heapq.heappush(heap, (new_dist, neighbour))
+        return dist
+
+    def _priority(self, node: int, contracted_neighbours: list[int]) -> int:
+        # edge difference plus how many neighbours are already contracted,
+        # which spreads contraction evenly over the network
+        edge_difference = len(self._shortcuts(node)) - len(
+            self.remaining[node]
+        )
+        return edge_difference + contracted_neighbours[node]
+
+    def build(self) -> ContractionHierarchy:
+        rank = array("i", [0]) * self.num_nodes
+        contracted_neighbours = [0] * self.num_nodes
+        heap = [
+            (self._priority(node, contracted_neighbours), node)
+            for node in range(self.num_nodes)
+        ]
+        heapq.heapify(heap)
+
+        # lazy updates: recompute the popped node's priority and only
+        # contract it if it is still the smallest
+        next_rank = 0
+        while heap:
+            _, node = heapq.heappop(heap)
+            priority = self._priority(node, contracted_neighbours)
+            if heap and priority > heap[0][0]:
+                heapq.heappush(heap, (priority, node))
+                continue
+
+            for source, target, via, arc1, arc2 in self._shortcuts(node):
+                self._add_arc(source, target, via, -1, arc1, arc2)
+            for neighbour in self.remaining[node]:
+                del self.remaining[neighbour][node]
+                contracted_neighbours[neighbour] += 1
+            self.remaining[node] = {}
+
+            rank[node] = next_rank
+            next_rank += 1
+
+        return ContractionHierarchy(
+            rank,
+            self.arc_nodes1,
+            self.arc_nodes2,
+            self.arc_edge,
+            self.arc_child1,
+            self.arc_child2,
+            *self._upward_csr(rank),
+        )
+
+    def _upward_csr(self, rank) -> tuple:
+        # keep each arc only at its lower ranked end
+        lower_ends = [
+            (node1, node2) if rank[node1] < rank[node2] else (node2, node1)
+            for node1, node2 in zip(self.arc_nodes1, self.arc_nodes2)
+        ]
+        offsets = array("i", [0]) * (self.num_nodes + 1)
+        for lower, _ in lower_ends:
+            offsets[lower + 1] += 1
+        for node in range(self.num_nodes):
+            offsets[node + 1] += offsets[node]
+
+        num_arcs = len(lower_ends)
+        targets = array("i", [0]) * num_arcs
+        weights = array("i", [0]) * num_arcs
+        arcs = array("i", [0]) * num_arcs
+        cursor = offsets[:-1]
+        for arc, (lower, upper) in enumerate(lower_ends):
+            slot = cursor[lower]
+            cursor[lower] += 1
+            targets[slot] = upper
+            weights[slot] = self.arc_weights[arc]
+            arcs[slot] = arc
+        return offsets, targets, weights, arcs
+
+
+class ContractionHierarchyPathFinder(BidirectionalDijkstra):
+    """
+    bidirectional dijkstra restricted to upward arcs of a
+    `ContractionHierarchy`, with shortcuts unpacked back into the
+    original edges
+
+    the hierarchy describes the graph as it was when built; once the
+    graph is edited, queries fall back to plain bidirectional dijkstra
+    until `rebuild` is called, since contracting again takes seconds
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        hierarchy: ContractionHierarchy = None,
+        print_solution: bool = False,
+        cache=None,
+    ):
+        super().__init__(graph, print_solution, cache=cache)
+        self.hierarchy = hierarchy or ContractionHierarchy.build(graph)
+        self.hierarchy_version = graph.version
+
+    @property
+    def stale(self) -> bool:
+        return self.hierarchy_version != self.graph.version
+
+    def rebuild(self):
+        """contract the graph again, as it is now"""
+        self.hierarchy = ContractionHierarchy.build(self.graph)
+        self.hierarchy_version = self.graph.version
+
+    def _search(self, start: int, end: int, frontier=None):
+        if self.stale:
+            return super()._search(start, end, frontier)
+
+        self.path = []
+        self.edge_to = [""] * (len(self.nodes) + 2)
+        self.dist_to = [INFINITY] * (len(self.nodes) + 2)
+        self.start = start
+        self.end = end
+        self.nodes_visited = []
+
+        dist = ({start: 0}, {end: 0})
+        parent_arc = ({start: (-1, -1)}, {end: (-1, -1)})
+        heaps = ([(0, start)], [(0, end)])
+        mu = 0 if start == end else INFINITY
+        meeting_node = start if start == end else None
+
+        # an upward search can stop once its smallest key reaches `mu`
+        side = 0
+        while (heaps[0] and heaps[0][0][0] < mu) or (
+            heaps[1] and heaps[1][0][0] < mu
+        ):
+            if not heaps[side] or heaps[side][0][0] >= mu:
+                side = 1 - side
+            dist_to_node, node = heapq.heappop(heaps[side])
+            if dist_to_node > dist[side][node]:
+                continue
+            self.nodes_visited.append(node)
+
+            if node in dist[1 - side]:
+                total = dist_to_node + dist[1 - side][node]
+                if total < mu:
+                    mu, meeting_node = total, node
+
+            self._relax_upward(side, node, dist, parent_arc, heaps[side])
+            side = 1 - side
+
+        self.nodes_settled = len(self.nodes_visited)
+        self.found_end = meeting_node is not None
+        if self.found_end:
+            self._unpack_route(meeting_node, parent_arc)
+            self.dist_to[end] = mu
+
+        self._format_solution(self.print_solution)
+        return self.path
+
+    def _relax_upward(self, side, node, dist, parent_arc, heap):
+        hierarchy = self.hierarchy
+        this_dist = dist[side]
+        dist_to_node = this_dist[node]
+        for slot in range(
+            hierarchy.up_offsets[node], hierarchy.up_offsets[node + 1]
+        ):
+            adjacent_node = hierarchy.up_targets[slot]
+            new_dist = dist_to_node + hierarchy.up_weights[slot]
+            if new_dist < this_dist.get(adjacent_node, INFINITY):
+                this_dist[adjacent_node] = new_dist
+                parent_arc[side][adjacent_node] = (
+                    hierarchy.up_arcs[slot],
+                    node,
+                )
+                heapq.heappush(heap, (new_dist, adjacent_node))
+
+    def _unpack_route(self, meeting_node: int, parent_arc: tuple):
+        # arcs from the start up to the meeting node, in travel order
+        arcs = []
+        node = meeting_node
+        while parent_arc[0][node][0] != -1:
+            arc, node = parent_arc[0][node]
+            arcs.append((arc, node))
+        arcs.reverse()
+
+        # arcs from the meeting node down to the end
+        node = meeting_node
+        while parent_arc[1][node][0] != -1:
+            arc, next_node = parent_arc[1][node]
+            arcs.append((arc, node))
+            node = next_node
+
+        # expand shortcuts and point edge_to along the route
+        node = self.start
+        for arc, from_node in arcs:
+            for edge_id in self.hierarchy.unpack(arc, from_node):
+                edge = self.edges[edge_id]
+                node = self._get_other_node(edge, node)
+                self.edge_to[node] = edge
+
+    def get_total_weight(self) -> int:
+        return self.total_time
+
+    def _get_priority(self, adjacent_node, node):
+        return 0
+
+    def _get_heuristic(self, adjacent_node, node):
+        return 0
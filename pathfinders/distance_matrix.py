@@ -0,0 +1,295 @@
+from array import array
+import heapq
+from graph.graph import Graph
+from graph.persistence import read_arrays, source_digest, write_arrays
+from .pathfinders import iPathFinder
+from .sssp import INFINITY, shortest_path_tree
+
+MAGIC = b"PFAPSP01"
+UNREACHABLE = 2**31 - 1  # int32 sentinel stored in the file
+
+
+class DistanceMatrix:
+    """
+    all-pairs travel times and next-hop edges, indexed by dense node index
+
+    `next_edge[i * n + j]` is the id of the first edge on a shortest path
+    from node i to node j, so paths are rebuilt in O(path length)
+
+    once `watch` is called, graph edits are applied to the matrix in
+    place: only the entries whose shortest paths the edited edge can
+    change are updated
+    """
+
+    def __init__(self, graph: Graph, node_ids, dist, next_edge):
+        self.graph = graph
+        self.node_ids = node_ids
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.dist = dist
+        self.next_edge = next_edge
+        self.rows_repaired = 0
+        self._watching = False
+
+    @classmethod
+    def build(cls, graph: Graph) -> "DistanceMatrix":
+        """run dijkstra from every node to fill the matrices"""
+        node_ids = array("i", sorted(graph.nodes))
+        n = len(node_ids)
+        dist = array("i", [UNREACHABLE]) * (n * n)
+        next_edge = array("i", [-1]) * (n * n)
+
+        for i, source in enumerate(node_ids):
+            tree = shortest_path_tree(graph.csr, source)
+            first_edge = tree.first_edges()
+            row = i * n
+            for j, target in enumerate(node_ids):
+                if tree.dist[target] != INFINITY:
+                    dist[row + j] = tree.dist[target]
+                    next_edge[row + j] = first_edge[target]
+
+        return cls(graph, node_ids, dist, next_edge)
+
+    @classmethod
+    def load(cls, graph: Graph, path: str, source_files: list[str]):
+        """memory-map a saved matrix, or return None if it is stale"""
+        arrays = read_arrays(path, MAGIC, source_digest(source_files))
+        if arrays is None or len(arrays["node_ids"]) != len(graph.nodes):
+            return None
+        return cls(
+            graph, arrays["node_ids"], arrays["dist"], arrays["next_edge"]
+        )
+
+    @classmethod
+    def load_or_build(
+        cls, graph: Graph, path: str, source_files: list[str]
+    ) -> "DistanceMatrix":
+        """load the matrix at `path`, rebuilding it if the sources changed"""
+        matrix = cls.load(graph, path, source_files)
+        if matrix is None:
+            matrix = cls.build(graph)
+            matrix.save(path, source_files)
+        return matrix
+
+    def save(self, path: str, source_files: list[str]):
+        write_arrays(
+            path,
+            MAGIC,
+            source_digest(source_files),
+            {
+                "node_ids": array("i", self.node_ids),
+                "dist": array("i", self.dist),
+                "next_edge": array("i", self.next_edge),
+            },
+        )
+
+    def watch(self):
+        """repair the matrix whenever its graph is edited"""
+        if not self._watching:
+            self._watching = True
+            self.graph.subscribe(self.repair)
+
+    def repair(self, edge_id: int, old_time, new_time):
+        """
+        apply a change of the time of edge `edge_id` from `old_time` to
+        `new_time`, where None means the edge is closed
+
+        a faster edge can only shorten paths through it, which is a
+        min-plus update of the rows that reach one endpoint sooner through
+        the other; a slower or closed edge can only lengthen the paths
+        between the pairs where it was tight, and only those entries are
+        searched again
+        """
+        edge = self.graph.edges[edge_id]
+        node1, node2 = self.index[edge.node1], self.index[edge.node2]
+        if new_time is not None and (old_time is None or new_time < old_time):
+            self._decrease(edge_id, node1, node2, new_time)
+        elif old_time is not None and (
+            new_time is None or new_time > old_time
+        ):
+            self._increase(node1, node2, old_time)
+
+    def _decrease(self, edge_id: int, node1: int, node2: int, time: int):
+        n = len(self.node_ids)
+        dist, next_edge = self.dist, self.next_edge
+        for near, far in ((node1, node2), (node2, node1)):
+            near_row, far_row = near * n, far * n
+            # a row can only improve in the columns where `near` itself
+            # improves, and only if it reaches `far` sooner through `near`
+            columns = [
+                j
+                for j in range(n)
+                if dist[far_row + j] != UNREACHABLE
+                and time + dist[far_row + j] < dist[near_row + j]
+            ]
+            if not columns:
+                continue
+            from_far = [dist[far_row + j] for j in columns]
+            for i in range(n):
+                row = i * n
+                to_near = dist[row + near]
+                if to_near == UNREACHABLE or to_near + time >= dist[row + far]:
+                    continue
+                via = to_near + time
+                first = edge_id if i == near else next_edge[row + near]
+                for j, to_j in zip(columns, from_far):
+                    if via + to_j < dist[row + j]:
+                        dist[row + j] = via + to_j
+                        next_edge[row + j] = first
+                self.rows_repaired += 1
+
+    def _increase(self, node1: int, node2: int, old_time: int):
+        n = len(self.node_ids)
+        dist = self.dist
+
+        def behind(near: int, far: int) -> list[int]:
+            # the nodes that `far` reached over the edge through `near`
+            near_row, far_row = near * n, far * n
+            return [
+                x
+                for x in range(n)
+                if dist[near_row + x] != UNREACHABLE
+                and dist[near_row + x] + old_time == dist[far_row + x]
+            ]
+
+        # only pairs on opposite sides of the edge can have used it, and
+        # only those where it was tight; all are found before any changes
+        behind1, behind2 = behind(node1, node2), behind(node2, node1)
+        stale = {}
+        for sources, targets, near, far in (
+            (behind1, behind2, node1, node2),
+            (behind2, behind1, node2, node1),
+        ):
+            far_row = far * n
+            for i in sources:
+                row = i * n
+                via = dist[row + near] + old_time
+                columns = [
+                    j
+                    for j in targets
+                    if j != i and via + dist[far_row + j] == dist[row + j]
+                ]
+                if columns:
+                    stale.setdefault(i, []).extend(columns)
+
+        for i, columns in stale.items():
+            self._repair_row(i, columns)
+        self.rows_repaired += len(stale)
+
+    def _repair_row(self, i: int, columns: list[int]):
+        """
+        recompute the entries of row `i` in `columns`, which may only have
+        got longer, by a dijkstra seeded from the entries that are still
+        exact
+        """
+        n = len(self.node_ids)
+        dist, next_edge = self.dist, self.next_edge
+        csr, node_ids, index = self.graph.csr, self.node_ids, self.index
+        offsets, neighbours = csr.offsets, csr.neighbours
+        weights, edge_ids = csr.weights, csr.edge_ids
+        row = i * n
+
+        stale = bytearray(n)
+        for j in columns:
+            stale[j] = 1
+            dist[row + j] = UNREACHABLE
+            next_edge[row + j] = -1
+
+        heap = []
+        for j in set(columns):
+            node = node_ids[j]
+            for slot in range(offsets[node], offsets[node + 1]):
+                k = index[neighbours[slot]]
+                if stale[k] or dist[row + k] == UNREACHABLE:
+                    continue
+                new_dist = dist[row + k] + weights[slot]
+                if new_dist < dist[row + j]:
+                    dist[row + j] = new_dist
+                    next_edge[row + j] = (
+                        edge_ids[slot] if k == i else next_edge[row + k]
+                    )
+            if dist[row + j] != UNREACHABLE:
+                heap.append((dist[row + j], j))
+        heapq.heapify(heap)
+
+        while heap:
+            dist_to_k, k = heapq.heappop(heap)
+            if not stale[k] or dist_to_k > dist[row + k]:
+                continue
+            stale[k] = 0
+            node = node_ids[k]
+            for slot in range(offsets[node], offsets[node + 1]):
+                j = index[neighbours[slot]]
+                new_dist = dist_to_k + weights[slot]
+                if stale[j] and new_dist < dist[row + j]:
+                    dist[row + j] = new_dist
+                    next_edge[row + j] = next_edge[row + k]
+                    heapq.heappush(heap, (new_dist, j))
+
+    def distance(self, start: int, end: int) -> int:
+        n = len(self.node_ids)
+        dist = self.dist[self.index[start] * n + self.index[end]]
+        return INFINITY if dist == UNREACHABLE else dist
+
+    def edge_route(self, start: int, end: int) -> list:
+        n = len(self.node_ids)
+        end_index = self.index[end]
+        edge_route = []
+
+        node = start
+        while node != end:
+            edge_id = self.next_edge[self.index[node] * n + end_index]
+            if edge_id == -1:
+                return []  # unreachable
+            edge = self.graph.edges[edge_id]
+            edge_route.append(edge)
+            node = edge.node2 if edge.node1 == node else edge.node1
+        return edge_route
+
+    def path(self, start: int, end: int) -> list[int]:
+        route = [start]
+        for edge in self.edge_route(start, end):
+            route.append(edge.node2 if edge.node1 == route[-1] else edge.node1)
+        return route
+
+
+class PrecomputedPathFinder(iPathFinder):
+    """answers `find_path` from a `DistanceMatrix` without searching"""
+
+    def __init__(self, graph: Graph, distance_matrix: DistanceMatrix):
+        super().__init__(graph, use_csr=True)
+        self.distance_matrix = distance_matrix
+        distance_matrix.watch()
+
+    def _search(self, start: int, end: int, frontier=None):
+        self.start = start
+        self.end = end
+        self.nodes_visited = []
+
+        self.edge_route = self.distance_matrix.edge_route(start, end)
+        route = self.distance_matrix.path(start, end)
+        self.path = list(map(lambda node: str(node), route))
+        self.total_time = self.distance_matrix.distance(start, end)
+        self.found_end = self.total_time != INFINITY
+        return self.path
+
+    def distances(
+        self, sources: list[int], targets: list[int], with_paths=False
+    ):
+        self.nodes_visited = []
+        distance, edge_route = (
+            self.distance_matrix.distance,
+            self.distance_matrix.edge_route,
+        )
+        matrix = [[distance(s, t) for t in targets] for s in sources]
+        if not with_paths:
+            return matrix
+        return matrix, [[edge_route(s, t) for t in targets] for s in sources]
+
+    def get_total_weight(self) -> int:
+        return self.total_time
+
+    def _get_priority(self, adjacent_node, node):
+        return 0
+
+    def _get_heuristic(self, adjacent_node, node):
+        return 0
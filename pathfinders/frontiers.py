@@ -0,0 +1,220 @@
+from abc import ABC, abstractmethod
+import heapq
+
+
+class iFrontier(ABC):
+    """
+    priority queue of (priority, node) pairs used by the pathfinders
+
+    the interface mirrors the `put`/`get`/`empty` calls the pathfinders
+    made on `queue.PriorityQueue`, without its locking; putting a node
+    that is already queued replaces its priority when the new one is lower
+    """
+
+    @abstractmethod
+    def put(self, item: tuple):
+        pass
+
+    @abstractmethod
+    def get(self) -> tuple:
+        pass
+
+    @abstractmethod
+    def empty(self) -> bool:
+        pass
+
+    @abstractmethod
+    def peek(self) -> tuple:
+        """the (priority, node) pair `get` would return, left in place"""
+        pass
+
+    def __len__(self):
+        return len(self._best)
+
+
+class BinaryHeapFrontier(iFrontier):
+    """heapq binary heap; superseded entries are skipped lazily on `get`"""
+
+    def __init__(self):
+        self._heap = []
+        self._best = {}
+
+    def put(self, item: tuple):
+        priority, node = item
+        if node in self._best and self._best[node] <= priority:
+            return
+        self._best[node] = priority
+        heapq.heappush(self._heap, item)
+
+    def get(self) -> tuple:
+        self._discard_stale()
+        priority, node = heapq.heappop(self._heap)
+        del self._best[node]
+        return priority, node
+
+    def empty(self) -> bool:
+        self._discard_stale()
+        return not self._heap
+
+    def peek(self) -> tuple:
+        self._discard_stale()
+        return self._heap[0]
+
+    def _discard_stale(self):
+        heap, best = self._heap, self._best
+        while heap and best.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+
+class DaryHeapFrontier(iFrontier):
+    """indexed d-ary heap with an in-place decrease-key"""
+
+    def __init__(self, d: int = 4):
+        self.d = d
+        self._heap = []  # (priority, node) entries
+        self._best = {}  # node -> index of its entry in the heap
+
+    def put(self, item: tuple):
+        node = item[1]
+        index = self._best.get(node)
+
+        if index is None:
+            self._heap.append(item)
+            self._sift_up(len(self._heap) - 1)
+        elif item < self._heap[index]:
+            self._heap[index] = item  # decrease-key
+            self._sift_up(index)
+
+    def get(self) -> tuple:
+        heap = self._heap
+        top = heap[0]
+        last = heap.pop()
+        del self._best[top[1]]
+
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return top
+
+    def empty(self) -> bool:
+        return not self._heap
+
+    def peek(self) -> tuple:
+        return self._heap[0]
+
+    def _sift_up(self, index: int):
+        heap, best, d = self._heap, self._best, self.d
+        item = heap[index]
+
+        while index > 0:
+            parent = (index - 1) // d
+            if not item < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            best[heap[index][1]] = index
+            index = parent
+
+        heap[index] = item
+        best[item[1]] = index
+
+    def _sift_down(self, index: int):
+        heap, best, d = self._heap, self._best, self.d
+        size = len(heap)
+        item = heap[index]
+
+        while True:
+            first_child = index * d + 1
+            if first_child >= size:
+                break
+
+            # find the smallest of up to d children
+            smallest = first_child
+            for child in range(first_child + 1, min(first_child + d, size)):
+                if heap[child] < heap[smallest]:
+                    smallest = child
+
+            if not heap[smallest] < item:
+                break
+            heap[index] = heap[smallest]
+            best[heap[index][1]] = index
+            index = smallest
+
+        heap[index] = item
+        best[item[1]] = index
+
+
+class BucketFrontier(iFrontier):
+    """
+    bucket queue (Dial's algorithm) for small non-negative integer
+    priorities that never drop below the last priority returned, such as
+    Dijkstra over the integer `time` weights
+    """
+
+    def __init__(self):
+        self._buckets = []
+        self._cursor = 0
+        self._best = {}
+
+    def put(self, item: tuple):
+        priority, node = item
+        if not isinstance(priority, int):
+            raise TypeError(
+                f"{type(self).__name__} needs integer priorities, "
+                f"got {priority!r}"
+            )
+        if priority < self._cursor:
+            raise ValueError(
+                f"priority {priority} is below the current minimum "
+                f"{self._cursor}; use a heap frontier for this search"
+            )
+        if node in self._best and self._best[node] <= priority:
+            return
+
+        self._best[node] = priority
+        while len(self._buckets) <= priority:
+            self._buckets.append([])
+        self._buckets[priority].append(node)
+
+    def get(self) -> tuple:
+        if self.empty():
+            raise IndexError("get from an empty frontier")
+        node = self._buckets[self._cursor].pop()
+        del self._best[node]
+        return self._cursor, node
+
+    def peek(self) -> tuple:
+        if self.empty():
+            raise IndexError("peek at an empty frontier")
+        return self._cursor, self._buckets[self._cursor][-1]
+
+    def empty(self) -> bool:
+        # advance past empty buckets and entries superseded by a lower put
+        buckets, best = self._buckets, self._best
+        while self._cursor < len(buckets):
+            bucket = buckets[self._cursor]
+            while bucket and best.get(bucket[-1]) != self._cursor:
+                bucket.pop()
+            if bucket:
+                return False
+            self._cursor += 1
+        return True
+
+
+FRONTIERS = {
+    "binary": BinaryHeapFrontier,
+    "dary": DaryHeapFrontier,
+    "bucket": BucketFrontier,
+}
+
+
+def make_frontier(frontier="binary"):
+    """build a frontier from a name in `FRONTIERS` or a factory"""
+    if isinstance(frontier, str):
+        try:
+            frontier = FRONTIERS[frontier]
+        except KeyError:
+            raise ValueError(
+                f"unknown frontier {frontier!r}; "
+                f"expected one of {', '.join(FRONTIERS)}"
+            ) from None
+    return frontier()
@@ -0,0 +1,210 @@
+"""
+k shortest loopless routes with Yen's algorithm
+
+every route after the first leaves an earlier one at some station, the
+spur, with the stations before it and the connections the earlier
+routes took out of it blocked. the spur searches share one shortest
+path tree grown from the destination: its distances are an exact lower
+bound for A*, and as soon as a search reaches a station whose tree path
+avoids everything blocked, that tree path completes the route
+"""
+import heapq
+import sys
+
+from graph.graph import Graph
+from .pathfinders import DijkstrasAlgorithm
+
+INFINITY = sys.maxsize
+
+
+class KShortestPaths(DijkstrasAlgorithm):
+    """
+    up to `k` loopless routes in order of travel time, in `routes` as
+    (total_time, edge_route) pairs; `path`, `edge_route` and `total_time`
+    describe the fastest, as for the other pathfinders
+
+    routes differ in the stations they pass through: taking another line
+    between the same two stations is not an alternative route. the
+    network is undirected, so the tree grown from the destination gives
+    the time from every station to it; the trees of the last `max_trees`
+    destinations are kept, and repaired when the graph is edited
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        k: int = 3,
+        print_solution: bool = False,
+        max_trees: int = 16,
+    ):
+        super().__init__(
+            graph, print_solution, use_csr=True, max_trees=max_trees
+        )
+        self.k = k
+        self.routes = []
+        self.spurs = 0
+        self.spur_searches = 0  # spurs not answered by the tree alone
+
+    def find_path(self, start: int, end: int, frontier=None):
+        # only the fastest route would fit in a `RouteCache`
+        return self._search(start, end, frontier)
+
+    def _search(self, start: int, end: int, frontier=None):
+        self.start = start
+        self.end = end
+        self.routes = self.k_shortest(start, end, self.k)
+        self.found_end = bool(self.routes)
+        if self.found_end:
+            self.total_time, self.edge_route = self.routes[0]
+        else:
+            self.total_time, self.edge_route = INFINITY, []
+
+        route = [start]
+        for edge in self.edge_route:
+            route.append(edge.node2 if edge.node1 == route[-1] else edge.node1)
+        self.path = list(map(str, route)) if self.found_end else []
+        if self.print_solution and len(self.edge_route) > 1:
+            self._print_solution(route, self.edge_route)
+        return self.path
+
+    def k_shortest(self, start: int, end: int, k: int) -> list[tuple]:
+        """(total_time, edge_route) of up to `k` routes, fastest first"""
+        self.nodes_visited = []
+        self.spurs = self.spur_searches = 0
+        if k < 1:
+            return []
+        if start == end:
+            return [(0, [])]
+
+        tree = self._tree(end)
+        if tree.dist[start] == INFINITY:
+            return []
+
+        # a route is (time, stations, edge ids)
+        nodes, edge_ids = self._tree_path(tree, start)
+        accepted = [(tree.dist[start], nodes, edge_ids)]
+        candidates = []
+        seen = {tuple(nodes)}
+
+        while len(accepted) < k:
+            _, nodes, edge_ids = accepted[-1]
+            for i in range(len(nodes) - 1):
+                root = nodes[: i + 1]
+                # the connections taken out of the spur by earlier routes
+                # that share its root
+                taken = {
+                    route[1][i + 1]
+                    for route in accepted
+                    if route[1][: i + 1] == root
+                }
+                spur = self._spur(tree, root, taken)
+                self.spurs += 1
+                if spur is None:
+                    continue
+                spur_nodes, spur_edge_ids = spur
+                route_nodes = root[:-1] + spur_nodes
+                if tuple(route_nodes) in seen:
+                    continue
+                seen.add(tuple(route_nodes))
+                route_edge_ids = edge_ids[:i] + spur_edge_ids
+                time = sum(
+                    self.edges[edge_id].time for edge_id in route_edge_ids
+                )
+                heapq.heappush(candidates, (time, route_nodes, route_edge_ids))
+
+            if not candidates:
+                break
+            accepted.append(heapq.heappop(candidates))
+
+        return [
+            (time, [self.edges[edge_id] for edge_id in edge_ids])
+            for time, _, edge_ids in accepted
+        ]
+
+    def _tree_path(self, tree, node: int) -> tuple[list, list]:
+        """stations and edge ids from `node` to the tree's root"""
+        nodes, edge_ids = [node], []
+        while tree.parent_edge[node] != -1:
+            edge_ids.append(tree.parent_edge[node])
+            node = tree.parent[node]
+            nodes.append(node)
+        return nodes, edge_ids
+
+    def _spur(self, tree, root: list[int], taken: set):
+        """
+        fastest route from the last station of `root` to the destination
+        that avoids the other stations of `root` and leaves it to none of
+        `taken`, as (stations, edge ids), or None if there is none
+        """
+        spur = root[-1]
+        blocked = set(root)
+        dist_to_end = tree.dist
+        parent = tree.parent
+
+        # whether the tree path from a station avoids every blocked one;
+        # walks stop at the first station already known
+        clear = {tree.source: True}
+
+        def is_clear(node: int) -> bool:
+            walk = []
+            while node not in clear:
+                if node in blocked:
+                    clear[node] = False
+                    break
+                walk.append(node)
+                node = parent[node]
+            for walked in walk:
+                clear[walked] = clear[node]
+            return clear[node]
+
+        first = parent[spur]
+        if first not in taken and first not in blocked and is_clear(first):
+            return self._tree_path(tree, spur)
+
+        self.spur_searches += 1
+        csr = self.csr
+        offsets, neighbours = csr.offsets, csr.neighbours
+        weights, edge_ids = csr.weights, csr.edge_ids
+        dist = {spur: 0}
+        came_from = {}  # station -> (previous station, edge id)
+        heap = [(dist_to_end[spur], 0, spur)]
+        done = set()
+
+        while heap:
+            _, dist_to_node, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            self.nodes_visited.append(node)
+            if node != spur and is_clear(node):
+                # the tree finishes the route exactly, and no route still
+                # on the heap can beat it
+                nodes, route_edge_ids = self._tree_path(tree, node)
+                while node != spur:
+                    node, edge_id = came_from[node]
+                    nodes.insert(0, node)
+                    route_edge_ids.insert(0, edge_id)
+                return nodes, route_edge_ids
+
+            for slot in range(offsets[node], offsets[node + 1]):
+                adjacent_node = neighbours[slot]
+                if adjacent_node in blocked or adjacent_node in done:
+                    continue
+                if node == spur and adjacent_node in taken:
+                    continue
+                if dist_to_end[adjacent_node] == INFINITY:
+                    continue
+                new_dist = dist_to_node + weights[slot]
+                if new_dist < dist.get(adjacent_node, INFINITY):
+                    dist[adjacent_node] = new_dist
+                    came_from[adjacent_node] = (node, edge_ids[slot])
+                    heapq.heappush(
+                        heap,
+                        (
+                            new_dist + dist_to_end[adjacent_node],
+                            new_dist,
+                            adjacent_node,
+                        ),
+                    )
+        return None
+
@@ -0,0 +1,143 @@
+from array import array
+from graph.graph import Graph
+from graph.persistence import read_arrays, source_digest, write_arrays
+from .sssp import INFINITY, shortest_path_tree
+
+MAGIC = b"PFALT001"
+UNREACHABLE = 2**31 - 1  # int32 sentinel stored in the file
+
+
+class LandmarkTable:
+    """
+    travel times between a few landmark stations and every node, for the
+    ALT (A*, landmarks, triangle inequality) heuristic
+
+    the network is undirected, so the times to and from each landmark are
+    the same and one row per landmark covers both; `dist[i * size + n]`
+    is the time between landmark i and node id n
+
+    once `watch` is called, the rows are kept exact as the graph is
+    edited: a faster connection would otherwise let the bound overshoot
+    the real travel time
+    """
+
+    def __init__(self, landmarks, dist):
+        self.landmarks = landmarks
+        self.dist = dist
+        self.size = len(dist) // len(landmarks) if len(landmarks) else 0
+        self.graph = None
+        self._trees = None  # one per landmark, grown on the first edit
+
+    @classmethod
+    def build(cls, graph: Graph, num_landmarks: int = 8) -> "LandmarkTable":
+        """
+        pick landmarks by farthest selection: each new landmark is the
+        node farthest from all landmarks picked so far, which spreads
+        them around the edge of the network
+        """
+        csr = graph.csr
+        size = csr.num_nodes
+        num_landmarks = min(num_landmarks, len(graph.nodes))
+        landmarks = array("i")
+        dist = array("i")
+
+        # the first landmark is the node farthest from an arbitrary one
+        tree = shortest_path_tree(csr, min(graph.nodes))
+        closest = [INFINITY] * size
+        candidate = max(graph.nodes, key=lambda node: _finite(tree.dist[node]))
+
+        while len(landmarks) < num_landmarks:
+            landmarks.append(candidate)
+            tree = shortest_path_tree(csr, candidate)
+            dist.extend(
+                UNREACHABLE if d == INFINITY else d for d in tree.dist
+            )
+            for node in graph.nodes:
+                closest[node] = min(closest[node], _finite(tree.dist[node]))
+            candidate = max(graph.nodes, key=lambda node: closest[node])
+
+        return cls(landmarks, dist)
+
+    @classmethod
+    def load(cls, path: str, source_files: list[str]):
+        """memory-map a saved table, or return None if it is stale"""
+        arrays = read_arrays(path, MAGIC, source_digest(source_files))
+        if arrays is None:
+            return None
+        return cls(arrays["landmarks"], arrays["dist"])
+
+    @classmethod
+    def load_or_build(
+        cls,
+        graph: Graph,
+        path: str,
+        source_files: list[str],
+        num_landmarks: int = 8,
+    ) -> "LandmarkTable":
+        table = cls.load(path, source_files)
+        if table is None or len(table.landmarks) != num_landmarks:
+            table = cls.build(graph, num_landmarks)
+            table.save(path, source_files)
+        return table
+
+    def save(self, path: str, source_files: list[str]):
+        write_arrays(
+            path,
+            MAGIC,
+            source_digest(source_files),
+            {
+                "landmarks": array("i", self.landmarks),
+                "dist": array("i", self.dist),
+            },
+        )
+
+    def watch(self, graph: Graph):
+        """repair the table whenever `graph` is edited"""
+        if self.graph is None:
+            self.graph = graph
+            graph.subscribe(self.repair)
+
+    def repair(self, edge_id: int, old_time, new_time):
+        """
+        apply a change of the time of edge `edge_id`, where None means the
+        edge is closed, by repairing a shortest path tree per landmark
+        """
+        edge = self.graph.edges[edge_id]
+        if self._trees is None:
+            # grown from the graph as edited, so nothing to repair yet
+            csr = self.graph.csr
+            self._trees = [
+                shortest_path_tree(csr, landmark)
+                for landmark in self.landmarks
+            ]
+        else:
+            for tree in self._trees:
+                tree.repair(
+                    edge.node1, edge.node2, edge_id, old_time, new_time
+                )
+
+        dist, size = self.dist, self.size
+        for row, tree in zip(range(0, len(dist), size), self._trees):
+            for node, d in enumerate(tree.dist[:size]):
+                dist[row + node] = UNREACHABLE if d == INFINITY else d
+
+    def heuristic(self, node: int, target: int) -> int:
+        """
+        lower bound on the travel time from `node` to `target`: by the
+        triangle inequality |d(L, target) - d(L, node)| for any landmark L
+        """
+        dist, size = self.dist, self.size
+        best = 0
+        for row in range(0, len(dist), size):
+            to_node, to_target = dist[row + node], dist[row + target]
+            if to_node == UNREACHABLE or to_target == UNREACHABLE:
+                continue
+            bound = abs(to_target - to_node)
+            if bound > best:
+                best = bound
+        return best
+
+
+def _finite(dist: int) -> int:
+    # unreachable nodes never make useful landmarks
+    return -1 if dist == INFINITY else dist
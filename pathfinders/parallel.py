@@ -0,0 +1,120 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+from graph.graph import Graph
+from graph.snapshot import SnapshotGraphBuilder
+from .registry import LONDON_DATASET, make_path_finder
+
+# per-process state, set once by `_init_worker`
+_path_finder = None
+
+
+def _init_worker(dataset_files: tuple, algorithm: str):
+    global _path_finder
+    graph_builder = SnapshotGraphBuilder(*dataset_files)
+    graph = Graph(*graph_builder.build_components())
+    _path_finder = make_path_finder(
+        algorithm, graph, dataset_files=dataset_files
+    )
+
+
+def _find_paths(pairs: list[tuple]) -> list[dict]:
+    results = []
+    for start, end in pairs:
+        _path_finder.find_path(start, end)
+        results.append(
+            {
+                "start": start,
+                "end": end,
+                "total_time": _path_finder.total_time,
+                "path": list(map(int, _path_finder.path)),
+                "edge_ids": [edge.index for edge in _path_finder.edge_route],
+            }
+        )
+    return results
+
+
+def _distances(sources: list[int], targets: list[int]) -> list[list[int]]:
+    return _path_finder.distances(sources, targets)
+
+
+class ParallelQueryExecutor:
+    """
+    process pool that loads the graph once per worker and shards query
+    batches across them, returning results in submission order
+
+    each result of `find_paths` is a dict with the query's `start`, `end`,
+    `total_time`, `path` (node ids) and `edge_ids` (indexes into
+    `graph.edges`)
+    """
+
+    def __init__(
+        self,
+        dataset_files: tuple = LONDON_DATASET,
+        algorithm: str = "dijkstra",
+        workers: int = None,
+        chunksize: int = 256,
+    ):
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(dataset_files, algorithm),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def find_paths(self, pairs) -> list[dict]:
+        return list(self.iter_paths(pairs))
+
+    def submit_paths(self, pairs: list[tuple]):
+        """
+        queue one chunk of pairs on the pool, returning a
+        `concurrent.futures.Future` of its results
+        """
+        return self.pool.submit(_find_paths, pairs)
+
+    def iter_paths(self, pairs):
+        """
+        yield results for an iterable of (start, end) pairs, keeping only
+        a couple of chunks per worker in flight so inputs of any size can
+        be streamed through
+        """
+        pairs = iter(pairs)
+        in_flight = deque()
+        max_in_flight = 2 * self.workers
+
+        while True:
+            while len(in_flight) < max_in_flight:
+                chunk = list(islice(pairs, self.chunksize))
+                if not chunk:
+                    break
+                in_flight.append(self.pool.submit(_find_paths, chunk))
+            if not in_flight:
+                return
+            yield from in_flight.popleft().result()
+
+    def distances(
+        self, sources: list[int], targets: list[int]
+    ) -> list[list[int]]:
+        """travel time matrix, with the source rows split over workers"""
+        rows_per_chunk = max(1, len(sources) // (4 * self.workers))
+        chunks = [
+            sources[i : i + rows_per_chunk]
+            for i in range(0, len(sources), rows_per_chunk)
+        ]
+        matrix = []
+        for rows in self.pool.map(
+            _distances, chunks, [targets] * len(chunks)
+        ):
+            matrix += rows
+        return matrix
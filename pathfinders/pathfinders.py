@@ -1,8 +1,11 @@
 from graph.graph import Graph
 from abc import ABC, abstractmethod
+from array import array
 from collections import deque
 from graph.graph import Edge
-import queue as Q
+from .frontiers import make_frontier
+from .sssp import ShortestPathTree
+from collections import OrderedDict
 import sys
 
 
@@ -11,34 +14,169 @@ class iPathFinder(ABC):
         self,
         graph: Graph,
         print_solution: bool = False,
+        use_csr: bool = False,
+        frontier="binary",
+        cache=None,
     ):
+        self.graph = graph
         self.nodes = graph.nodes
-        self.adj = graph.adj
-        self.pq = Q.PriorityQueue()
-        self.edge_to = [""] * (len(self.nodes) + 2)
+        self.edges = graph.edges
+        # only the adjacency the search will read is built
+        self.adj = None if use_csr else graph.adj
+        self.csr = graph.csr if use_csr else None
+        self.frontier = frontier
+        self.pq = make_frontier(frontier)
+        self.edge_to = self._empty_edge_to()
         self.dist_to = [sys.maxsize] * (len(self.nodes) + 2)
 
         self.found_end = False
         self.print_solution = print_solution
 
-    def find_path(self, start: int, end: int):
+        # optional `RouteCache`, possibly shared with other pathfinders
+        self.cache = cache
+        if cache is not None:
+            cache.watch(graph)
+
+    def find_path(self, start: int, end: int, frontier=None):
+        if self.cache is None:
+            return self._search(start, end, frontier)
+
+        key = self._cache_key(start, end)
+        cached = self.cache.get(key)
+        if cached is not None:
+            path, edge_route, total_time, extra = cached
+            self.start = start
+            self.end = end
+            self.path = list(path)
+            self.edge_route = list(edge_route)
+            self.total_time = total_time
+            self.found_end = total_time != sys.maxsize
+            self.nodes_visited = []
+            self._restore_cached(extra)
+            return self.path
+
+        self._search(start, end, frontier)
+        self.cache.put(
+            key,
+            (
+                tuple(self.path),
+                tuple(self.edge_route),
+                self.total_time,
+                self._cached_extra(),
+            ),
+        )
+        return self.path
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        # instances of one class can be set up differently, and settings
+        # that change which of several equally fast routes is found, or
+        # how fast it is, are part of the key
+        return (
+            type(self).__name__,
+            start,
+            end,
+            self.graph.version,
+            self.frontier,
+            self.csr is not None,
+        )
+
+    def _cached_extra(self) -> tuple:
+        """results beyond the route and its time to keep in the cache"""
+        return ()
+
+    def _restore_cached(self, extra: tuple):
+        """set the results saved by `_cached_extra` on a cache hit"""
+
+    def _search(self, start: int, end: int, frontier=None):
         self.path = []
-        self.edge_to = [""] * (len(self.nodes) + 2)
+        self.edge_to = self._empty_edge_to()
         self.dist_to = [sys.maxsize] * (len(self.nodes) + 2)
         self.end = end
         self.start = start
+        self.found_end = False
+
+        # every query gets a fresh frontier, optionally overriding the
+        # one chosen for this pathfinder
+        self.pq = make_frontier(frontier or self.frontier)
         self.dist_to[start] = 0
         self.pq.put((0, start))
         self.nodes_visited = []
 
         return self._find_path()
 
+    def distances(
+        self, sources: list[int], targets: list[int], with_paths=False
+    ):
+        """
+        shortest travel times from each of `sources` to each of `targets`,
+        as a matrix with one row per source
+
+        runs one dijkstra per distinct source, which stops as soon as all
+        targets are settled; with `with_paths` the edge routes are returned
+        too, as a second matrix of `Edge` lists
+        """
+        self.nodes_visited = []
+        trees = {}
+        for source in sources:
+            if source not in trees:
+                trees[source] = self._tree(source, targets)
+
+        matrix = [
+            [trees[source].dist[target] for target in targets]
+            for source in sources
+        ]
+        if not with_paths:
+            return matrix
+
+        paths = [
+            [
+                [
+                    self.edges[edge_id]
+                    for edge_id in trees[source].edge_ids_to(target)
+                ]
+                for target in targets
+            ]
+            for source in sources
+        ]
+        return matrix, paths
+
+    def reachable(self, source: int, max_time: int) -> dict[int, int]:
+        """travel time to every station within `max_time` of `source`"""
+        self.nodes_visited = []
+        tree = self._tree(source, max_dist=max_time)
+        return {
+            node: tree.dist[node]
+            for node in tree.order
+            if tree.dist[node] <= max_time
+        }
+
+    def _tree(
+        self, source: int, targets=None, max_dist: int = None
+    ) -> ShortestPathTree:
+        tree = ShortestPathTree.empty(self.graph.csr, source)
+        self.nodes_visited += tree.grow(targets, max_dist)
+        return tree
+
+    def _empty_edge_to(self):
+        # searches on the CSR arrays record the edge id into each node,
+        # and `Edge`s are only made for the route in `_format_solution`
+        if self.csr is not None:
+            return array("i", [-1]) * (len(self.nodes) + 2)
+        return [""] * (len(self.nodes) + 2)
+
+    def _edge_into(self, node: int):
+        edge = self.edge_to[node]
+        if isinstance(edge, int):
+            return "" if edge == -1 else self.edges[edge]
+        return edge
+
     def _find_path(self):
+        relax = self._relax_csr if self.csr is not None else self._relax
 
         while not (self.pq.empty()):
             _, node = self.pq.get()
             self.nodes_visited.append(node)
-            self._relax(node)
+            relax(node)
 
             if node == self.end:
                 self.found_end = True
@@ -69,6 +207,27 @@ class iPathFinder(ABC):
 
                 self.pq.put((priority, adjacent_node))
 
+    def _relax_csr(self, node: int):
+        # same relaxation as `_relax`, reading the contiguous CSR arrays
+        # instead of the Edge objects in `adj`
+        csr = self.csr
+        neighbours, weights = csr.neighbours, csr.weights
+        edge_ids, edge_to = csr.edge_ids, self.edge_to
+        dist_to = self.dist_to
+        dist_to_node = dist_to[node]
+
+        for slot in range(csr.offsets[node], csr.offsets[node + 1]):
+            adjacent_node = neighbours[slot]
+            new_dist = dist_to_node + weights[slot]
+
+            if dist_to[adjacent_node] > new_dist:
+                dist_to[adjacent_node] = new_dist
+                edge_to[adjacent_node] = edge_ids[slot]
+
+                priority = self._get_priority(adjacent_node, node)
+
+                self.pq.put((priority, adjacent_node))
+
     def _get_other_node(self, edge: Edge, this_node: int) -> int:
         if edge.node1 == this_node:
             return edge.node2
@@ -84,14 +243,14 @@ class iPathFinder(ABC):
 
     def _format_solution(self, print_solution: bool):
         route = [self.end]
-        edge = self.edge_to[self.end]
+        edge = self._edge_into(self.end)
         prev_node = self.end
         edge_route = []
 
         while edge != "":
             prev_node = self._get_other_node(edge, prev_node)
             edge_route.append(edge)
-            edge = self.edge_to[prev_node]
+            edge = self._edge_into(prev_node)
             route.append(prev_node)
 
         route.reverse()
@@ -101,30 +260,122 @@ class iPathFinder(ABC):
         self.total_time = self.dist_to[self.end]
 
         if print_solution:
-            print(
-                f"Start: \t\t Station {self.start}\nDestination: \t Station {self.end}\n"  # noqa
-            )
-            print("Route: " + " -> ".join(self.path))
-            print("Take ", end="")
-            station_from = route[0]
-            for i in range(1, len(route) - 1):
-                if edge_route[i].line != edge_route[i - 1].line:
-                    station_to = route[i]
-                    conn = edge_route[i - 1]
-                    print(
-                        f"line {conn.line} from Station {station_from} \
-                            to Station {station_to},"
-                    )
-                    station_from = station_to
-            if edge_route[-2] != edge_route[-1]:
+            self._print_solution(route, edge_route)
+
+    def _print_solution(self, route: list[int], edge_route: list[Edge]):
+        print(
+            f"Start: \t\t Station {self.start}\nDestination: \t Station {self.end}\n"  # noqa
+        )
+        print("Route: " + " -> ".join(self.path))
+        print("Take ", end="")
+        station_from = route[0]
+        for i in range(1, len(route) - 1):
+            if edge_route[i].line != edge_route[i - 1].line:
+                station_to = route[i]
+                conn = edge_route[i - 1]
                 print(
-                    f"line {edge_route[-1].line} from Station {station_from} \
-                        to Station {route[-1]}.\n"
+                    f"line {conn.line} from Station {station_from} \
+                        to Station {station_to},"
                 )
-            print(f"Total trip time: {self.total_time}")
+                station_from = station_to
+        if edge_route[-2] != edge_route[-1]:
+            print(
+                f"line {edge_route[-1].line} from Station {station_from} \
+                    to Station {route[-1]}.\n"
+            )
+        print(f"Total trip time: {self.total_time}")
 
 
 class DijkstrasAlgorithm(iPathFinder):
+    def __init__(
+        self,
+        graph: Graph,
+        print_solution: bool = False,
+        use_csr: bool = False,
+        frontier="binary",
+        cache=None,
+        max_trees: int = 0,
+    ):
+        """
+        with `max_trees`, the shortest path trees of that many recent
+        sources are kept: a later query from the same source walks the
+        saved tree, resuming its paused search only if the destination
+        has not been settled yet; the saved trees are repaired in place
+        when the graph is edited
+        """
+        super().__init__(graph, print_solution, use_csr, frontier, cache)
+        self.max_trees = max_trees
+        self.trees = OrderedDict()
+        if max_trees:
+            graph.subscribe(self._repair_trees)
+
+    def _search(self, start: int, end: int, frontier=None):
+        if not self.max_trees:
+            return super()._search(start, end, frontier)
+
+        self.start = start
+        self.end = end
+        self.nodes_visited = []
+        tree = self._tree(start, [end])
+        self.dist_to = tree.dist
+        self.found_end = tree.dist[end] != sys.maxsize
+
+        # only the tree path is needed by `_format_solution`
+        self.edge_to = {start: "", end: ""}
+        node = end
+        while tree.parent_edge[node] != -1:
+            self.edge_to[node] = self.edges[tree.parent_edge[node]]
+            node = tree.parent[node]
+
+        self._format_solution(self.print_solution)
+        return self.path
+
+    def _tree(
+        self, source: int, targets=None, max_dist: int = None
+    ) -> ShortestPathTree:
+        if not self.max_trees:
+            return super()._tree(source, targets, max_dist)
+
+        tree = self.trees.get(source)
+        if tree is None:
+            # `max_trees` may have been lowered since the last query
+            while len(self.trees) >= self.max_trees:
+                self.trees.popitem(last=False)
+            tree = ShortestPathTree.empty(self.graph.csr, source)
+            self.trees[source] = tree
+        else:
+            self.trees.move_to_end(source)
+
+        self.nodes_visited += tree.grow(targets, max_dist)
+        return tree
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        # routes read off kept trees do not depend on how many are kept
+        return (*super()._cache_key(start, end), bool(self.max_trees))
+
+    def _repair_trees(self, edge_id: int, old_time, new_time):
+        edge = self.edges[edge_id]
+        for tree in self.trees.values():
+            tree.repair(edge.node1, edge.node2, edge_id, old_time, new_time)
+
+    def _relax_csr(self, node: int):
+        # `_relax_csr` with the priority inlined: it is the distance
+        csr = self.csr
+        neighbours, weights = csr.neighbours, csr.weights
+        edge_ids, edge_to = csr.edge_ids, self.edge_to
+        dist_to = self.dist_to
+        dist_to_node = dist_to[node]
+        put = self.pq.put
+
+        for slot in range(csr.offsets[node], csr.offsets[node + 1]):
+            adjacent_node = neighbours[slot]
+            new_dist = dist_to_node + weights[slot]
+
+            if dist_to[adjacent_node] > new_dist:
+                dist_to[adjacent_node] = new_dist
+                edge_to[adjacent_node] = edge_ids[slot]
+                put((new_dist, adjacent_node))
+
     def _get_priority(self, adjacent_node: int, node: int) -> float:
         return self.dist_to[adjacent_node]
 
@@ -138,21 +389,51 @@ class DijkstrasAlgorithm(iPathFinder):
         return self.edges_relaxed_before_end
 
     def get_total_weight(self) -> int:
-        return self.dist_to[self.end]
+        return self.total_time
 
 
 class AStarAlgorithm(iPathFinder):
+    def __init__(
+        self,
+        graph: Graph,
+        print_solution: bool = False,
+        use_csr: bool = False,
+        frontier="binary",
+        landmarks=None,
+        cache=None,
+    ):
+        """
+        `landmarks` is a `LandmarkTable`; with one the heuristic is the
+        ALT travel-time bound, otherwise the euclidean distance between
+        station coordinates
+        """
+        super().__init__(graph, print_solution, use_csr, frontier, cache)
+        self.landmarks = landmarks
+        if landmarks is not None:
+            # closures and delays are applied to the table as they happen
+            landmarks.watch(graph)
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        landmarks = self.landmarks
+        return (
+            *super()._cache_key(start, end),
+            None if landmarks is None else tuple(landmarks.landmarks),
+        )
+
     def _find_path(self):
         self.end_node = self.nodes[self.end]
         return super()._find_path()
 
     def _get_priority(self, adjacent_node: int, node: int) -> float:
         return (
-            self._get_heuristic(self.nodes[node], self.end_node)
+            self._get_heuristic(self.nodes[adjacent_node], self.end_node)
             + self.dist_to[adjacent_node]
         )
 
     def _get_heuristic(self, start_node: int, end_node: int) -> float:
+        if self.landmarks is not None:
+            return self.landmarks.heuristic(start_node.id, end_node.id)
+
         node1x, node1y = start_node.latitude, start_node.longitude
         node2x, node2y = end_node.latitude, end_node.longitude
         heuristic = (
@@ -176,6 +457,10 @@ class BFSAlgorithm(iPathFinder):
             if node == self.end:  # found destination node
                 break
 
+            if self.csr is not None:
+                self._visit_neighbours_csr(node)
+                continue
+
             # check all neighbours of node
             for edge in self.adj[node]:
                 neighbour = self._get_other_node(edge, node)
@@ -191,6 +476,21 @@ class BFSAlgorithm(iPathFinder):
         super()._format_solution(False)
         return self.path
 
+    def _visit_neighbours_csr(self, node: int):
+        csr = self.csr
+        visited = self.visited
+
+        for slot in range(csr.offsets[node], csr.offsets[node + 1]):
+            neighbour = csr.neighbours[slot]
+
+            if not visited[neighbour]:
+                self.q.append(neighbour)
+                visited[neighbour] = True
+                self.edge_to[neighbour] = csr.edge_ids[slot]
+                self.dist_to[neighbour] = (
+                    self.dist_to[node] + csr.weights[slot]
+                )
+
     def _get_heuristic(self, adjacent_node, node):
         return 0
 
@@ -0,0 +1,108 @@
+from graph.builder import (
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+    LONDON_HIERARCHY_FILE,
+    LONDON_LANDMARKS_FILE,
+)
+from graph.graph import Graph
+from .cache import RouteCache
+from .bidirectional import BidirectionalDijkstra, BidirectionalAStar
+from .contraction import ContractionHierarchy, ContractionHierarchyPathFinder
+from .kshortest import KShortestPaths
+from .landmarks import LandmarkTable
+from .timetable import TimetablePathFinder
+from .transfers import TransferPathFinder
+from .pathfinders import (
+    DijkstrasAlgorithm,
+    AStarAlgorithm,
+    BFSAlgorithm,
+    iPathFinder,
+)
+
+LONDON_DATASET = (
+    LONDON_STATIONS_FILE,
+    LONDON_CONNECTIONS_FILE,
+    LONDON_LINES_FILE,
+)
+# indexes of the London dataset are saved under fixed names; those of
+# other datasets are saved next to their stations file
+LONDON_INDEX_FILES = {
+    "hierarchy": LONDON_HIERARCHY_FILE,
+    "landmarks": LONDON_LANDMARKS_FILE,
+}
+
+
+def index_file(dataset_files: tuple, kind: str) -> str:
+    """where the `kind` index of the graph read from `dataset_files` goes"""
+    if tuple(dataset_files) == LONDON_DATASET:
+        return LONDON_INDEX_FILES[kind]
+    base = dataset_files[0]
+    for suffix in (".gz", ".csv", ".stations"):
+        base = base.removesuffix(suffix)
+    return f"{base}.{kind}.bin"
+
+
+def _hierarchy(graph: Graph, files: tuple) -> ContractionHierarchy:
+    # without the dataset files there is nothing to key a saved index by
+    if files is None:
+        return ContractionHierarchy.build(graph)
+    return ContractionHierarchy.load_or_build(
+        graph, index_file(files, "hierarchy"), list(files[:2])
+    )
+
+
+def _landmarks(graph: Graph, files: tuple) -> LandmarkTable:
+    if files is None:
+        return LandmarkTable.build(graph)
+    return LandmarkTable.load_or_build(
+        graph, index_file(files, "landmarks"), list(files[:2])
+    )
+
+
+# pathfinders by the names used outside the GUI, each made from the graph
+# and the files it was read from, set up to run on the CSR adjacency with
+# whatever index it needs; saved indexes are loaded, or built and saved,
+# when the files are known
+PATH_FINDERS = {
+    "dijkstra": lambda graph, files: DijkstrasAlgorithm(
+        graph, use_csr=True, max_trees=64
+    ),
+    "astar": lambda graph, files: AStarAlgorithm(
+        graph, use_csr=True, landmarks=_landmarks(graph, files)
+    ),
+    "bfs": lambda graph, files: BFSAlgorithm(graph, use_csr=True),
+    "bidirectional-dijkstra": lambda graph, files: BidirectionalDijkstra(
+        graph
+    ),
+    "bidirectional-astar": lambda graph, files: BidirectionalAStar(
+        graph, landmarks=_landmarks(graph, files)
+    ),
+    "ch": lambda graph, files: ContractionHierarchyPathFinder(
+        graph, _hierarchy(graph, files)
+    ),
+    "kshortest": lambda graph, files: KShortestPaths(graph),
+    "timetable": lambda graph, files: TimetablePathFinder(graph),
+    "transfers": lambda graph, files: TransferPathFinder(graph),
+}
+
+
+def make_path_finder(
+    name: str,
+    graph: Graph,
+    cache: RouteCache = None,
+    dataset_files: tuple = None,
+) -> iPathFinder:
+    # a KeyError raised while building the pathfinder is not a bad name
+    factory = PATH_FINDERS.get(name)
+    if factory is None:
+        raise ValueError(
+            f"unknown algorithm {name!r}; "
+            f"expected one of {', '.join(PATH_FINDERS)}"
+        )
+    path_finder = factory(graph, dataset_files)
+
+    if cache is not None:
+        path_finder.cache = cache
+        cache.watch(graph)
+    return path_finder
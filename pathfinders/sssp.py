@@ -0,0 +1,280 @@
+from graph.csr import CSRAdjacency
+import heapq
+import sys
+
+INFINITY = sys.maxsize
+
+
+class ShortestPathTree:
+    """
+    single-source shortest path tree over a CSR adjacency
+
+    `parent[n]` and `parent_edge[n]` are the previous node and the id of
+    the edge (into `graph.edges`) used to reach `n`, or -1 for the source
+    and unreached nodes; `order` lists the settled nodes in the order they
+    were settled
+
+    a tree can be partial: its search pauses once the requested targets
+    are settled, and `grow` resumes it from the saved heap
+    """
+
+    def __init__(
+        self,
+        source: int,
+        dist: list[int],
+        parent: list[int],
+        parent_edge: list[int],
+        order: list[int],
+        csr: CSRAdjacency = None,
+        heap: list[tuple] = None,
+    ):
+        self.source = source
+        self.dist = dist
+        self.parent = parent
+        self.parent_edge = parent_edge
+        self.order = order
+        self.csr = csr
+        self.heap = heap or []
+        self.settled = [False] * len(dist)
+        for node in order:
+            self.settled[node] = True
+
+    @classmethod
+    def empty(cls, csr: CSRAdjacency, source: int) -> "ShortestPathTree":
+        num_nodes = csr.num_nodes
+        dist = [INFINITY] * num_nodes
+        dist[source] = 0
+        return cls(
+            source,
+            dist,
+            [-1] * num_nodes,
+            [-1] * num_nodes,
+            [],
+            csr,
+            [(0, source)],
+        )
+
+    @property
+    def complete(self) -> bool:
+        return not self.heap
+
+    def grow(self, targets=None, max_dist: int = None) -> list[int]:
+        """
+        resume the search until every node in `targets` is settled, or
+        until the tree is complete when no targets are given; with
+        `max_dist` it also pauses before settling any node further away
+        than that. returns the nodes settled by this call
+        """
+        offsets = self.csr.offsets
+        neighbours, weights = self.csr.neighbours, self.csr.weights
+        edge_ids = self.csr.edge_ids
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        settled, heap = self.settled, self.heap
+
+        start = len(self.order)
+        remaining = None
+        if targets is not None:
+            remaining = {node for node in targets if not settled[node]}
+            if not remaining:
+                return []
+
+        while heap:
+            if max_dist is not None and heap[0][0] > max_dist:
+                break
+            dist_to_node, node = heapq.heappop(heap)
+            if settled[node]:
+                continue
+            settled[node] = True
+            self.order.append(node)
+
+            for slot in range(offsets[node], offsets[node + 1]):
+                adjacent_node = neighbours[slot]
+                new_dist = dist_to_node + weights[slot]
+                if new_dist < dist[adjacent_node]:
+                    dist[adjacent_node] = new_dist
+                    parent[adjacent_node] = node
+                    parent_edge[adjacent_node] = edge_ids[slot]
+                    heapq.heappush(heap, (new_dist, adjacent_node))
+
+            # neighbours are relaxed before pausing so the saved heap
+            # holds the whole frontier
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+
+        return self.order[start:]
+
+    def repair(
+        self, node1: int, node2: int, edge_id: int, old_weight, new_weight
+    ) -> int:
+        """
+        bring the tree up to date after the CSR weight of edge `edge_id`
+        between `node1` and `node2` changed from `old_weight` to
+        `new_weight`, where None means the edge is closed; only nodes
+        whose distance can change are touched, and their number is
+        returned
+        """
+        if new_weight is not None and (
+            old_weight is None or new_weight < old_weight
+        ):
+            return self._decrease(node1, node2, edge_id, new_weight)
+        if old_weight is not None and (
+            new_weight is None or new_weight > old_weight
+        ):
+            return self._increase(node1, node2, edge_id)
+        return 0
+
+    def _decrease(
+        self, node1: int, node2: int, edge_id: int, weight: int
+    ) -> int:
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        settled = self.settled
+        for node, other_node in ((node1, node2), (node2, node1)):
+            if settled[node] and dist[node] + weight < dist[other_node]:
+                break
+        else:
+            return 0
+
+        new_dist = dist[node] + weight
+        if not self.complete:
+            if new_dist < max(dist[node] for node in self.order):
+                # settled nodes of a paused search may now be reached
+                # through unsettled ones, so start it over
+                self._restart()
+                return len(dist)
+            # otherwise only a frontier node gets a better tentative
+            # distance
+            dist[other_node] = new_dist
+            parent[other_node] = node
+            parent_edge[other_node] = edge_id
+            heapq.heappush(self.heap, (new_dist, other_node))
+            return 1
+
+        # only the nodes that get closer are relaxed, in dijkstra order
+        offsets = self.csr.offsets
+        neighbours, weights = self.csr.neighbours, self.csr.weights
+        edge_ids = self.csr.edge_ids
+        dist[other_node] = new_dist
+        parent[other_node] = node
+        parent_edge[other_node] = edge_id
+        heap = [(new_dist, other_node)]
+        improved = []
+        while heap:
+            dist_to_node, node = heapq.heappop(heap)
+            if dist_to_node > dist[node]:
+                continue
+            improved.append(node)
+            for slot in range(offsets[node], offsets[node + 1]):
+                adjacent_node = neighbours[slot]
+                new_dist = dist_to_node + weights[slot]
+                if new_dist < dist[adjacent_node]:
+                    dist[adjacent_node] = new_dist
+                    parent[adjacent_node] = node
+                    parent_edge[adjacent_node] = edge_ids[slot]
+                    heapq.heappush(heap, (new_dist, adjacent_node))
+
+        # keep parents ahead of their children in `order`
+        moved = bytearray(len(dist))
+        for node in improved:
+            moved[node] = 1
+            settled[node] = True
+        self.order[:] = [node for node in self.order if not moved[node]]
+        self.order += improved
+        return len(improved)
+
+    def _increase(self, node1: int, node2: int, edge_id: int) -> int:
+        dist, parent, parent_edge = self.dist, self.parent, self.parent_edge
+        settled = self.settled
+        if parent_edge[node1] == edge_id:
+            root = node1
+        elif parent_edge[node2] == edge_id:
+            root = node2
+        else:
+            return 0  # not a tree edge, so no distance depended on it
+
+        # the subtree hanging from the edge, tentative nodes included
+        affected = bytearray(len(dist))
+        affected[root] = 1
+        for node in self.order:
+            if parent[node] != -1 and affected[parent[node]]:
+                affected[node] = 1
+        subtree = [
+            node
+            for node in range(len(dist))
+            if affected[node]
+            or (parent[node] != -1 and affected[parent[node]])
+        ]
+        for node in subtree:
+            affected[node] = 1
+            dist[node] = INFINITY
+            parent[node] = parent_edge[node] = -1
+            settled[node] = False
+        was_complete = self.complete
+        self.order[:] = [node for node in self.order if not affected[node]]
+        heap = [entry for entry in self.heap if not affected[entry[1]]]
+
+        # reseed the subtree from the settled nodes around it
+        offsets = self.csr.offsets
+        neighbours, weights = self.csr.neighbours, self.csr.weights
+        edge_ids = self.csr.edge_ids
+        for node in subtree:
+            for slot in range(offsets[node], offsets[node + 1]):
+                adjacent_node = neighbours[slot]
+                if not settled[adjacent_node]:
+                    continue
+                new_dist = dist[adjacent_node] + weights[slot]
+                if new_dist < dist[node]:
+                    dist[node] = new_dist
+                    parent[node] = adjacent_node
+                    parent_edge[node] = edge_ids[slot]
+            if dist[node] != INFINITY:
+                heap.append((dist[node], node))
+        heapq.heapify(heap)
+        self.heap = heap
+
+        if was_complete:
+            self.grow()
+        return len(subtree)
+
+    def _restart(self):
+        self.dist[:] = [INFINITY] * len(self.dist)
+        self.dist[self.source] = 0
+        self.parent[:] = [-1] * len(self.dist)
+        self.parent_edge[:] = [-1] * len(self.dist)
+        self.settled[:] = [False] * len(self.dist)
+        self.order.clear()
+        self.heap = [(0, self.source)]
+
+    def edge_ids_to(self, target: int) -> list[int]:
+        """ids of the edges on the tree path from the source to `target`"""
+        edge_ids = []
+        node = target
+        while self.parent_edge[node] != -1:
+            edge_ids.append(self.parent_edge[node])
+            node = self.parent[node]
+        edge_ids.reverse()
+        return edge_ids
+
+    def first_edges(self) -> list[int]:
+        """for every node, the id of the first edge on its path, or -1"""
+        first_edge = [-1] * len(self.dist)
+        for node in self.order:
+            parent = self.parent[node]
+            if parent == self.source:
+                first_edge[node] = self.parent_edge[node]
+            elif parent != -1:
+                first_edge[node] = first_edge[parent]
+        return first_edge
+
+
+def shortest_path_tree(
+    csr: CSRAdjacency, source: int, targets=None
+) -> ShortestPathTree:
+    """
+    run dijkstra from `source`, stopping early once every node in
+    `targets` is settled when it is given
+    """
+    tree = ShortestPathTree.empty(csr, source)
+    tree.grow(targets)
+    return tree
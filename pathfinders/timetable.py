@@ -0,0 +1,343 @@
+"""
+time-dependent routing over a timetable of individual train runs, with
+earliest-arrival queries answered by the Connection Scan Algorithm
+
+a timetable is either read from a GTFS feed or generated from the graph
+by running trains along every line at a headway that depends on the time
+of day
+"""
+from array import array
+from bisect import bisect_left
+import math
+import sys
+
+from graph.graph import Graph
+from graph.gtfs import GTFSGraphBuilder, read_trips
+from .pathfinders import iPathFinder
+
+UNREACHABLE = 2**31 - 1
+FIRST_TRAIN = 5 * 3600
+LAST_TRAIN = 24 * 3600 + 30 * 60
+
+
+def default_headway(line: int, seconds: int) -> int:
+    """seconds between trains: frequent in the peaks, sparse late at night"""
+    hour = seconds // 3600 % 24
+    if 7 <= hour < 10 or 16 <= hour < 19:
+        return 180
+    if 6 <= hour < 22:
+        return 300
+    return 600
+
+
+def format_time(seconds: int) -> str:
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+def parse_time(value) -> int:
+    """seconds after midnight from HH:MM[:SS], or a number of seconds"""
+    if isinstance(value, int):
+        return value
+    parts = list(map(int, str(value).split(":")))
+    if len(parts) == 1:
+        return parts[0]
+    hours, minutes, seconds = (parts + [0])[:3]
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class Timetable:
+    """
+    elementary connections (one train running between two consecutive
+    stops) as parallel arrays sorted by departure time; `edge[i]` is the
+    id of the graph edge the connection runs on, or -1
+    """
+
+    def __init__(
+        self,
+        dep_stop: array,
+        arr_stop: array,
+        dep_time: array,
+        arr_time: array,
+        trip: array,
+        edge: array,
+        num_stops: int,
+    ):
+        self.dep_stop = dep_stop
+        self.arr_stop = arr_stop
+        self.dep_time = dep_time
+        self.arr_time = arr_time
+        self.trip = trip
+        self.edge = edge
+        self.num_stops = num_stops
+        self.num_trips = max(trip, default=-1) + 1
+
+    def __len__(self) -> int:
+        return len(self.dep_time)
+
+    @classmethod
+    def from_connections(cls, connections: list[tuple], num_stops: int):
+        """
+        `connections` are (dep_time, arr_time, dep_stop, arr_stop, trip,
+        edge) tuples in any order
+        """
+        connections.sort()
+        columns = [array("i") for _ in range(6)]
+        for connection in connections:
+            for column, value in zip(columns, connection):
+                column.append(value)
+        dep_time, arr_time, dep_stop, arr_stop, trip, edge = columns
+        return cls(
+            dep_stop, arr_stop, dep_time, arr_time, trip, edge, num_stops
+        )
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: Graph,
+        headway=default_headway,
+        first: int = FIRST_TRAIN,
+        last: int = LAST_TRAIN,
+    ) -> "Timetable":
+        """
+        split every line into chains of consecutive stations and run
+        trains both ways along each chain from `first` to `last` seconds
+        after midnight, `headway(line, seconds)` apart, taking each
+        connection's travel time in minutes
+        """
+        connections = []
+        num_trips = 0
+        for line, chain in graph.line_chains():
+            for nodes, edge_ids in (chain, _reversed(chain)):
+                departure = first
+                while departure <= last:
+                    time = departure
+                    for i, edge_id in enumerate(edge_ids):
+                        arrival = time + graph.edges[edge_id].time * 60
+                        connections.append(
+                            (
+                                time,
+                                arrival,
+                                nodes[i],
+                                nodes[i + 1],
+                                num_trips,
+                                edge_id,
+                            )
+                        )
+                        time = arrival
+                    num_trips += 1
+                    departure += headway(line, departure)
+
+        return cls.from_connections(connections, graph.csr.num_nodes)
+
+    @classmethod
+    def from_gtfs(cls, builder: GTFSGraphBuilder, graph: Graph) -> "Timetable":
+        """
+        read every trip of the feed `builder` built `graph` from, matching
+        each hop to the graph edge between the same stations on its line
+        """
+        edge_of = {}
+        for edge in graph.edges:
+            key = (min(edge.node1, edge.node2), max(edge.node1, edge.node2))
+            edge_of.setdefault((*key, edge.line), edge.index)
+
+        connections = []
+        trips = read_trips(builder.path("stop_times.txt"), builder.stop_ids)
+        for trip, (trip_id, stop_times) in enumerate(trips):
+            line = builder.trip_lines.get(trip_id, 0)
+            for (_, node1, _, departure), (_, node2, arrival, _) in zip(
+                stop_times, stop_times[1:]
+            ):
+                if node1 == node2:
+                    continue
+                key = (min(node1, node2), max(node1, node2), line)
+                connections.append(
+                    (
+                        departure,
+                        arrival,
+                        node1,
+                        node2,
+                        trip,
+                        edge_of.get(key, -1),
+                    )
+                )
+
+        return cls.from_connections(connections, graph.csr.num_nodes)
+
+    def earliest_arrival(
+        self,
+        source: int,
+        departure: int,
+        target: int = None,
+        transfer_time: int = 0,
+    ) -> "Journeys":
+        """
+        scan the connections departing from `departure` onwards once,
+        stopping as soon as none can improve the arrival at `target`;
+        changing trains takes `transfer_time` seconds
+        """
+        dep_stop, arr_stop = self.dep_stop, self.arr_stop
+        dep_time, arr_time, trip = self.dep_time, self.arr_time, self.trip
+
+        arrival = [UNREACHABLE] * self.num_stops
+        ready = [UNREACHABLE] * self.num_stops  # earliest boarding time
+        in_connection = [-1] * self.num_stops
+        boarded_at = [-1] * self.num_trips
+        arrival[source] = ready[source] = departure
+
+        scanned = 0
+        for i in range(bisect_left(dep_time, departure), len(dep_time)):
+            if target is not None and dep_time[i] >= arrival[target]:
+                break
+            scanned += 1
+
+            this_trip = trip[i]
+            if boarded_at[this_trip] == -1:
+                if ready[dep_stop[i]] > dep_time[i]:
+                    continue
+                boarded_at[this_trip] = i
+
+            stop = arr_stop[i]
+            if arr_time[i] < arrival[stop]:
+                arrival[stop] = arr_time[i]
+                ready[stop] = arr_time[i] + transfer_time
+                in_connection[stop] = i
+
+        return Journeys(
+            self,
+            source,
+            departure,
+            arrival,
+            in_connection,
+            boarded_at,
+            scanned,
+        )
+
+
+class Journeys:
+    """earliest arrival times from one scan, and the journeys to them"""
+
+    def __init__(
+        self,
+        timetable: Timetable,
+        source: int,
+        departure: int,
+        arrival: list[int],
+        in_connection: list[int],
+        boarded_at: list[int],
+        scanned: int,
+    ):
+        self.timetable = timetable
+        self.source = source
+        self.departure = departure
+        self.arrival = arrival
+        self.in_connection = in_connection
+        self.boarded_at = boarded_at
+        self.scanned = scanned
+
+    def legs(self, target: int) -> list[tuple]:
+        """
+        (trip, first connection, last connection) for every train ridden
+        on the way to `target`, in travel order
+        """
+        timetable = self.timetable
+        legs = []
+        stop = target
+        while stop != self.source and self.in_connection[stop] != -1:
+            last = self.in_connection[stop]
+            first = self.boarded_at[timetable.trip[last]]
+            legs.append((timetable.trip[last], first, last))
+            stop = timetable.dep_stop[first]
+        legs.reverse()
+        return legs
+
+    def connections(self, target: int) -> list[int]:
+        """indexes of every connection on the journey to `target`"""
+        timetable = self.timetable
+        connections = []
+        for trip, first, last in self.legs(target):
+            # later connections of the same trip come after `first`
+            stop = timetable.dep_stop[first]
+            for i in range(first, last + 1):
+                if timetable.trip[i] == trip and timetable.dep_stop[i] == stop:
+                    connections.append(i)
+                    stop = timetable.arr_stop[i]
+        return connections
+
+
+class TimetablePathFinder(iPathFinder):
+    """
+    earliest-arrival routing for a departure time, in seconds after
+    midnight; `total_time` is the whole trip in minutes, waiting included
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        timetable: Timetable = None,
+        departure: int = 8 * 3600,
+        transfer_time: int = 0,
+        print_solution: bool = False,
+    ):
+        super().__init__(graph, print_solution, use_csr=True)
+        self.timetable = timetable or Timetable.from_graph(graph)
+        self.departure = departure
+        self.transfer_time = transfer_time
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        # the answer depends on when the trip starts
+        return (
+            *super()._cache_key(start, end),
+            self.departure,
+            self.transfer_time,
+        )
+
+    def _cached_extra(self) -> tuple:
+        return (self.arrival_time,)
+
+    def _restore_cached(self, extra: tuple):
+        (self.arrival_time,) = extra
+        # the scan itself is not kept, so there are no journeys to read
+        self.journeys = None
+
+    def _search(self, start: int, end: int, frontier=None):
+        self.start = start
+        self.end = end
+        self.nodes_visited = []
+        self.journeys = self.timetable.earliest_arrival(
+            start, self.departure, end, self.transfer_time
+        )
+        self.arrival_time = self.journeys.arrival[end]
+        self.found_end = self.arrival_time != UNREACHABLE
+
+        self.total_time = sys.maxsize
+        if self.found_end:
+            self.total_time = math.ceil(
+                (self.arrival_time - self.departure) / 60
+            )
+
+        # a journey may pass a station twice, e.g. to double back for a
+        # faster train, so the route is read off the connections rather
+        # than walked back through `edge_to`
+        route = [start]
+        self.edge_route = []
+        for i in self.journeys.connections(end) if self.found_end else []:
+            route.append(self.timetable.arr_stop[i])
+            edge_id = self.timetable.edge[i]
+            if edge_id != -1:
+                self.edge_route.append(self.edges[edge_id])
+        self.path = list(map(str, route))
+
+        if self.print_solution and len(self.edge_route) == len(route) - 1:
+            self._print_solution(route, self.edge_route)
+        return self.path
+
+    def _get_priority(self, adjacent_node, node):
+        return 0
+
+    def _get_heuristic(self, adjacent_node, node):
+        return 0
+
+
+def _reversed(chain: tuple) -> tuple:
+    nodes, edge_ids = chain
+    return nodes[::-1], edge_ids[::-1]
@@ -0,0 +1,268 @@
+"""
+transfer-aware routing on the expanded (station, line) state space
+
+riding on along a line costs the connection time, while leaving a
+station on another line than the one arrived on also costs a transfer;
+the states are implicit in the CSR adjacency, so only one id per distinct
+(station, line) pair is stored
+"""
+from array import array
+import heapq
+import sys
+
+from graph.csr import CSRAdjacency
+from graph.graph import Graph
+from .pathfinders import iPathFinder
+
+INFINITY = sys.maxsize
+
+
+class LineStates:
+    """
+    numbering of the (station, line) states: `first[n]` is the first
+    state of node n, whose states cover its distinct incident lines, and
+    `arrival_state[slot]` is the state reached by riding CSR slot `slot`
+    """
+
+    def __init__(self, csr: CSRAdjacency):
+        self.csr = csr
+        self.first = array("i", [0]) * (csr.num_nodes + 1)
+        self.state_node = array("i")
+        self.state_line = array("i")
+
+        for node in range(csr.num_nodes):
+            self.first[node] = len(self.state_node)
+            lines = sorted({csr.lines[slot] for slot in csr.slots(node)})
+            self.state_node.extend([node] * len(lines))
+            self.state_line.extend(lines)
+        self.first[csr.num_nodes] = len(self.state_node)
+
+        self.arrival_state = array("i", [0]) * len(csr.neighbours)
+        for slot, (node, line) in enumerate(zip(csr.neighbours, csr.lines)):
+            self.arrival_state[slot] = self.state_of(node, line)
+
+    def __len__(self) -> int:
+        return len(self.state_node)
+
+    def state_of(self, node: int, line: int) -> int:
+        for state in range(self.first[node], self.first[node + 1]):
+            if self.state_line[state] == line:
+                return state
+        raise KeyError((node, line))
+
+
+class TransferPathFinder(iPathFinder):
+    """
+    least-cost routes where every change of line adds `transfer_penalty`
+    minutes to the cost; `total_time` stays the travel time alone, with
+    the number of changes in `transfers` and the search cost in `cost`
+
+    `pareto_routes` instead returns every route that is not beaten on
+    both travel time and number of changes
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        transfer_penalty: int = 5,
+        print_solution: bool = False,
+        cache=None,
+    ):
+        super().__init__(graph, print_solution, use_csr=True, cache=cache)
+        self.transfer_penalty = transfer_penalty
+        self._states = None
+        self._states_version = None
+
+    @property
+    def states(self) -> LineStates:
+        # the CSR slots change when edges are closed or reopened
+        if self._states_version != self.graph.version:
+            self._states = LineStates(self.graph.csr)
+            self._states_version = self.graph.version
+        return self._states
+
+    def _cache_key(self, start: int, end: int) -> tuple:
+        return (*super()._cache_key(start, end), self.transfer_penalty)
+
+    def _cached_extra(self) -> tuple:
+        return (self.transfers, self.cost)
+
+    def _restore_cached(self, extra: tuple):
+        self.transfers, self.cost = extra
+
+    def _search(self, start: int, end: int, frontier=None):
+        self.start = start
+        self.end = end
+        self.nodes_visited = []
+        self.found_end = start == end
+        self.transfers = 0
+        self.cost = self.total_time = 0 if start == end else INFINITY
+
+        states, csr = self.states, self.csr
+        offsets, weights, lines = csr.offsets, csr.weights, csr.lines
+        arrival_state, state_node = states.arrival_state, states.state_node
+        state_line = states.state_line
+        penalty = self.transfer_penalty
+
+        cost = [INFINITY] * len(states)
+        time = [0] * len(states)
+        parent_state = [-1] * len(states)
+        parent_slot = [-1] * len(states)
+        settled = bytearray(len(states))
+
+        # boarding the first train is free
+        heap = []
+        for slot in range(offsets[start], offsets[start + 1]):
+            state = arrival_state[slot]
+            if weights[slot] < cost[state]:
+                cost[state] = time[state] = weights[slot]
+                parent_slot[state] = slot
+                heapq.heappush(heap, (weights[slot], state))
+
+        goal = -1
+        while heap and not self.found_end:
+            state_cost, state = heapq.heappop(heap)
+            if settled[state]:
+                continue
+            settled[state] = 1
+            node = state_node[state]
+            self.nodes_visited.append(node)
+            if node == end:
+                goal = state
+                self.found_end = True
+                break
+
+            line = state_line[state]
+            for slot in range(offsets[node], offsets[node + 1]):
+                next_cost = state_cost + weights[slot]
+                if lines[slot] != line:
+                    next_cost += penalty
+                next_state = arrival_state[slot]
+                if next_cost < cost[next_state]:
+                    cost[next_state] = next_cost
+                    time[next_state] = time[state] + weights[slot]
+                    parent_state[next_state] = state
+                    parent_slot[next_state] = slot
+                    heapq.heappush(heap, (next_cost, next_state))
+
+        slots = []
+        state = goal
+        while state != -1:
+            slots.append(parent_slot[state])
+            state = parent_state[state]
+        slots.reverse()
+        self._set_route(start, slots)
+        if goal != -1:
+            self.cost = cost[goal]
+            self.total_time = time[goal]
+        if self.print_solution and len(self.edge_route) > 1:
+            self._print_solution(list(map(int, self.path)), self.edge_route)
+        return self.path
+
+    def pareto_routes(
+        self, start: int, end: int, max_transfers: int = 5
+    ) -> list[tuple]:
+        """
+        every (total_time, transfers, edge_route) that no other route
+        beats on both criteria, fewest transfers first, found with a
+        multi-criteria label-setting search
+
+        labels live in flat arrays; a label is pruned as soon as its
+        state, or the destination, already holds one that is no worse on
+        both time and transfers, which is a scan of at most
+        `max_transfers` + 1 best times per state
+        """
+        self.nodes_visited = []
+        if start == end:
+            return [(0, 0, [])]
+
+        states, csr = self.states, self.csr
+        offsets, weights, lines = csr.offsets, csr.weights, csr.lines
+        arrival_state, state_node = states.arrival_state, states.state_node
+        state_line = states.state_line
+        width = max_transfers + 1
+
+        # best[state * width + k]: fastest label at a state with k changes
+        best = array("q", [INFINITY]) * (len(states) * width)
+        target_best = [INFINITY] * width
+        label_state = array("i")
+        label_parent = array("i")
+        label_slot = array("i")
+        heap = []
+
+        def dominated(times, base: int, arrival: int, transfers: int):
+            for k in range(transfers + 1):
+                if times[base + k] <= arrival:
+                    return True
+            return False
+
+        def push(arrival: int, transfers: int, slot: int, parent: int):
+            state = arrival_state[slot]
+            if dominated(target_best, 0, arrival, transfers) or dominated(
+                best, state * width, arrival, transfers
+            ):
+                return
+            best[state * width + transfers] = arrival
+            label_state.append(state)
+            label_parent.append(parent)
+            label_slot.append(slot)
+            heapq.heappush(heap, (arrival, transfers, len(label_state) - 1))
+
+        for slot in range(offsets[start], offsets[start + 1]):
+            push(weights[slot], 0, slot, -1)
+
+        goals = {}
+        while heap:
+            arrival, transfers, label = heapq.heappop(heap)
+            state = label_state[label]
+            # labels pushed after this one may dominate it by now
+            if (
+                best[state * width + transfers] < arrival
+                or dominated(best, state * width, arrival, transfers - 1)
+                or dominated(target_best, 0, arrival, transfers)
+            ):
+                continue
+            node = state_node[state]
+            self.nodes_visited.append(node)
+            if node == end:
+                if not dominated(target_best, 0, arrival, transfers):
+                    target_best[transfers] = arrival
+                    goals[transfers] = (arrival, label)
+                continue
+
+            line = state_line[state]
+            for slot in range(offsets[node], offsets[node + 1]):
+                next_transfers = transfers + (lines[slot] != line)
+                if next_transfers < width:
+                    push(arrival + weights[slot], next_transfers, slot, label)
+
+        self.labels_created = len(label_state)
+        # labels reach the destination in order of time and then changes,
+        # so every one accepted there is undominated
+        routes = []
+        for transfers, (arrival, label) in sorted(goals.items()):
+            slots = []
+            while label != -1:
+                slots.append(label_slot[label])
+                label = label_parent[label]
+            slots.reverse()
+            edge_route = [self.edges[csr.edge_ids[slot]] for slot in slots]
+            routes.append((arrival, transfers, edge_route))
+        return routes
+
+    def _set_route(self, start: int, slots: list[int]):
+        csr = self.csr
+        route = [start] + [csr.neighbours[slot] for slot in slots]
+        self.edge_route = [self.edges[csr.edge_ids[slot]] for slot in slots]
+        self.path = list(map(str, route))
+        self.transfers = sum(
+            1
+            for previous, edge in zip(self.edge_route, self.edge_route[1:])
+            if edge.line != previous.line
+        )
+
+    def _get_priority(self, adjacent_node, node):
+        return 0
+
+    def _get_heuristic(self, adjacent_node, node):
+        return 0
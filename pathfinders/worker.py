@@ -0,0 +1,111 @@
+"""
+searches and plans run off the calling thread, so that a GUI event loop
+never waits on them, with their progress streamed back through a queue
+"""
+from itertools import count
+import queue
+import threading
+
+# visited nodes are reported in chunks of this size
+VISITED_CHUNK = 256
+
+
+class Cancelled(Exception):
+    """raised by a search or plan that noticed it has been cancelled"""
+
+
+class SearchJob:
+    """one `find_path` call submitted to a `SearchWorker`"""
+
+    def __init__(
+        self, job_id: int, path_finder, args: tuple, cancellable: bool
+    ):
+        self.id = job_id
+        self.path_finder = path_finder
+        self.args = args
+        self.cancellable = cancellable
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled
+
+
+class SearchWorker:
+    """
+    runs one `path_finder.find_path(*args)` at a time on a daemon thread
+    and reports on it through `events`: ("visited", nodes) chunks in the
+    order the search visited them, then ("done", path_finder), or
+    ("failed", error) if the search raised
+
+    submitting a job cancels the one before it. cancellation is
+    cooperative: a cancellable job's `find_path` is also given the job's
+    `cancelled` event, which it checks to stop early by raising
+    `Cancelled`, and any other job stops at its next chunk of events;
+    `poll` only ever returns events of the current job
+    """
+
+    def __init__(self):
+        self.events = queue.SimpleQueue()
+        self.current = None
+        self._jobs = queue.SimpleQueue()
+        self._ids = count(1)
+        self._thread = threading.Thread(
+            target=self._run, name="search-worker", daemon=True
+        )
+        self._thread.start()
+
+    def submit(
+        self, path_finder, *args, cancellable: bool = False
+    ) -> SearchJob:
+        self.cancel()
+        job = SearchJob(next(self._ids), path_finder, args, cancellable)
+        self.current = job
+        self._jobs.put(job)
+        return job
+
+    def cancel(self):
+        """stop the current job, whose events are no longer reported"""
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def poll(self, max_events: int = 64) -> list[tuple]:
+        """(kind, payload) events of the current job, without blocking"""
+        events = []
+        while len(events) < max_events:
+            try:
+                job, kind, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if job is self.current:
+                events.append((kind, payload))
+        return events
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            try:
+                self._search(job)
+            except Cancelled:
+                pass
+            except Exception as error:
+                self.events.put((job, "failed", error))
+
+    def _search(self, job: SearchJob):
+        job.check()
+        if job.cancellable:
+            job.path_finder.find_path(*job.args, cancelled=job.cancelled)
+        else:
+            job.path_finder.find_path(*job.args)
+
+        nodes_visited = job.path_finder.nodes_visited
+        for i in range(0, len(nodes_visited), VISITED_CHUNK):
+            job.check()
+            chunk = nodes_visited[i : i + VISITED_CHUNK]
+            self.events.put((job, "visited", chunk))
+        job.check()
+        self.events.put((job, "done", job.path_finder))
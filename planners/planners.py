@@ -1,15 +1,67 @@
 from sys import maxsize
 from graph.graph import Graph
+from pathfinders.distance_matrix import DistanceMatrix
+from pathfinders.cache import RouteCache
+from pathfinders.parallel import ParallelQueryExecutor
 from pathfinders.pathfinders import DijkstrasAlgorithm
+from .tsp import (
+    approximate_tour,
+    check_cancelled,
+    held_karp,
+    one_tree_lower_bound,
+)
+
+# largest patrol set that "auto" mode still solves exactly; the exact
+# mode stops being quick here, as every station more roughly doubles its
+# time: 15 stations take a fraction of a second, 20 over ten seconds
+EXACT_LIMIT = 15
 
 
 class SubwayPatrolPlanning:
-    def __init__(self, graph: Graph):
+    def __init__(
+        self,
+        graph: Graph,
+        distance_matrix: DistanceMatrix = None,
+        mode: str = "auto",
+        time_budget: float = 1.0,
+        executor: ParallelQueryExecutor = None,
+        cache: RouteCache = None,
+    ):
+        """
+        `mode` is "exact" (Held-Karp), "approximate" (nearest neighbour
+        plus 2-opt/Or-opt, limited to `time_budget` seconds) or "auto",
+        which is exact up to EXACT_LIMIT stations; "exact" is meant for
+        no more than that either, past which it is much slower. with an
+        `executor` the cost matrix is computed across its worker
+        processes, and with a `cache` the legs of the tour are shared
+        with other plans
+        """
+        if mode not in ("auto", "exact", "approximate"):
+            raise ValueError(f"unknown planning mode {mode!r}")
         self.graph = graph
+        self.distance_matrix = distance_matrix
+        if distance_matrix is not None:
+            # closures and delays are applied to the matrix as they happen
+            distance_matrix.watch()
+        self.mode = mode
+        self.time_budget = time_budget
+        self.executor = executor
+        self.cache = cache
+        # the trees grown for the cost matrix are kept so the legs of the
+        # tour are read from them instead of searched again; they are
+        # repaired on edits, so later plans start from them too
+        self.dijkstras = DijkstrasAlgorithm(
+            graph, cache=cache, max_trees=EXACT_LIMIT
+        )
 
-    def find_path(self, list_of_nodes: list[int]):
+    def find_path(self, list_of_nodes: list[int], cancelled=None):
+        """
+        plan a tour of `list_of_nodes`; when run on another thread, setting
+        the `cancelled` event makes it raise `Cancelled` soon after
+        """
+        self.cancelled = cancelled
         self.list_of_nodes = list_of_nodes
-        self.dijkstras = DijkstrasAlgorithm(self.graph)
+        self.dijkstras.max_trees = max(1, len(set(list_of_nodes)))
         self.start = self.list_of_nodes[0]
         self.total_time = maxsize
         self.counter = 0
@@ -25,79 +77,69 @@ class SubwayPatrolPlanning:
 
     def _find_min_path(self):
         self.counter = 0
-        self.memo = {}
 
-        # start off the recurive function with the main_source and
-        # source being the start node
-        self.total_time, self.min_path = self._find_min_path_helper(
-            self.start, self.start, self.list_of_nodes, []
-        )
+        # each station is visited once, starting from the first one given
+        self.stations = list(dict.fromkeys(self.list_of_nodes))
 
-        # reverse the min path since it was appended in reverse order
-        self.min_path.reverse()
-        self.min_path.append(self.start)
-
-    def _find_min_path_helper(
-        self, main_source: int, source: int, nodes: list[int], path
-    ) -> int:
-        # if there is only one node in the list, then return distance
-        # back to the source and the min_path as just the node visited
-        if len(nodes) == 1:
-            min_weight = self._get_weight(source, nodes[0]) + self._get_weight(
-                main_source, nodes[0]
-            )
-            return min_weight, [nodes[0]]
+        # pairwise travel times between the stations to cover
+        weights = self._get_weights()
+        check_cancelled(self.cancelled)
 
-        # otherwise, recursively search through the nodes
+        # solve the tour exactly with the Held-Karp bitmask DP, or
+        # approximately when there are too many stations for it
+        self.exact = self.mode == "exact" or (
+            self.mode == "auto" and len(self.stations) <= EXACT_LIMIT
+        )
+        if self.exact:
+            self.total_time, order = held_karp(weights, self.cancelled)
         else:
-            min_weight = maxsize
-            min_path = []
-
-            # iterate through each node in the list
-            for node in nodes:
-
-                # make a copy of the nodes list, excluding the node visited
-                copy_of_nodes = nodes[:]
-                copy_of_nodes.remove(node)
-
-                # recursively call helper function with new list that
-                # excludes the node that we just visited
-                # this starts building up the shortest path starting with
-                # the smaller subsets and adding on new node weight each time
-                temp_weight, new_path = self._find_min_path_helper(
-                    main_source, node, copy_of_nodes, path
-                )
-                weight = self._get_weight(source, node) + temp_weight
-                new_path.append(node)
-
-                # return the min path and min weight computed
-                if weight < min_weight:
-                    min_path = new_path
-                    min_weight = weight
-            return min_weight, min_path
-
-    def _get_weight(self, node1: int, node2: int) -> int:
-        # search for the weight in memo and return it if found
-        if (node1, node2) in self.memo:
-            return self.memo[(node1, node2)]
-        elif (node2, node1) in self.memo:
-            return self.memo[(node2, node1)]
-
-        # if the weight was not in the memo, then compute shortest path by
-        # running dijkstras
-        self.counter += 1
-        self.dijkstras.find_path(node2, node1)
-        self.nodes_visited += self.dijkstras.nodes_visited
-        weight = self.dijkstras.get_total_weight()
+            self.total_time, order = approximate_tour(
+                weights, self.time_budget, self.cancelled
+            )
+        self.min_path = [self.stations[i] for i in order]
 
-        # add weight to memo
-        self.memo[(node1, node2)] = weight
-        return weight
+        # relative gap between the tour and a lower bound on the optimum
+        self.lower_bound = one_tree_lower_bound(
+            weights, self.total_time, cancelled=self.cancelled
+        )
+        self.gap = (
+            (self.total_time - self.lower_bound) / self.lower_bound
+            if self.lower_bound
+            else 0.0
+        )
+
+    def _get_weights(self) -> list[list[int]]:
+        # look the weights up in the precomputed matrix if there is one
+        if self.distance_matrix is not None:
+            return [
+                [
+                    self.distance_matrix.distance(node1, node2)
+                    for node2 in self.stations
+                ]
+                for node1 in self.stations
+            ]
+
+        if self.executor is not None:
+            return self.executor.distances(self.stations, self.stations)
+
+        # otherwise fill the whole matrix with one batched dijkstra per
+        # station, each stopping once every other station is settled
+        weights = self.dijkstras.distances(self.stations, self.stations)
+        self.counter += len(self.stations)
+        self.nodes_visited += self.dijkstras.nodes_visited
+        return weights
 
     def _get_total_min_path(self):
         # loop through each node in min_path to find
         # intermediate nodes in the path
         for i in range(1, len(self.min_path)):
+            check_cancelled(self.cancelled)
+            if self.distance_matrix is not None:
+                self._add_precomputed_path(
+                    self.min_path[i - 1], self.min_path[i]
+                )
+                continue
+
             self.dijkstras.find_path(
                 self.min_path[i - 1],
                 self.min_path[i],
@@ -106,6 +148,12 @@ class SubwayPatrolPlanning:
             self.path += self.dijkstras.path
             self.edge_route += self.dijkstras.edge_route
 
+    def _add_precomputed_path(self, node1: int, node2: int):
+        path = list(map(str, self.distance_matrix.path(node1, node2)))
+        self.total_path.append(path)
+        self.path += path
+        self.edge_route += self.distance_matrix.edge_route(node1, node2)
+
     def _print_solution(self):
         print(
             f"Most efficient way to cover subset of nodes \
@@ -120,3 +168,7 @@ class SubwayPatrolPlanning:
             print(f"\t- Trip {i+1}: ", end="")
             print(f"{' -> '.join(self.total_path[i])}")
         print(f"- Time: {self.total_time}")
+        print(
+            f"- Lower bound: {self.lower_bound} "
+            f"({self.gap:.1%} gap, {'exact' if self.exact else 'approximate'})"
+        )
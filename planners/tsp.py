@@ -0,0 +1,309 @@
+from array import array
+from operator import add
+import math
+import time
+
+from pathfinders.worker import Cancelled
+
+INFINITY = float("inf")
+
+
+def check_cancelled(cancelled):
+    """raise `Cancelled` once the `cancelled` event, if any, is set"""
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled
+
+
+def held_karp(
+    weights: list[list[int]], cancelled=None
+) -> tuple[float, list[int]]:
+    """
+    exact travelling salesman tour over a weight matrix, starting and
+    ending at index 0
+
+    uses the Held-Karp bitmask DP: `dp[mask * m + j]` is the cheapest way
+    to leave index 0, visit the subset `mask` of the other m indices and
+    stop at index j + 1. the table holds 4 byte floats, exact while tour
+    lengths stay under 2**24, and no parent pointers: the tour is rebuilt
+    by taking the same minimum again at each step on the way back. time
+    and memory roughly double with every index, to about 40 MB for 20
+
+    returns the tour length and the visiting order, e.g. [0, 2, 1, 3, 0];
+    the `cancelled` event is checked every few thousand subsets
+    """
+    n = len(weights)
+    if n == 1:
+        return 0, [0, 0]
+
+    m = n - 1
+    full = (1 << m) - 1
+    dp = array("f", [INFINITY]) * ((full + 1) * m)
+
+    # cost of each move k + 1 -> j + 1, grouped by destination j
+    columns = [
+        (j, 1 << j, [weights[k + 1][j + 1] for k in range(m)])
+        for j in range(m)
+    ]
+
+    for j in range(m):
+        dp[(1 << j) * m + j] = weights[0][j + 1]
+
+    for mask in range(3, full + 1):
+        if not mask & (mask - 1):
+            continue  # single node subsets were seeded above
+        if not mask & 0xFFF:
+            check_cancelled(cancelled)
+        base = mask * m
+
+        for j, bit, column in columns:
+            if mask & bit:
+                # entries of `dp` outside the previous subset are
+                # infinite, so they never win the minimum
+                prev_base = (mask ^ bit) * m
+                dp[base + j] = min(
+                    map(add, dp[prev_base : prev_base + m], column)
+                )
+
+    # close the tour back at index 0
+    base = full * m
+    last = min(range(m), key=lambda j: dp[base + j] + weights[j + 1][0])
+    total = dp[base + last] + weights[last + 1][0]
+
+    # walk back from the last node, taking the same minimum at each step
+    order = [0, last + 1]
+    mask = full
+    j = last
+    while mask & (mask - 1):
+        mask ^= 1 << j
+        prev_base = mask * m
+        column = columns[j][2]
+        j = min(range(m), key=lambda k: dp[prev_base + k] + column[k])
+        order.append(j + 1)
+    order.append(0)
+    order.reverse()
+
+    # integer weights give an integer tour
+    if total != INFINITY and total == int(total):
+        total = int(total)
+    return total, order
+
+
+def tour_length(tour: list[int], weights: list[list[int]]) -> int:
+    return sum(weights[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+
+
+def nearest_neighbour_tour(weights: list[list[int]]) -> list[int]:
+    """greedy tour from index 0, always moving to the closest unvisited"""
+    unvisited = set(range(1, len(weights)))
+    tour = [0]
+    while unvisited:
+        row = weights[tour[-1]]
+        closest = min(unvisited, key=lambda node: row[node])
+        unvisited.remove(closest)
+        tour.append(closest)
+    tour.append(0)
+    return tour
+
+
+def two_opt(
+    tour: list[int],
+    weights: list[list[int]],
+    deadline: float,
+    cancelled=None,
+):
+    """
+    reverse tour segments while that shortens the tour, keeping index 0
+    fixed at both ends; assumes symmetric weights
+    """
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, len(tour) - 2):
+            if time.perf_counter() >= deadline:
+                return tour
+            check_cancelled(cancelled)
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, len(tour) - 1):
+                c, d = tour[j], tour[j + 1]
+                delta = (
+                    weights[a][c]
+                    + weights[b][d]
+                    - weights[a][b]
+                    - weights[c][d]
+                )
+                if delta < 0:
+                    tour[i : j + 1] = reversed(tour[i : j + 1])
+                    b = tour[i]
+                    improved = True
+    return tour
+
+
+def or_opt(
+    tour: list[int],
+    weights: list[list[int]],
+    deadline: float,
+    cancelled=None,
+):
+    """
+    move runs of one to three consecutive stops to a cheaper position in
+    the tour, possibly reversed; assumes symmetric weights
+    """
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for length in (1, 2, 3):
+            for i in range(1, len(tour) - length):
+                if time.perf_counter() >= deadline:
+                    return tour
+                check_cancelled(cancelled)
+                segment = tour[i : i + length]
+                prev, nxt = tour[i - 1], tour[i + length]
+                first, last = segment[0], segment[-1]
+                removal_gain = (
+                    weights[prev][first]
+                    + weights[last][nxt]
+                    - weights[prev][nxt]
+                )
+
+                # cheapest place to reinsert the segment in the rest
+                rest = tour[:i] + tour[i + length :]
+                best_cost, best_k, best_reverse = removal_gain, None, False
+                for k in range(len(rest) - 1):
+                    p, q = rest[k], rest[k + 1]
+                    for reverse, (head, tail) in (
+                        (False, (first, last)),
+                        (True, (last, first)),
+                    ):
+                        cost = (
+                            weights[p][head]
+                            + weights[tail][q]
+                            - weights[p][q]
+                        )
+                        if cost < best_cost:
+                            best_cost, best_k, best_reverse = cost, k, reverse
+
+                if best_k is not None:
+                    if best_reverse:
+                        segment.reverse()
+                    tour[:] = (
+                        rest[: best_k + 1] + segment + rest[best_k + 1 :]
+                    )
+                    improved = True
+    return tour
+
+
+def approximate_tour(
+    weights: list[list[int]], time_budget: float = 1.0, cancelled=None
+) -> tuple[int, list[int]]:
+    """
+    nearest neighbour tour improved with 2-opt and Or-opt moves until no
+    move helps or `time_budget` seconds have passed
+    """
+    deadline = time.perf_counter() + time_budget
+    tour = nearest_neighbour_tour(weights)
+
+    while time.perf_counter() < deadline:
+        length = tour_length(tour, weights)
+        two_opt(tour, weights, deadline, cancelled)
+        or_opt(tour, weights, deadline, cancelled)
+        if tour_length(tour, weights) >= length:
+            break
+
+    return tour_length(tour, weights), tour
+
+
+def _one_tree(weights: list[list[int]], penalties: list[float]):
+    """
+    minimum 1-tree under the penalised weights w[i][j] + p[i] + p[j]: a
+    spanning tree over every index but 0, plus the two cheapest edges
+    joining index 0 to it; returns its weight and the degree of each index
+    """
+    n = len(weights)
+    degrees = [0] * n
+
+    # prim's algorithm over the dense weight matrix, without index 0
+    in_tree = [False] * n
+    in_tree[0] = True
+    cheapest = [INFINITY] * n
+    parent = [-1] * n
+    cheapest[1] = 0
+    tree_weight = 0
+    for _ in range(n - 1):
+        node = min(
+            (i for i in range(n) if not in_tree[i]),
+            key=lambda i: cheapest[i],
+        )
+        in_tree[node] = True
+        tree_weight += cheapest[node]
+        if parent[node] != -1:
+            degrees[node] += 1
+            degrees[parent[node]] += 1
+
+        row, penalty = weights[node], penalties[node]
+        for i in range(n):
+            cost = row[i] + penalty + penalties[i]
+            if not in_tree[i] and cost < cheapest[i]:
+                cheapest[i] = cost
+                parent[i] = node
+
+    # connect index 0 with its two cheapest edges
+    first, second = sorted(
+        range(1, n), key=lambda i: weights[0][i] + penalties[0] + penalties[i]
+    )[:2]
+    for i in (first, second):
+        tree_weight += weights[0][i] + penalties[0] + penalties[i]
+        degrees[i] += 1
+    degrees[0] = 2
+
+    return tree_weight, degrees
+
+
+def one_tree_lower_bound(
+    weights: list[list[int]],
+    upper_bound: int,
+    iterations: int = 100,
+    cancelled=None,
+):
+    """
+    Held-Karp lower bound on the tour length: the minimum 1-tree, which
+    is at most the optimal tour, tightened by subgradient ascent on
+    per-index penalties that push every index towards degree 2; the step
+    size is scaled by the gap to `upper_bound`, a known tour length
+    """
+    n = len(weights)
+    if n == 1:
+        return 0
+    if n == 2:
+        return weights[0][1] + weights[1][0]
+
+    penalties = [0.0] * n
+    best = 0
+    scale = 2.0
+    stalled = 0
+    for _ in range(iterations):
+        check_cancelled(cancelled)
+        tree_weight, degrees = _one_tree(weights, penalties)
+        bound = tree_weight - 2 * sum(penalties)
+
+        # halve the step scale when the bound stops improving
+        if bound > best:
+            best = bound
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled == 5:
+                scale /= 2
+                stalled = 0
+
+        violations = [degree - 2 for degree in degrees]
+        norm = sum(v * v for v in violations)
+        if norm == 0 or upper_bound <= bound:
+            break  # the bound matches the known tour
+
+        step = scale * (upper_bound - bound) / norm
+        penalties = [p + step * v for p, v in zip(penalties, violations)]
+
+    # tours over integer weights have integer lengths
+    if isinstance(upper_bound, int):
+        return math.ceil(best - 1e-9)
+    return best
@@ -0,0 +1,35 @@
+import argparse
+import asyncio
+
+from pathfinders.registry import PATH_FINDERS
+from .server import RoutingServer
+
+parser = argparse.ArgumentParser(
+    prog="python -m service", description="Serve route queries over HTTP."
+)
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--port", type=int, default=8080)
+parser.add_argument("--workers", type=int, default=None)
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    default=4096,
+    help="routes kept in the server's cache, 0 to disable",
+)
+parser.add_argument(
+    "-a", "--algorithm", default="dijkstra", choices=sorted(PATH_FINDERS)
+)
+args = parser.parse_args()
+
+server = RoutingServer(
+    algorithm=args.algorithm,
+    workers=args.workers,
+    cache_size=args.cache_size,
+)
+print(f"serving on http://{args.host}:{args.port}", flush=True)
+try:
+    asyncio.run(server.serve(args.host, args.port))
+except KeyboardInterrupt:
+    pass
+finally:
+    server.close()
@@ -0,0 +1,107 @@
+"""
+small load generator for the routing service: each client holds one
+keep-alive connection and sends requests back to back
+
+    python -m service.loadgen --clients 16 --requests 2000 --batch 1
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from graph.snapshot import SnapshotGraphBuilder
+from pathfinders.parallel import LONDON_DATASET
+from .metrics import LatencyHistogram
+
+
+async def client(host, port, requests, batch, stations, rng, histogram):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            pairs = [
+                [rng.choice(stations), rng.choice(stations)]
+                for _ in range(batch)
+            ]
+            if batch == 1:
+                path = "/route"
+                body = {"start": pairs[0][0], "end": pairs[0][1]}
+            else:
+                path, body = "/routes", {"queries": pairs}
+            payload = json.dumps(body).encode()
+
+            start_time = time.perf_counter()
+            writer.write(
+                (
+                    f"POST {path} HTTP/1.1\r\n"
+                    f"Host: {host}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    "\r\n"
+                ).encode()
+                + payload
+            )
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            if b" 200 " not in status_line:
+                raise RuntimeError(status_line.decode().strip())
+            histogram.record(time.perf_counter() - start_time)
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, requests, batch, seed=0):
+    builder = SnapshotGraphBuilder(*LONDON_DATASET)
+    stations, _, _ = builder.build_components()
+    stations = sorted(stations)
+    histogram = LatencyHistogram()
+    start_time = time.perf_counter()
+    await asyncio.gather(
+        *(
+            client(
+                host,
+                port,
+                requests // clients,
+                batch,
+                stations,
+                random.Random(seed + i),
+                histogram,
+            )
+            for i in range(clients)
+        )
+    )
+    seconds = time.perf_counter() - start_time
+
+    snapshot = histogram.snapshot()
+    print(
+        f"{snapshot['count']} requests x {batch} routes from {clients} "
+        f"clients in {seconds:.2f} s: "
+        f"{snapshot['count'] * batch / seconds:.0f} routes/s, "
+        f"p50 {snapshot['p50_ms']} ms, p90 {snapshot['p90_ms']} ms, "
+        f"p99 {snapshot['p99_ms']} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m service.loadgen")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--batch", type=int, default=1, help="routes per request"
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        run(args.host, args.port, args.clients, args.requests, args.batch)
+    )
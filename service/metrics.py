@@ -0,0 +1,51 @@
+import bisect
+import math
+
+# bucket upper bounds in milliseconds, roughly four per power of ten
+BUCKET_BOUNDS_MS = [
+    round(10 ** (exponent / 4), 3) for exponent in range(-8, 17)
+]
+
+
+class LatencyHistogram:
+    """fixed log-spaced latency buckets, cheap to update on every request"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        latency_ms = seconds * 1000
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, fraction: float) -> float:
+        """upper bound of the bucket holding the given fraction of requests"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(fraction * self.count)
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": {
+                f"le_{bound}": count
+                for bound, count in zip(BUCKET_BOUNDS_MS, self.counts)
+                if count
+            },
+        }
@@ -0,0 +1,302 @@
+"""
+asyncio HTTP routing service
+
+the graph is loaded once by every worker of a `ParallelQueryExecutor`, so
+searches never run on the event loop; single route requests that arrive
+together are coalesced into one chunk for the pool, and popular routes are
+answered from a `RouteCache` without reaching the pool at all
+
+a station can be given as an id or by position, as [latitude, longitude]
+in JSON or `start=51.5154,-0.1755` in a query string, for the nearest one
+
+endpoints, all returning JSON:
+- GET /route?start=1&end=200 or POST /route {"start": 1, "end": 200}
+- POST /routes {"queries": [[1, 200], [5, 17]]}
+- POST /snap {"points": [[51.5154, -0.1755], ...]}: the nearest station
+  to each [latitude, longitude] and how many metres away it is
+- GET /metrics: latency histograms per endpoint and cache hit rates
+- GET /health
+"""
+import asyncio
+import json
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+import time
+
+from graph.graph import Graph
+from graph.snapshot import SnapshotGraphBuilder
+from pathfinders.cache import RouteCache
+from pathfinders.parallel import LONDON_DATASET, ParallelQueryExecutor
+from .metrics import LatencyHistogram
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+ENDPOINTS = ("/route", "/routes", "/snap", "/metrics", "/health")
+MAX_BODY_BYTES = 1 << 22
+MAX_BATCH = 256  # pairs coalesced into one pool submission
+BATCH_WINDOW = 0.002  # seconds to wait for more single requests
+MAX_SNAP = 4096  # points snapped in one request, on the event loop
+
+
+class BadRequest(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class RoutingServer:
+    def __init__(
+        self,
+        dataset_files: tuple = LONDON_DATASET,
+        algorithm: str = "dijkstra",
+        workers: int = None,
+        cache_size: int = 4096,
+    ):
+        graph_builder = SnapshotGraphBuilder(*dataset_files)
+        self.graph = Graph(*graph_builder.build_components())
+        self.executor = ParallelQueryExecutor(
+            dataset_files, algorithm, workers
+        )
+        self.algorithm = algorithm
+        self.cache = RouteCache(cache_size)
+        self.cache.watch(self.graph)
+        self.latency = defaultdict(LatencyHistogram)
+        self._pending = []  # (pair, future) waiting to be batched
+        self._flush_handle = None
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        server = await asyncio.start_server(
+            self._handle_connection, host, port
+        )
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+
+    async def _handle_connection(self, reader, writer):
+        # one connection serves requests until the client closes it or
+        # asks not to keep it alive
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_request(
+                    request_line, reader, writer
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer) -> bool:
+        start_time = time.perf_counter()
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            self._write_response(writer, 400, {"error": "bad request"}, False)
+            return False
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = (
+            connection != "close"
+            if version == "HTTP/1.1"
+            else connection == "keep-alive"
+        )
+
+        url = urlsplit(target)
+        try:
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY_BYTES:
+                raise BadRequest("request body too large", 413)
+            body = await reader.readexactly(length) if length else b""
+            status, payload = 200, await self._dispatch(method, url, body)
+        except BadRequest as error:
+            status, payload = error.status, {"error": str(error)}
+        except ValueError as error:
+            status, payload = 400, {"error": str(error)}
+        except asyncio.IncompleteReadError:
+            raise  # the client went away; there is no one to answer
+        except Exception as error:
+            # a failed query must not drop the connection without a reply
+            status, payload = 500, {"error": str(error)}
+
+        self._write_response(writer, status, payload, keep_alive)
+        endpoint = url.path if url.path in ENDPOINTS else "other"
+        self.latency[endpoint].record(time.perf_counter() - start_time)
+        return keep_alive
+
+    def _write_response(self, writer, status, payload, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                "\r\n"
+            ).encode()
+            + body
+        )
+
+    async def _dispatch(self, method: str, url, body: bytes):
+        if url.path == "/health":
+            return {"status": "ok", "stations": len(self.graph.nodes)}
+        if url.path == "/metrics":
+            metrics = {
+                path: histogram.snapshot()
+                for path, histogram in sorted(self.latency.items())
+            }
+            metrics["cache"] = self.cache.stats()
+            return metrics
+
+        if url.path == "/route":
+            if method == "GET":
+                query = parse_qs(url.query)
+                pair = (
+                    query.get("start", [""])[0],
+                    query.get("end", [""])[0],
+                )
+            elif method == "POST":
+                request = _json_object(body)
+                pair = (request.get("start"), request.get("end"))
+            else:
+                raise BadRequest("use GET or POST", 405)
+            return await self._route(self._validate(pair))
+
+        if url.path == "/routes":
+            if method != "POST":
+                raise BadRequest("use POST", 405)
+            queries = _json_object(body).get("queries", [])
+            if not isinstance(queries, list):
+                raise BadRequest("queries must be a list")
+            pairs = [self._validate(pair) for pair in queries]
+            results = []
+            for i in range(0, len(pairs), MAX_BATCH):
+                results += await asyncio.wrap_future(
+                    self.executor.submit_paths(pairs[i : i + MAX_BATCH])
+                )
+            return {"results": results}
+
+        if url.path == "/snap":
+            if method != "POST":
+                raise BadRequest("use POST", 405)
+            points = _json_object(body).get("points", [])
+            if not isinstance(points, list):
+                raise BadRequest("points must be a list")
+            if len(points) > MAX_SNAP:
+                raise BadRequest(f"at most {MAX_SNAP} points", 413)
+            snapped = self.graph.station_index.snap(
+                (longitude, latitude)
+                for latitude, longitude in map(_position, points)
+            )
+            return {
+                "stations": [
+                    {"station": station, "metres": round(metres, 1)}
+                    for station, metres in snapped
+                ]
+            }
+
+        raise BadRequest(f"no such endpoint {url.path}", 404)
+
+    def _validate(self, pair) -> tuple:
+        if isinstance(pair, dict):
+            pair = (pair.get("start"), pair.get("end"))
+        try:
+            start, end = pair
+        except (TypeError, ValueError):
+            raise BadRequest(f"invalid query {pair!r}") from None
+        return self._station(start), self._station(end)
+
+    def _station(self, value) -> int:
+        """a station id, or the nearest station to a position"""
+        if isinstance(value, str) and "," in value:
+            value = value.split(",")
+        if isinstance(value, (list, tuple)):
+            return self.graph.nearest_station(*_position(value))[0]
+        try:
+            station = int(value)
+        except (TypeError, ValueError):
+            raise BadRequest(f"invalid station {value!r}") from None
+        if station not in self.graph.nodes:
+            raise BadRequest(f"unknown station {station}")
+        return station
+
+    def _cache_key(self, pair: tuple) -> tuple:
+        return (self.algorithm, *pair, self.graph.version)
+
+    def _route(self, pair: tuple) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        cached = self.cache.get(self._cache_key(pair))
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        # park the pair until the batch fills up or the window closes
+        self._pending.append((pair, future))
+        if len(self._pending) >= MAX_BATCH:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                BATCH_WINDOW, self._flush
+            )
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        pool_future = asyncio.wrap_future(
+            self.executor.submit_paths([pair for pair, _ in batch])
+        )
+
+        def resolve(done):
+            error = done.exception()
+            for i, (pair, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    result = done.result()[i]
+                    self.cache.put(self._cache_key(pair), result)
+                    future.set_result(result)
+
+        pool_future.add_done_callback(resolve)
+
+
+def _position(value) -> tuple[float, float]:
+    try:
+        latitude, longitude = map(float, value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"invalid position {value!r}") from None
+    return latitude, longitude
+
+
+def _json_object(body: bytes) -> dict:
+    request = json.loads(body or b"{}")
+    if not isinstance(request, dict):
+        raise BadRequest("request body must be a JSON object")
+    return request
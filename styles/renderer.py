@@ -0,0 +1,369 @@
+from collections import deque
+import time
+import tkinter as tk
+
+from graph.graph import Graph
+from graph.spatial import GridIndex, simplify
+from styles.colours import Colour
+from styles.customtk import create_circle
+from styles.viewport import Viewport
+
+# milliseconds between animation frames, about 60 per second
+FRAME_INTERVAL = 16
+STATION_RADIUS = 3
+VISITED_RADIUS = 4
+# above this many stations on screen only the outline of lines is drawn
+DETAIL_LIMIT = 3000
+# pixels between the points kept on an outline
+OUTLINE_TOLERANCE = 4
+
+
+class SearchRenderer:
+    """
+    draws the part of the network inside a `Viewport` and animates
+    searches on it by recolouring those items, instead of creating new
+    ones for every step
+
+    stations and connections are found through grid indexes, so only the
+    visible ones get canvas items, one line per pair of connected
+    stations and one circle per station; when too many stations are in
+    view, each line is drawn instead as a few polylines thinned to the
+    zoom level, with only the stations and connections a search has
+    reached on top
+
+    each frame takes (node, colour) steps from an iterator for at most
+    `frame_budget` seconds, paced so that one step is drawn every `delay`
+    milliseconds, or as many as fit in the budget for a delay of 0; a
+    step of None means nothing is ready yet. an item already in the
+    step's colour is not touched again
+    """
+
+    def __init__(
+        self,
+        canvas: tk.Canvas,
+        graph: Graph,
+        viewport: Viewport,
+        frame_budget: float = 0.008,
+    ):
+        self.canvas = canvas
+        self.graph = graph
+        self.viewport = viewport
+        self.frame_budget = frame_budget
+        self.delay = 50
+        self.skipping = False
+        self.steps = None
+        self.frame_times = deque(maxlen=30)
+        self.items_updated = 0
+        self._callback = None
+        self._redraw_callback = None
+        self._credit = 0.0
+        self._last_frame = 0.0
+
+        # colours given by searches, kept for items not drawn yet
+        self.node_colours = {}
+        self.pair_colours = {}
+        # items currently on the canvas
+        self.node_items = {}  # station -> circle
+        self.line_items = {}  # (station, station) -> line
+        self.detailed = True
+
+        # positions are read from the columns once, not through node views
+        nodes = graph.nodes
+        self.positions = dict(
+            zip(nodes.ids, zip(nodes.longitude, nodes.latitude))
+        )
+        self.node_index = GridIndex.from_nodes(nodes)
+        self.pairs = []
+        self.pair_index = GridIndex(self.node_index.cell_size)
+        seen = set()
+        for node1, node2 in zip(graph.edges.node1, graph.edges.node2):
+            pair = (node1, node2) if node1 < node2 else (node2, node1)
+            if pair in seen:
+                continue
+            seen.add(pair)
+            x0, y0 = self.__pos(pair[0])
+            x1, y1 = self.__pos(pair[1])
+            self.pair_index.insert(len(self.pairs), x0, y0, x1, y1)
+            self.pairs.append(pair)
+
+        self.chains = [nodes for _, (nodes, _) in graph.line_chains()]
+        self.chain_index = GridIndex(self.node_index.cell_size)
+        for i, nodes in enumerate(self.chains):
+            xs, ys = zip(*map(self.__pos, nodes))
+            self.chain_index.insert(i, min(xs), min(ys), max(xs), max(ys))
+        self._outlines = {}  # zoom -> kept indexes of every chain
+
+    def __pos(self, node: int) -> tuple[float, float]:
+        return self.positions[node]
+
+    def screen_pos(self, node: int) -> tuple[float, float]:
+        return self.viewport.to_screen(*self.__pos(node))
+
+    def draw_network(self):
+        """draw what is in view: connections in grey, stations on top"""
+        self.canvas.delete("network")
+        self.node_items = {}
+        self.line_items = {}
+        bounds = self.viewport.bounds()
+        nodes = self.node_index.query(*bounds)
+        self.detailed = len(nodes) <= DETAIL_LIMIT
+
+        if self.detailed:
+            for i in self.pair_index.query(*bounds):
+                self._draw_line(self.pairs[i])
+            for node in nodes:
+                self._draw_station(node)
+        else:
+            self._draw_outline(bounds)
+            # what searches reached stays visible over the outline
+            for pair in self.pair_colours:
+                if self._in_view(pair[0]) or self._in_view(pair[1]):
+                    self._draw_line(pair)
+            for node in self.node_colours:
+                if self._in_view(node):
+                    self._draw_station(node)
+
+        # keep the network under routes and markers drawn by the GUI
+        self.canvas.tag_lower("network")
+
+    def _draw_line(self, pair: tuple):
+        colour = self.pair_colours.get(pair)
+        a, b = self.screen_pos(pair[0]), self.screen_pos(pair[1])
+        self.line_items[pair] = self.canvas.create_line(
+            a[0],
+            a[1],
+            b[0],
+            b[1],
+            fill=colour or Colour.GREY,
+            width=2 if colour else 1,
+            tags="network",
+        )
+
+    def _draw_station(self, node: int):
+        colour = self.node_colours.get(node)
+        x, y = self.screen_pos(node)
+        self.node_items[node] = create_circle(
+            self.canvas,
+            x,
+            y,
+            VISITED_RADIUS if colour else STATION_RADIUS,
+            colour=colour or Colour.DODGER_BLUE,
+            tags="network",
+        )
+
+    def _draw_outline(self, bounds: tuple):
+        # the outline is kept relative to the offsets, which is all that
+        # changes when the map is only panned
+        zoom = round(self.viewport.zoom, 4)
+        if zoom not in self._outlines:
+            if len(self._outlines) > 32:
+                self._outlines.clear()
+            self._outlines[zoom] = self._outline()
+        x_offset, y_offset = self.viewport.x_offset, self.viewport.y_offset
+        outline = self._outlines[zoom]
+        for i in self.chain_index.query(*bounds):
+            for points in outline[i]:
+                coords = []
+                for x, y in points:
+                    coords.append(x + x_offset)
+                    coords.append(y + y_offset)
+                self.canvas.create_line(
+                    *coords, fill=Colour.GREY, tags="network"
+                )
+
+    def _outline(self) -> list[list]:
+        """
+        every chain as polylines through the centres of the cells of
+        `OUTLINE_TOLERANCE` pixels its stations fall in, skipping the
+        segments that lie inside one cell or that another chain has
+        """
+        viewport, size = self.viewport, OUTLINE_TOLERANCE
+        x_scale = viewport.x_scale * viewport.zoom / size
+        y_scale = viewport.y_scale * viewport.zoom / size
+        x_origin, y_origin = viewport.x_origin, viewport.y_origin
+
+        drawn = set()
+        outline = []
+        for nodes in self.chains:
+            cells = []
+            for node in nodes:
+                x, y = self.__pos(node)
+                cells.append(
+                    (
+                        round((x - x_origin) * x_scale),
+                        round((y - y_origin) * y_scale),
+                    )
+                )
+            kept = [cells[i] for i in simplify(cells, 1)]
+
+            pieces, piece = [], []
+            for a, b in zip(kept, kept[1:]):
+                if a == b:
+                    continue
+                segment = (a, b) if a < b else (b, a)
+                if segment in drawn:
+                    if len(piece) > 1:
+                        pieces.append(piece)
+                    piece = []
+                    continue
+                drawn.add(segment)
+                if not piece:
+                    piece = [(a[0] * size, a[1] * size)]
+                piece.append((b[0] * size, b[1] * size))
+            if len(piece) > 1:
+                pieces.append(piece)
+            outline.append(pieces)
+        return outline
+
+    def _in_view(self, node: int) -> bool:
+        x, y = self.screen_pos(node)
+        return 0 <= x <= self.viewport.width and 0 <= y <= self.viewport.height
+
+    def pan(self, dx: float, dy: float):
+        """move the map by (dx, dy) pixels"""
+        self.viewport.pan(dx, dy)
+        self.canvas.move("all", dx, dy)
+        self._schedule_redraw()
+
+    def zoom(self, factor: float, x: float, y: float):
+        """zoom by `factor` about pixel (x, y)"""
+        self.viewport.zoom_at(factor, x, y)
+        self.canvas.scale("all", x, y, factor, factor)
+        self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        # items are moved at once, and culled again once input settles
+        if self._redraw_callback is not None:
+            self.canvas.after_cancel(self._redraw_callback)
+        self._redraw_callback = self.canvas.after(50, self._redraw)
+
+    def _redraw(self):
+        self._redraw_callback = None
+        self.draw_network()
+
+    def start(self, steps, on_done, on_error, on_frame=None):
+        """
+        animate `steps`, then call `on_done()`, or `on_error(error)` if
+        the iterator raises; `on_frame(renderer)` is called every frame
+        """
+        self.stop()
+        self.steps = steps
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_frame = on_frame
+        self.skipping = False
+        self._credit = 0.0
+        self._last_frame = time.perf_counter()
+        self.frame_times.clear()
+        self._callback = self.canvas.after(FRAME_INTERVAL, self._frame)
+
+    def stop(self):
+        if self._callback is not None:
+            self.canvas.after_cancel(self._callback)
+            self._callback = None
+        self.steps = None
+
+    def skip(self):
+        """draw the remaining steps without pacing them"""
+        self.skipping = True
+
+    @property
+    def fps(self) -> float:
+        if len(self.frame_times) < 2:
+            return 0.0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed else 0.0
+
+    def visit(self, node: int, colour: str):
+        """colour a station and the connections around it"""
+        for edge in self.graph.adj[node]:
+            pair = (min(edge.node1, edge.node2), max(edge.node1, edge.node2))
+            if self.pair_colours.get(pair) == colour:
+                continue
+            self.pair_colours[pair] = colour
+            item = self.line_items.get(pair)
+            if item is not None:
+                self.canvas.itemconfig(item, fill=colour, width=2)
+            elif not self.detailed and (
+                self._in_view(pair[0]) or self._in_view(pair[1])
+            ):
+                self._draw_line(pair)
+            self.items_updated += 1
+
+        if self.node_colours.get(node) == colour:
+            return
+        first_visit = node not in self.node_colours
+        self.node_colours[node] = colour
+        item = self.node_items.get(node)
+        if item is not None:
+            if first_visit:
+                self._resize(node, VISITED_RADIUS)
+            self.canvas.itemconfig(item, fill=colour)
+        elif not self.detailed and self._in_view(node):
+            self._draw_station(node)
+        self.items_updated += 1
+
+    def clear(self):
+        """stop animating and give every recoloured item its first look"""
+        self.stop()
+        if self.detailed:
+            for node in self.node_colours.keys() & self.node_items.keys():
+                self._resize(node, STATION_RADIUS)
+                self.canvas.itemconfig(
+                    self.node_items[node], fill=Colour.DODGER_BLUE
+                )
+            for pair in self.pair_colours.keys() & self.line_items.keys():
+                self.canvas.itemconfig(
+                    self.line_items[pair], fill=Colour.GREY, width=1
+                )
+        self.node_colours = {}
+        self.pair_colours = {}
+        if not self.detailed:
+            # what was reached was drawn over the outline, so start again
+            self.draw_network()
+
+    def _resize(self, node: int, radius: float):
+        x, y = self.screen_pos(node)
+        self.canvas.coords(
+            self.node_items[node],
+            x - radius,
+            y - radius,
+            x + radius,
+            y + radius,
+        )
+
+    def _frame(self):
+        start = time.perf_counter()
+        self.frame_times.append(start)
+        if self.skipping or not self.delay:
+            self._credit = float("inf")
+        else:
+            self._credit += (start - self._last_frame) * 1000 / self.delay
+        self._last_frame = start
+
+        while self._credit >= 1:
+            if time.perf_counter() - start >= self.frame_budget:
+                break
+            try:
+                step = next(self.steps)
+            except StopIteration:
+                self._callback = None
+                self.on_done()
+                return
+            except Exception as error:
+                self._callback = None
+                self.on_error(error)
+                return
+
+            if step is None:
+                # credit is not saved up while waiting for the search
+                self._credit = 0.0
+                break
+            self.visit(*step)
+            self._credit -= 1
+
+        if self._credit == float("inf"):
+            self._credit = 0.0
+        if self.on_frame is not None:
+            self.on_frame(self)
+        self._callback = self.canvas.after(FRAME_INTERVAL, self._frame)
@@ -0,0 +1,52 @@
+class Viewport:
+    """
+    maps (longitude, latitude) positions to canvas pixels:
+    `x = (longitude - x_origin) * x_scale * zoom + x_offset`, and likewise
+    for y, so panning moves the offsets and zooming scales about a point
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        x_origin: float,
+        y_origin: float,
+        x_scale: float,
+        y_scale: float,
+        margin: float = 30,
+    ):
+        self.width = width
+        self.height = height
+        self.x_origin = x_origin
+        self.y_origin = y_origin
+        self.x_scale = x_scale
+        self.y_scale = y_scale
+        self.x_offset = margin
+        self.y_offset = margin
+        self.zoom = 1.0
+
+    def to_screen(self, x: float, y: float) -> tuple[float, float]:
+        return (
+            (x - self.x_origin) * self.x_scale * self.zoom + self.x_offset,
+            (y - self.y_origin) * self.y_scale * self.zoom + self.y_offset,
+        )
+
+    def to_map(self, x: float, y: float) -> tuple[float, float]:
+        return (
+            (x - self.x_offset) / (self.x_scale * self.zoom) + self.x_origin,
+            (y - self.y_offset) / (self.y_scale * self.zoom) + self.y_origin,
+        )
+
+    def bounds(self) -> tuple[float, float, float, float]:
+        """the map rectangle on screen, as x0, y0, x1, y1"""
+        return (*self.to_map(0, 0), *self.to_map(self.width, self.height))
+
+    def pan(self, dx: float, dy: float):
+        self.x_offset += dx
+        self.y_offset += dy
+
+    def zoom_at(self, factor: float, x: float, y: float):
+        """zoom by `factor` keeping the map point under pixel (x, y)"""
+        self.zoom *= factor
+        self.x_offset = x - (x - self.x_offset) * factor
+        self.y_offset = y - (y - self.y_offset) * factor